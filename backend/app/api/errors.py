@@ -0,0 +1,22 @@
+"""
+Error responses shared by API routes
+"""
+
+import math
+
+from fastapi import HTTPException
+
+from app.core.resilience import TRANSIENT_ERRORS, DatastoreUnavailable
+
+
+def server_error(e: Exception) -> HTTPException:
+    """
+    HTTP error for an unexpected exception in a route.
+    Transient Datastore failures are 503 with Retry-After, so clients back
+    off and retry; anything else is a 500.
+    """
+    if isinstance(e, DatastoreUnavailable):
+        return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
+    if isinstance(e, TRANSIENT_ERRORS):
+        return HTTPException(status_code=503, detail="Datastore is temporarily unavailable", headers={"Retry-After": "1"})
+    return HTTPException(status_code=500, detail=str(e))
@@ -3,7 +3,7 @@ API v1 routes
 """
 
 from fastapi import APIRouter
-from app.api.v1 import timezone, workers, shifts
+from app.api.v1 import timezone, workers, shifts, templates, schedule, jobs, stats
 
 router = APIRouter()
 
@@ -11,4 +11,7 @@ router = APIRouter()
 router.include_router(timezone.router, tags=["timezone"])
 router.include_router(workers.router, prefix="/workers", tags=["workers"])
 router.include_router(shifts.router, prefix="/shifts", tags=["shifts"])
-
+router.include_router(templates.router, prefix="/shift-templates", tags=["shift templates"])
+router.include_router(schedule.router, prefix="/schedule", tags=["schedule"])
+router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
+router.include_router(stats.router, prefix="/stats", tags=["stats"])
@@ -0,0 +1,56 @@
+"""
+Background jobs API endpoints
+"""
+
+from fastapi import APIRouter, Depends, HTTPException
+from app.api.errors import server_error
+from app.core.dependencies import get_job_runner
+from app.core.jobs import JobError, JobQueueFull, JobRunner
+from app.core.tenancy import get_tenant
+from app.models.schemas import Job, JobCreate
+
+router = APIRouter()
+
+
+@router.post("", response_model=Job, status_code=202)
+async def create_job(job: JobCreate, tenant: str = Depends(get_tenant), job_runner: JobRunner = Depends(get_job_runner)):
+    """Submit a background job; poll GET /api/jobs/{id} for its progress and result"""
+    try:
+        return job_runner.submit(tenant, job.type, job.params)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except JobError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise server_error(e)
+
+
+@router.get("/{job_id}", response_model=Job)
+async def get_job(job_id: str, tenant: str = Depends(get_tenant), job_runner: JobRunner = Depends(get_job_runner)):
+    """Get a job's status, progress and result"""
+    try:
+        job = job_runner.get(tenant, job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return job
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise server_error(e)
+
+
+@router.post("/{job_id}/cancel", response_model=Job)
+async def cancel_job(job_id: str, tenant: str = Depends(get_tenant), job_runner: JobRunner = Depends(get_job_runner)):
+    """
+    Cancel a job. Queued jobs never start and running ones stop at their
+    next progress report; the status turns to cancelled once they have.
+    """
+    try:
+        job = job_runner.cancel(tenant, job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return job
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise server_error(e)
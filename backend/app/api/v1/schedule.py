@@ -0,0 +1,82 @@
+"""
+Scheduling API endpoints
+"""
+
+import hashlib
+from datetime import datetime, timedelta
+from typing import Optional
+from zoneinfo import ZoneInfo
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from app.api.errors import server_error
+from app.core.dependencies import get_schedule_service, get_shift_service, get_timezone_service
+from app.models.schemas import AutoFillRequest, AutoFillResult, ScheduleGrid
+from app.services.schedule_service import ScheduleService
+from app.services.shift_service import ShiftService, ShiftValidationError, normalize_window
+from app.services.timezone_service import TimezoneService
+from app.utils.grid import local_midnight
+
+router = APIRouter()
+
+
+@router.post("/auto-fill", response_model=AutoFillResult)
+async def auto_fill(request: AutoFillRequest, schedule_service: ScheduleService = Depends(get_schedule_service)):
+    """
+    Assign open slots to workers.
+    Each slot goes to the worker with the fewest scheduled hours who can take
+    it without breaking the labor rules (no overlap, maximum duration, and
+    rest and hour caps when enabled). Slots no one can take are reported as
+    unfilled. With dry_run the plan is returned without creating shifts.
+    """
+    try:
+        return schedule_service.auto_fill(
+            [slot.model_dump() for slot in request.slots],
+            worker_ids=request.worker_ids,
+            dry_run=request.dry_run,
+        )
+    except ShiftValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise server_error(e)
+
+
+@router.get("/grid", response_model=ScheduleGrid)
+async def get_grid(
+    response: Response,
+    window_start: Optional[datetime] = Query(None, alias="from", description="Window start, defaults to today's local midnight"),
+    window_end: Optional[datetime] = Query(None, alias="to", description="Window end, defaults to 7 local days after the start"),
+    if_none_match: Optional[str] = Header(None),
+    shift_service: ShiftService = Depends(get_shift_service),
+    timezone_service: TimezoneService = Depends(get_timezone_service),
+):
+    """
+    Hours per worker and local day in the configured timezone.
+    Shifts crossing local midnight are split between the days they touch,
+    including on DST changes. Responses carry an ETag that changes with any
+    shift or template write, and If-None-Match is answered with 304.
+    """
+    try:
+        timezone = timezone_service.get_timezone() or "UTC"
+        zone = ZoneInfo(timezone)
+        if window_start is None:
+            window_start = local_midnight(datetime.now(zone).date(), zone)
+        window_start, window_end = normalize_window(window_start, window_end)
+        if window_end is None:
+            window_end = local_midnight(window_start.astimezone(zone).date() + timedelta(days=7), zone)
+
+        version = shift_service.collection_version()
+        etag = '"' + hashlib.sha256(
+            f"{version}|{window_start.isoformat()}|{window_end.isoformat()}|{timezone}".encode()
+        ).hexdigest()[:32] + '"'
+        if if_none_match == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+
+        grid = shift_service.get_grid(timezone, window_start, window_end, version=version)
+        response.headers["ETag"] = etag
+        # "today" depends on the clock, not the data, so it is not cached with the grid
+        return {**grid, "today": datetime.now(zone).date().isoformat()}
+    except HTTPException:
+        raise
+    except ShiftValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise server_error(e)
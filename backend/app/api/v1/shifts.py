@@ -2,33 +2,128 @@
 Shifts API endpoints
 """
 
-from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional
-from app.models.schemas import Shift, ShiftCreate, ShiftUpdate, ErrorResponse
-from app.services.shift_service import ShiftService, ShiftValidationError
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
+from typing import List, Optional, Union
+from datetime import datetime
+from app.api.errors import server_error
+from app.core.dependencies import get_shift_service, get_timezone_service, get_worker_service
+from app.models.schemas import Shift, ShiftChanges, ShiftCreate, ShiftUpdate, ErrorResponse
+from app.services.shift_service import ShiftService, ShiftValidationError, normalize_window
 from app.services.timezone_service import TimezoneService
+from app.services.worker_service import WorkerService
+from app.core.config import settings
+from app.utils.dataloader import WorkerLoader
+from app.utils.serialization import (
+    JSON_MEDIA_TYPE,
+    UnsupportedMediaTypeError,
+    compress_stream,
+    encode_shift_pages,
+    encode_shifts_json,
+    negotiate_encoding,
+    negotiate_media_type,
+)
+from app.utils.sync import SyncWindowExpiredError
 from app.utils.timezone import apply_timezone_to_shifts
 
 router = APIRouter()
-shift_service = ShiftService()
-timezone_service = TimezoneService()
 
+INCLUDE_OPTIONS = {"worker"}
 
-@router.get("", response_model=List[Shift])
-async def get_shifts(worker_id: Optional[str] = Query(None, description="Filter by worker ID")):
-    """Get all shifts, optionally filtered by worker_id. Times are returned in the configured timezone."""
+
+def get_worker_loader(worker_service: WorkerService = Depends(get_worker_service)) -> WorkerLoader:
+    """Worker loader dependency, a fresh one per request"""
+    return WorkerLoader(worker_service)
+
+
+def parse_include(include: Optional[str] = Query(
+    None, description="Comma-separated related data to embed. Supported: worker"
+)) -> set:
+    """Parse and validate the include query parameter"""
+    options = {option.strip() for option in (include or "").split(",") if option.strip()}
+    unknown = options - INCLUDE_OPTIONS
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unsupported include: {', '.join(sorted(unknown))}")
+    return options
+
+
+@router.get("", response_model=Union[List[Shift], ShiftChanges])
+async def get_shifts(
+    worker_id: Optional[str] = Query(None, description="Filter by worker ID"),
+    window_start: Optional[datetime] = Query(
+        None, alias="from", description="Only return shifts ending after this time"
+    ),
+    window_end: Optional[datetime] = Query(
+        None, alias="to", description="Only return shifts starting before this time"
+    ),
+    updated_since: Optional[datetime] = Query(
+        None, description="Only return shifts changed after this time, plus deleted IDs"
+    ),
+    accept: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+    include: set = Depends(parse_include),
+    worker_loader: WorkerLoader = Depends(get_worker_loader),
+    shift_service: ShiftService = Depends(get_shift_service),
+    timezone_service: TimezoneService = Depends(get_timezone_service),
+):
+    """
+    Get all shifts, optionally filtered by worker_id. Times are returned in the configured timezone.
+    With updated_since, returns only the changes since that cursor for incremental sync.
+    With from and/or to, only shifts overlapping that time window are returned.
+    With include=worker, each shift embeds its worker's id and name.
+    Full lists can also be requested as columnar MessagePack (application/vnd.msgpack)
+    or Arrow IPC (application/vnd.apache.arrow.stream) through the Accept header.
+    """
     try:
-        shifts = shift_service.get_shifts(worker_id=worker_id)
-        # Apply timezone conversion
+        window_start, window_end = normalize_window(window_start, window_end)
         timezone = timezone_service.get_timezone()
-        shifts = apply_timezone_to_shifts(shifts, timezone)
-        return shifts
+        media_type = negotiate_media_type(accept) if updated_since is None else JSON_MEDIA_TYPE
+        if media_type != JSON_MEDIA_TYPE:
+            pages = shift_service.iter_shift_pages(worker_id, window_start, window_end)
+            encoding, body = compress_stream(
+                encode_shift_pages(pages, media_type, timezone),
+                negotiate_encoding(accept_encoding),
+                settings.COMPRESSION_MIN_BYTES,
+            )
+            headers = {"Vary": "Accept, Accept-Encoding"}
+            if encoding:
+                headers["Content-Encoding"] = encoding
+            if isinstance(body, bytes):
+                return Response(content=body, media_type=media_type, headers=headers)
+            return StreamingResponse(body, media_type=media_type, headers=headers)
+        if updated_since is not None:
+            changes = shift_service.get_changes(updated_since, worker_id=worker_id)
+            changes["items"] = apply_timezone_to_shifts(changes["items"], timezone)
+            if "worker" in include:
+                worker_loader.embed(changes["items"])
+            return changes
+        # Dicts in the timezone are only built here, from the cached batch
+        cached = shift_service.get_shift_list(timezone, worker_id, window_start, window_end)
+        if "worker" in include:
+            return worker_loader.embed(cached.batch.to_dicts(timezone))
+        if cached.body is None:
+            cached.body = encode_shifts_json(cached.batch.to_dicts(timezone))
+        return Response(content=cached.body, media_type=JSON_MEDIA_TYPE)
+    except HTTPException:
+        raise
+    except ShiftValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UnsupportedMediaTypeError as e:
+        raise HTTPException(status_code=406, detail=str(e))
+    except SyncWindowExpiredError as e:
+        raise HTTPException(status_code=410, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise server_error(e)
 
 
 @router.get("/{shift_id}", response_model=Shift)
-async def get_shift(shift_id: str):
+async def get_shift(
+    shift_id: str,
+    include: set = Depends(parse_include),
+    worker_loader: WorkerLoader = Depends(get_worker_loader),
+    shift_service: ShiftService = Depends(get_shift_service),
+    timezone_service: TimezoneService = Depends(get_timezone_service),
+):
     """Get a shift by ID. Time is returned in the configured timezone."""
     try:
         shift = shift_service.get_shift(shift_id)
@@ -37,15 +132,22 @@ async def get_shift(shift_id: str):
         # Apply timezone conversion
         timezone = timezone_service.get_timezone()
         [shift] = apply_timezone_to_shifts([shift], timezone)
+        if "worker" in include:
+            worker_loader.embed([shift])
         return shift
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise server_error(e)
 
 
 @router.post("", response_model=Shift, status_code=201)
-async def create_shift(shift: ShiftCreate):
+async def create_shift(
+    shift: ShiftCreate,
+    include: set = Depends(parse_include),
+    worker_loader: WorkerLoader = Depends(get_worker_loader),
+    shift_service: ShiftService = Depends(get_shift_service),
+):
     """Create a new shift with validation"""
     try:
         created = shift_service.create_shift(
@@ -53,15 +155,23 @@ async def create_shift(shift: ShiftCreate):
             start=shift.start,
             end=shift.end
         )
+        if "worker" in include:
+            worker_loader.embed([created])
         return created
     except ShiftValidationError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise server_error(e)
 
 
 @router.put("/{shift_id}", response_model=Shift)
-async def update_shift(shift_id: str, shift: ShiftUpdate):
+async def update_shift(
+    shift_id: str,
+    shift: ShiftUpdate,
+    include: set = Depends(parse_include),
+    worker_loader: WorkerLoader = Depends(get_worker_loader),
+    shift_service: ShiftService = Depends(get_shift_service),
+):
     """Update a shift with validation"""
     try:
         updated = shift_service.update_shift(
@@ -72,17 +182,19 @@ async def update_shift(shift_id: str, shift: ShiftUpdate):
         )
         if not updated:
             raise HTTPException(status_code=404, detail="Shift not found")
+        if "worker" in include:
+            worker_loader.embed([updated])
         return updated
     except HTTPException:
         raise
     except ShiftValidationError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise server_error(e)
 
 
 @router.delete("/{shift_id}", status_code=204)
-async def delete_shift(shift_id: str):
+async def delete_shift(shift_id: str, shift_service: ShiftService = Depends(get_shift_service)):
     """Delete a shift"""
     try:
         deleted = shift_service.delete_shift(shift_id)
@@ -92,5 +204,5 @@ async def delete_shift(shift_id: str):
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise server_error(e)
 
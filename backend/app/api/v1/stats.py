@@ -0,0 +1,44 @@
+"""
+Statistics API endpoints
+"""
+
+from datetime import date, timedelta
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from app.api.errors import server_error
+from app.core.config import settings
+from app.core.dependencies import get_stats_service
+from app.models.schemas import Stats
+from app.services.stats_service import StatsService
+
+router = APIRouter()
+
+
+@router.get("", response_model=Stats)
+async def get_stats(
+    worker_id: Optional[str] = Query(None, description="Also return this worker's totals"),
+    first_day: Optional[date] = Query(None, alias="from", description="First UTC day to return totals for"),
+    last_day: Optional[date] = Query(None, alias="to", description="Last UTC day to return totals for, inclusive"),
+    stats_service: StatsService = Depends(get_stats_service),
+):
+    """
+    Shift, hour and worker totals of the tenant, summed from sharded counters
+    instead of counting shifts. Optionally a worker's totals and totals per
+    UTC day (by shift start). Template occurrences are counted once edited.
+    """
+    try:
+        days = []
+        if first_day is not None or last_day is not None:
+            first_day = first_day or last_day
+            last_day = last_day or first_day
+            if last_day < first_day:
+                raise HTTPException(status_code=400, detail="from must not be after to")
+            count = (last_day - first_day).days + 1
+            if count > settings.STATS_MAX_DAYS:
+                raise HTTPException(status_code=400, detail=f"At most {settings.STATS_MAX_DAYS} days can be requested")
+            days = [first_day + timedelta(days=i) for i in range(count)]
+        return stats_service.get_stats(worker_id, days)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise server_error(e)
@@ -0,0 +1,100 @@
+"""
+Recurring shift templates API endpoints
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Optional
+from app.api.errors import server_error
+from app.core.dependencies import get_shift_service
+from app.models.schemas import ShiftTemplate, ShiftTemplateCreate, ShiftTemplateUpdate, ErrorResponse
+from app.services.shift_service import ShiftService, ShiftValidationError
+
+router = APIRouter()
+
+
+@router.get("", response_model=List[ShiftTemplate])
+async def get_templates(
+    worker_id: Optional[str] = Query(None, description="Filter by worker ID"),
+    shift_service: ShiftService = Depends(get_shift_service),
+):
+    """Get all recurring shift templates, optionally filtered by worker_id"""
+    try:
+        return shift_service.get_templates(worker_id=worker_id)
+    except Exception as e:
+        raise server_error(e)
+
+
+@router.get("/{template_id}", response_model=ShiftTemplate)
+async def get_template(template_id: str, shift_service: ShiftService = Depends(get_shift_service)):
+    """Get a recurring shift template by ID"""
+    try:
+        template = shift_service.get_template(template_id)
+        if not template:
+            raise HTTPException(status_code=404, detail="Shift template not found")
+        return template
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise server_error(e)
+
+
+@router.post("", response_model=ShiftTemplate, status_code=201)
+async def create_template(template: ShiftTemplateCreate, shift_service: ShiftService = Depends(get_shift_service)):
+    """
+    Create a recurring shift template.
+    Its occurrences show up in shift lists and can be edited or deleted
+    individually through the shift endpoints using their IDs.
+    """
+    try:
+        return shift_service.create_template(
+            worker_id=template.worker_id,
+            start=template.start,
+            end=template.end,
+            rrule=template.rrule,
+            tz=template.timezone,
+        )
+    except ShiftValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise server_error(e)
+
+
+@router.put("/{template_id}", response_model=ShiftTemplate)
+async def update_template(
+    template_id: str,
+    template: ShiftTemplateUpdate,
+    shift_service: ShiftService = Depends(get_shift_service),
+):
+    """Update a recurring shift template with validation"""
+    try:
+        updated = shift_service.update_template(
+            template_id,
+            worker_id=template.worker_id,
+            start=template.start,
+            end=template.end,
+            rrule=template.rrule,
+            tz=template.timezone,
+        )
+        if not updated:
+            raise HTTPException(status_code=404, detail="Shift template not found")
+        return updated
+    except HTTPException:
+        raise
+    except ShiftValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise server_error(e)
+
+
+@router.delete("/{template_id}", status_code=204)
+async def delete_template(template_id: str, shift_service: ShiftService = Depends(get_shift_service)):
+    """Delete a recurring shift template"""
+    try:
+        deleted = shift_service.delete_template(template_id)
+        if not deleted:
+            raise HTTPException(status_code=404, detail="Shift template not found")
+        return None
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise server_error(e)
@@ -2,16 +2,17 @@
 Timezone API endpoints
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from app.api.errors import server_error
+from app.core.dependencies import get_timezone_service
 from app.models.schemas import TimezoneSetting, ErrorResponse
 from app.services.timezone_service import TimezoneService
 
 router = APIRouter(prefix="/timezone")
-timezone_service = TimezoneService()
 
 
 @router.get("", response_model=TimezoneSetting)
-async def get_timezone():
+async def get_timezone(timezone_service: TimezoneService = Depends(get_timezone_service)):
     """
     Get the current timezone setting.
     Returns UTC as default if not set.
@@ -20,11 +21,14 @@ async def get_timezone():
         timezone = timezone_service.get_timezone()
         return TimezoneSetting(timezone=timezone)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise server_error(e)
 
 
 @router.post("", response_model=TimezoneSetting)
-async def set_timezone(setting: TimezoneSetting):
+async def set_timezone(
+    setting: TimezoneSetting,
+    timezone_service: TimezoneService = Depends(get_timezone_service),
+):
     """
     Set the timezone setting.
     This will be used for all shift datetime operations.
@@ -35,5 +39,5 @@ async def set_timezone(setting: TimezoneSetting):
         timezone = timezone_service.set_timezone(setting.timezone)
         return TimezoneSetting(timezone=timezone)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise server_error(e)
 
@@ -2,27 +2,47 @@
 Workers API endpoints
 """
 
-from fastapi import APIRouter, HTTPException
-from typing import List
-from app.models.schemas import Worker, WorkerCreate, WorkerUpdate, ErrorResponse
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Optional, Union
+from datetime import datetime
+from app.api.errors import server_error
+from app.core.dependencies import get_worker_service
+from app.models.schemas import Worker, WorkerChanges, WorkerCreate, WorkerUpdate, ErrorResponse
 from app.services.worker_service import WorkerService
+from app.utils.sync import SyncWindowExpiredError
 
 router = APIRouter()
-worker_service = WorkerService()
 
 
-@router.get("", response_model=List[Worker])
-async def get_workers():
-    """Get all workers"""
+@router.get("", response_model=Union[List[Worker], WorkerChanges])
+async def get_workers(
+    updated_since: Optional[datetime] = Query(
+        None, description="Only return workers changed after this time, plus deleted IDs"
+    ),
+    q: Optional[str] = Query(None, max_length=200, description="Case-insensitive name prefix to search for"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of workers returned with q"),
+    worker_service: WorkerService = Depends(get_worker_service),
+):
+    """
+    Get all workers.
+    With updated_since, returns only the changes since that cursor for incremental sync.
+    With q, returns up to `limit` workers whose name starts with q, for autocomplete.
+    """
     try:
+        if updated_since is not None:
+            return worker_service.get_changes(updated_since)
+        if q is not None:
+            return worker_service.search_workers(q, limit)
         workers = worker_service.get_all_workers()
         return workers
+    except SyncWindowExpiredError as e:
+        raise HTTPException(status_code=410, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise server_error(e)
 
 
 @router.get("/{worker_id}", response_model=Worker)
-async def get_worker(worker_id: str):
+async def get_worker(worker_id: str, worker_service: WorkerService = Depends(get_worker_service)):
     """Get a worker by ID"""
     try:
         worker = worker_service.get_worker(worker_id)
@@ -32,21 +52,25 @@ async def get_worker(worker_id: str):
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise server_error(e)
 
 
 @router.post("", response_model=Worker, status_code=201)
-async def create_worker(worker: WorkerCreate):
+async def create_worker(worker: WorkerCreate, worker_service: WorkerService = Depends(get_worker_service)):
     """Create a new worker"""
     try:
         created = worker_service.create_worker(worker.name)
         return created
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise server_error(e)
 
 
 @router.put("/{worker_id}", response_model=Worker)
-async def update_worker(worker_id: str, worker: WorkerUpdate):
+async def update_worker(
+    worker_id: str,
+    worker: WorkerUpdate,
+    worker_service: WorkerService = Depends(get_worker_service),
+):
     """Update a worker"""
     try:
         updated = worker_service.update_worker(worker_id, worker.name)
@@ -56,11 +80,11 @@ async def update_worker(worker_id: str, worker: WorkerUpdate):
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise server_error(e)
 
 
 @router.delete("/{worker_id}", status_code=204)
-async def delete_worker(worker_id: str):
+async def delete_worker(worker_id: str, worker_service: WorkerService = Depends(get_worker_service)):
     """Delete a worker"""
     try:
         deleted = worker_service.delete_worker(worker_id)
@@ -70,5 +94,5 @@ async def delete_worker(worker_id: str):
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise server_error(e)
 
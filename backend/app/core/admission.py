@@ -0,0 +1,308 @@
+"""
+Admission control and load shedding for API requests
+
+Every /api/ request is put in one of three route classes:
+
+  - read:  single-entity gets, the timezone, job status, and shift lists
+           filtered to one worker
+  - scan:  list endpoints (all shifts, workers, templates) and the schedule grid
+  - write: POST, PUT and DELETE, which also run the labor rule validation
+
+Each class has its own concurrency limit and a bounded FIFO queue, so a
+burst of unfiltered shift scans waits behind the scan limit instead of
+taking the workers and Datastore quota from cheap reads. Requests are shed
+with 503 and Retry-After when the queue is full, or when they waited longer
+than the queue deadline (also when the event loop was too busy to notice in
+time: the wait is checked again on admission, so stale requests never run).
+
+Before queueing, each client spends tokens from its own bucket, scans
+costing more than reads; a client out of tokens gets 429 with the time
+until its bucket has enough again. Clients are the tenant header plus the
+client address. Behind proxies the peer is the proxy, so with
+ADMISSION_TRUSTED_PROXY_HOPS set the address is taken from X-Forwarded-For:
+each trusted proxy appends the address it saw, so the entry that many
+places from the right was written by the outermost trusted proxy, and
+anything a client puts to the left of it is ignored.
+
+Queue depth, in-flight counts, queue waits and shed counts per class are
+exposed through `snapshot()`, and `readiness()` reports saturation for the
+/ready endpoint, so instances drop out of rotation and the autoscaler adds
+capacity before latency collapses.
+"""
+
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.resilience import LatencyRecorder
+from app.core.tenancy import TENANT_HEADER
+
+READ = "read"
+SCAN = "scan"
+WRITE = "write"
+
+# Tokens taken from the client's bucket per request of each class
+REQUEST_COSTS = {READ: 1.0, SCAN: 5.0, WRITE: 2.0}
+
+# GET paths listing a whole collection, or aggregating over one
+SCAN_PATHS = ("/api/shifts", "/api/workers", "/api/shift-templates", "/api/schedule/grid")
+
+MAX_TRACKED_CLIENTS = 10000
+
+
+def classify_request(method: str, path: str, query_string: bytes = b"") -> str:
+    """Route class of a request, from its method, path and query names"""
+    if method not in ("GET", "HEAD"):
+        return WRITE
+    path = path.rstrip("/")
+    if path not in SCAN_PATHS:
+        return READ
+    # Shift lists for one worker are served from a narrow index range
+    if path == "/api/shifts" and "worker_id" in dict(parse_qsl(query_string.decode("latin-1"))):
+        return READ
+    return SCAN
+
+
+class Shed(Exception):
+    """Raised when a request is refused admission"""
+
+    def __init__(self, reason: str, retry_after: float = 1.0):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class ClassLimiter:
+    """
+    Concurrency limit with a bounded FIFO queue and a queue deadline.
+    Only used from the event loop, so it needs no lock.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> float:
+        """Wait for a slot and return the seconds spent queued"""
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            return 0.0
+        if len(self._waiters) >= self.max_queue:
+            raise Shed("queue_full", retry_after=self.queue_timeout)
+
+        queued_at = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await asyncio.wait_for(future, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._discard(future)
+            raise Shed("timeout", retry_after=self.queue_timeout)
+        except asyncio.CancelledError:
+            # The client went away; pass on a slot that was already handed over
+            if future.done() and not future.cancelled():
+                self.release()
+            else:
+                self._discard(future)
+            raise
+
+        waited = time.monotonic() - queued_at
+        if waited > self.queue_timeout:
+            self.release()
+            raise Shed("timeout", retry_after=self.queue_timeout)
+        return waited
+
+    def release(self) -> None:
+        """Hand the slot to the oldest waiter, or free it"""
+        while self._waiters:
+            future = self._waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    def _discard(self, future: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(future)
+        except ValueError:
+            pass
+
+
+class ClientRateLimiter:
+    """Token buckets per client, for the most recently seen clients"""
+
+    def __init__(self, rate: float, burst: float, max_clients: int = MAX_TRACKED_CLIENTS):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        # client -> (tokens, refilled at)
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def take(self, client: str, cost: float) -> float:
+        """
+        Take `cost` tokens from the client's bucket. Returns 0 when they were
+        taken, otherwise the seconds until the bucket holds enough.
+        """
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        tokens, refilled_at = self._buckets.pop(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - refilled_at) * self.rate)
+        cost = min(cost, self.burst)
+        wait = 0.0
+        if tokens >= cost:
+            tokens -= cost
+        else:
+            wait = (cost - tokens) / self.rate
+        self._buckets[client] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return wait
+
+    @property
+    def clients(self) -> int:
+        return len(self._buckets)
+
+
+class AdmissionController:
+    """Limiters per route class, client buckets and shed accounting"""
+
+    def __init__(
+        self,
+        concurrency: Optional[Dict[str, int]] = None,
+        max_queue: int = settings.ADMISSION_QUEUE_SIZE,
+        queue_timeout: float = settings.ADMISSION_QUEUE_TIMEOUT_MS / 1000.0,
+        client_rate: float = settings.ADMISSION_CLIENT_RATE,
+        client_burst: float = settings.ADMISSION_CLIENT_BURST,
+        trusted_proxy_hops: int = settings.ADMISSION_TRUSTED_PROXY_HOPS,
+    ):
+        concurrency = concurrency or {
+            READ: settings.ADMISSION_READ_CONCURRENCY,
+            SCAN: settings.ADMISSION_SCAN_CONCURRENCY,
+            WRITE: settings.ADMISSION_WRITE_CONCURRENCY,
+        }
+        self.limiters = {
+            route_class: ClassLimiter(limit, max_queue, queue_timeout)
+            for route_class, limit in concurrency.items()
+        }
+        self.rate_limiter = ClientRateLimiter(client_rate, client_burst)
+        self.trusted_proxy_hops = trusted_proxy_hops
+        # Latencies are queue waits, "calls" are admitted requests
+        self.metrics = LatencyRecorder()
+        self.last_shed: Optional[float] = None
+
+    def shed(self, route_class: str, reason: str) -> None:
+        self.metrics.count(route_class, f"shed_{reason}")
+        self.last_shed = time.monotonic()
+
+    def snapshot(self) -> dict:
+        """Limits, queue depth, in-flight requests, waits and shed counts per class"""
+        metrics = self.metrics.snapshot()
+        classes = {}
+        for route_class, limiter in self.limiters.items():
+            classes[route_class] = {
+                "max_concurrent": limiter.max_concurrent,
+                "max_queue": limiter.max_queue,
+                "in_flight": limiter.active,
+                "queued": limiter.queued,
+                **metrics.get(route_class, {}),
+            }
+        return {"classes": classes, "tracked_clients": self.rate_limiter.clients}
+
+    def readiness(self) -> List[str]:
+        """Reasons this instance is saturated; empty when it is ready"""
+        reasons = []
+        for route_class, limiter in self.limiters.items():
+            if limiter.max_queue and limiter.queued >= limiter.max_queue * settings.ADMISSION_READY_QUEUE_FRACTION:
+                reasons.append(f"{route_class} queue at {limiter.queued}/{limiter.max_queue}")
+        if self.last_shed is not None and time.monotonic() - self.last_shed < settings.ADMISSION_READY_SHED_SECONDS:
+            reasons.append("requests shed recently")
+        return reasons
+
+
+# Shared by the middleware and the metrics and readiness endpoints
+admission_controller = AdmissionController()
+
+
+def client_address(scope: Scope, trusted_proxy_hops: int = 0) -> str:
+    """
+    Address of the client, as seen by the outermost of `trusted_proxy_hops`
+    proxies, or the peer address when there are none
+    """
+    if trusted_proxy_hops > 0:
+        forwarded = Headers(scope=scope).get("x-forwarded-for", "")
+        addresses = [address.strip() for address in forwarded.split(",") if address.strip()]
+        if addresses:
+            return addresses[-min(trusted_proxy_hops, len(addresses))]
+    client = scope.get("client")
+    return client[0] if client else ""
+
+
+def client_key(scope: Scope, trusted_proxy_hops: int = 0) -> str:
+    """Tenant header plus client address"""
+    tenant = Headers(scope=scope).get(TENANT_HEADER, "")
+    return f"{tenant}|{client_address(scope, trusted_proxy_hops)}"
+
+
+class AdmissionControlMiddleware:
+    """
+    ASGI middleware applying the route class limits and client buckets to
+    API requests. Added inside CORS, so refusals carry CORS headers.
+    """
+
+    def __init__(self, app: ASGIApp, controller: Optional[AdmissionController] = None, path_prefix: str = "/api/"):
+        self.app = app
+        self.controller = controller if controller is not None else admission_controller
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        controller = self.controller
+        route_class = classify_request(scope["method"], scope["path"], scope.get("query_string", b""))
+        wait = controller.rate_limiter.take(
+            client_key(scope, controller.trusted_proxy_hops), REQUEST_COSTS[route_class]
+        )
+        if wait:
+            controller.metrics.count(route_class, "rate_limited")
+            await JSONResponse(
+                {"detail": "Too many requests"},
+                status_code=429,
+                headers={"Retry-After": str(math.ceil(wait))},
+            )(scope, receive, send)
+            return
+
+        limiter = controller.limiters[route_class]
+        try:
+            waited = await limiter.acquire()
+        except Shed as e:
+            controller.shed(route_class, e.reason)
+            await JSONResponse(
+                {"detail": "Server is busy, retry later"},
+                status_code=503,
+                headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))},
+            )(scope, receive, send)
+            return
+
+        controller.metrics.record(route_class, waited)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
@@ -23,6 +23,120 @@ class Settings(BaseSettings):
     # Application settings
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
     PORT: int = int(os.getenv("PORT", "8080"))
+    # Build services in the background at startup instead of on the first request
+    WARMUP_SERVICES: bool = os.getenv("WARMUP_SERVICES", "true").lower() == "true"
+
+    # Multi-tenancy
+    # Tenants are isolated in Datastore namespaces, selected by the X-Tenant-ID
+    # header. Requests without it use the default namespace.
+    MAX_CACHED_TENANTS: int = int(os.getenv("MAX_CACHED_TENANTS", "256"))
+    TIMEZONE_CACHE_TTL_SECONDS: float = float(os.getenv("TIMEZONE_CACHE_TTL_SECONDS", "30"))
+
+    # Shift list result cache, per tenant
+    # Entries expire after the TTL so writes from other instances show up
+    SHIFT_CACHE_MAX_ENTRIES: int = int(os.getenv("SHIFT_CACHE_MAX_ENTRIES", "512"))
+    SHIFT_CACHE_TTL_SECONDS: float = float(os.getenv("SHIFT_CACHE_TTL_SECONDS", "30"))
+
+    # Schedule grid (worker x local day hours)
+    # Grids are cached per window, timezone and collection version
+    GRID_MAX_DAYS: int = int(os.getenv("GRID_MAX_DAYS", "62"))
+    GRID_CACHE_MAX_ENTRIES: int = int(os.getenv("GRID_CACHE_MAX_ENTRIES", "64"))
+
+    # Worker name search
+    # Searches use an in-process trie per tenant, caught up with other
+    # instances' writes through delta sync every refresh interval. When
+    # disabled, searches run as range queries on `name_lower`.
+    WORKER_SEARCH_INDEX: bool = os.getenv("WORKER_SEARCH_INDEX", "true").lower() == "true"
+    WORKER_INDEX_REFRESH_SECONDS: float = float(os.getenv("WORKER_INDEX_REFRESH_SECONDS", "10"))
+
+    # Labor rules checked on every shift write
+    # Rest and rolling hour rules are disabled when set to 0
+    MAX_SHIFT_HOURS: float = float(os.getenv("MAX_SHIFT_HOURS", "12"))
+    MIN_REST_HOURS: float = float(os.getenv("MIN_REST_HOURS", "0"))
+    MAX_HOURS_PER_7_DAYS: float = float(os.getenv("MAX_HOURS_PER_7_DAYS", "0"))
+
+    # Recurring shift templates
+    # Reads without `to` expand occurrences up to this many days ahead;
+    # open-ended templates are checked for overlaps this far ahead.
+    RECURRENCE_HORIZON_DAYS: int = int(os.getenv("RECURRENCE_HORIZON_DAYS", "90"))
+    RECURRENCE_CHECK_DAYS: int = int(os.getenv("RECURRENCE_CHECK_DAYS", "366"))
+
+    # Delta sync settings
+    # Deleted entities are kept as tombstones for this many days so clients
+    # can pick up deletes with ?updated_since=. Older cursors must resync.
+    TOMBSTONE_TTL_DAYS: int = int(os.getenv("TOMBSTONE_TTL_DAYS", "30"))
+
+    # Idempotency-Key support for POST/PUT
+    # "memory" keeps records per instance, "datastore" also persists them
+    IDEMPOTENCY_BACKEND: str = os.getenv("IDEMPOTENCY_BACKEND", "memory")
+    IDEMPOTENCY_TTL_SECONDS: int = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    IDEMPOTENCY_MAX_ENTRIES: int = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+
+    # Datastore resilience
+    # Deadlines cover all attempts of one RPC. Reads and idempotent commits
+    # are retried with jittered backoff; after DATASTORE_BREAKER_FAILURES
+    # consecutive transient errors calls fail fast for the reset period.
+    # Lookups still pending after DATASTORE_HEDGE_AFTER_MS are sent again
+    # (0 disables hedging).
+    DATASTORE_READ_DEADLINE_SECONDS: float = float(os.getenv("DATASTORE_READ_DEADLINE_SECONDS", "5"))
+    DATASTORE_WRITE_DEADLINE_SECONDS: float = float(os.getenv("DATASTORE_WRITE_DEADLINE_SECONDS", "10"))
+    DATASTORE_MAX_RETRIES: int = int(os.getenv("DATASTORE_MAX_RETRIES", "3"))
+    DATASTORE_RETRY_BASE_SECONDS: float = float(os.getenv("DATASTORE_RETRY_BASE_SECONDS", "0.05"))
+    DATASTORE_RETRY_MAX_SECONDS: float = float(os.getenv("DATASTORE_RETRY_MAX_SECONDS", "1"))
+    DATASTORE_BREAKER_FAILURES: int = int(os.getenv("DATASTORE_BREAKER_FAILURES", "10"))
+    DATASTORE_BREAKER_RESET_SECONDS: float = float(os.getenv("DATASTORE_BREAKER_RESET_SECONDS", "5"))
+    DATASTORE_HEDGE_AFTER_MS: float = float(os.getenv("DATASTORE_HEDGE_AFTER_MS", "0"))
+    DATASTORE_HEDGE_THREADS: int = int(os.getenv("DATASTORE_HEDGE_THREADS", "16"))
+
+    # Background jobs
+    # Jobs run on a per-instance pool of JOB_WORKERS threads; submissions
+    # beyond JOB_MAX_PENDING queued or running jobs are refused. Progress is
+    # written to Datastore at most every JOB_PROGRESS_INTERVAL_SECONDS.
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_MAX_PENDING: int = int(os.getenv("JOB_MAX_PENDING", "50"))
+    JOB_PROGRESS_INTERVAL_SECONDS: float = float(os.getenv("JOB_PROGRESS_INTERVAL_SECONDS", "2"))
+    JOB_TTL_DAYS: int = int(os.getenv("JOB_TTL_DAYS", "7"))
+
+    # Statistics counters
+    # Shift and worker totals per tenant, worker and UTC day are kept in
+    # sharded counters updated by every write. More shards spread concurrent
+    # writes over more entities, at the cost of more keys read per counter.
+    # A counter update that still conflicts after the retries is dropped and
+    # left for the reconcile_stats job.
+    STATS_COUNTER_SHARDS: int = int(os.getenv("STATS_COUNTER_SHARDS", "16"))
+    STATS_COUNTER_RETRIES: int = int(os.getenv("STATS_COUNTER_RETRIES", "5"))
+    STATS_MAX_DAYS: int = int(os.getenv("STATS_MAX_DAYS", "92"))
+
+    # Admission control for /api/ requests
+    # Requests are classed as reads, list scans or writes; each class runs at
+    # most its concurrency limit at once and queues up to ADMISSION_QUEUE_SIZE
+    # more. Requests still queued after ADMISSION_QUEUE_TIMEOUT_MS are shed
+    # with 503. Each client (tenant and address) also has a token bucket,
+    # refilled at ADMISSION_CLIENT_RATE tokens per second (0 disables it);
+    # requests beyond it get 429. Behind proxies, set ADMISSION_TRUSTED_PROXY_HOPS
+    # to the number of proxies that append to X-Forwarded-For (1 on Cloud Run)
+    # so clients are told apart by their forwarded address, not the proxy's. /ready reports unready while a queue is over
+    # ADMISSION_READY_QUEUE_FRACTION full or requests were shed recently.
+    ADMISSION_CONTROL: bool = os.getenv("ADMISSION_CONTROL", "true").lower() == "true"
+    ADMISSION_READ_CONCURRENCY: int = int(os.getenv("ADMISSION_READ_CONCURRENCY", "64"))
+    ADMISSION_SCAN_CONCURRENCY: int = int(os.getenv("ADMISSION_SCAN_CONCURRENCY", "8"))
+    ADMISSION_WRITE_CONCURRENCY: int = int(os.getenv("ADMISSION_WRITE_CONCURRENCY", "16"))
+    ADMISSION_QUEUE_SIZE: int = int(os.getenv("ADMISSION_QUEUE_SIZE", "64"))
+    ADMISSION_QUEUE_TIMEOUT_MS: float = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_MS", "1000"))
+    ADMISSION_CLIENT_RATE: float = float(os.getenv("ADMISSION_CLIENT_RATE", "50"))
+    ADMISSION_CLIENT_BURST: float = float(os.getenv("ADMISSION_CLIENT_BURST", "200"))
+    ADMISSION_TRUSTED_PROXY_HOPS: int = int(os.getenv("ADMISSION_TRUSTED_PROXY_HOPS", "0"))
+    ADMISSION_READY_QUEUE_FRACTION: float = float(os.getenv("ADMISSION_READY_QUEUE_FRACTION", "0.5"))
+    ADMISSION_READY_SHED_SECONDS: float = float(os.getenv("ADMISSION_READY_SHED_SECONDS", "10"))
+
+    # Traffic capture for load testing (see benchmarks/replay_traffic.py)
+    # Request shapes and timings are appended to this file; empty disables it
+    TRAFFIC_CAPTURE_PATH: str = os.getenv("TRAFFIC_CAPTURE_PATH", "")
+    TRAFFIC_CAPTURE_SAMPLE_RATE: float = float(os.getenv("TRAFFIC_CAPTURE_SAMPLE_RATE", "1"))
+
+    # Response compression
+    # Bodies smaller than this are sent uncompressed
+    COMPRESSION_MIN_BYTES: int = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
     
     # CORS settings
     CORS_ORIGINS: List[str] = os.getenv(
@@ -2,15 +2,23 @@
 Google Cloud Datastore client and utilities
 """
 
+from google.api_core.exceptions import NotFound
 from google.cloud import datastore
+from google.cloud.datastore import helpers
+from google.cloud.datastore_v1.types import datastore as datastore_pb2
 from app.core.config import settings
+from app.core.resilience import ResilientDatastoreApi, install as install_resilience
+from functools import lru_cache
+from typing import Iterable, Optional
 import os
 
 
-def get_datastore_client() -> datastore.Client:
+@lru_cache(maxsize=None)
+def _get_base_client() -> datastore.Client:
     """
-    Get a Datastore client instance.
+    Get the shared Datastore client instance.
     Uses emulator if DATASTORE_EMULATOR_HOST is set, otherwise uses GCP.
+    The client is created on first use and reused by all services.
     """
     if settings.DATASTORE_EMULATOR_HOST:
         # Use emulator for local development
@@ -20,11 +28,116 @@ def get_datastore_client() -> datastore.Client:
         # Use real GCP Datastore
         client = datastore.Client(project=settings.GCP_PROJECT_ID)
     
+    # Deadlines, retries, circuit breaking and hedged lookups for every RPC
+    install_resilience(client)
     return client
 
 
+class NamespacedClient:
+    """
+    View of the shared Datastore client bound to one namespace.
+    Keys and queries created through it default to the namespace; every
+    other call goes to the shared client, so tenants share one channel.
+    """
+    
+    def __init__(self, client: datastore.Client, namespace: str):
+        self._client = client
+        self.namespace = namespace
+    
+    def key(self, *path_args, **kwargs) -> datastore.Key:
+        kwargs.setdefault("namespace", self.namespace)
+        return self._client.key(*path_args, **kwargs)
+    
+    def query(self, **kwargs) -> datastore.Query:
+        kwargs.setdefault("namespace", self.namespace)
+        return self._client.query(**kwargs)
+    
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+@lru_cache(maxsize=None)
+def get_datastore_client(namespace: Optional[str] = None) -> datastore.Client:
+    """
+    Get a Datastore client for a namespace.
+    The default namespace (None or "") returns the shared client itself.
+    """
+    client = _get_base_client()
+    if not namespace:
+        return client
+    return NamespacedClient(client, namespace)
+
+
+def update_properties(client: datastore.Client, key: datastore.Key, properties: dict,
+                      exclude_from_indexes: Iterable[str] = ()) -> bool:
+    """
+    Blind partial update of an existing entity in a single commit RPC.
+    Sends an `update` mutation, which fails if the entity does not exist,
+    with a property mask so only the given properties are written and the
+    rest of the entity is left as stored. No read is needed beforehand.
+    Index exclusions are written per property too, so properties the
+    entity excludes from indexes must be listed in `exclude_from_indexes`.
+    Returns False if the entity does not exist.
+    """
+    entity = datastore.Entity(key=key, exclude_from_indexes=tuple(exclude_from_indexes))
+    entity.update(properties)
+    mutation = datastore_pb2.Mutation(
+        update=helpers.entity_to_protobuf(entity),
+        property_mask=datastore_pb2.PropertyMask(paths=list(properties)),
+    )
+    request = {
+        "project_id": client.project,
+        "mode": datastore_pb2.CommitRequest.Mode.NON_TRANSACTIONAL,
+        "mutations": [mutation],
+    }
+    helpers.set_database_id_to_request(request, client.database)
+    try:
+        # The public client only issues upserts, so commit the mutation directly
+        client._datastore_api.commit(request=request)
+    except NotFound:
+        return False
+    return True
+
+
+def put_atomically(client: datastore.Client, entities: Iterable[datastore.Entity]) -> None:
+    """
+    Write entities in a single commit RPC that applies all of them or none.
+    The commit runs in a single-use transaction, which saves the
+    begin_transaction RPC of a transaction block with nothing to read;
+    a non-transactional commit may apply its mutations partially.
+    Keys must be complete, and at most 500 entities can be written.
+    """
+    request = {
+        "project_id": client.project,
+        "mode": datastore_pb2.CommitRequest.Mode.TRANSACTIONAL,
+        "single_use_transaction": datastore_pb2.TransactionOptions(
+            read_write=datastore_pb2.TransactionOptions.ReadWrite()
+        ),
+        "mutations": [datastore_pb2.Mutation(upsert=helpers.entity_to_protobuf(entity)) for entity in entities],
+    }
+    helpers.set_database_id_to_request(request, client.database)
+    client._datastore_api.commit(request=request)
+
+
+def close_datastore_client() -> None:
+    """Close the shared Datastore client if it was created"""
+    if _get_base_client.cache_info().currsize:
+        client = _get_base_client()
+        api = getattr(client, "_datastore_api_internal", None)
+        if isinstance(api, ResilientDatastoreApi):
+            api.close()
+        client.close()
+        _get_base_client.cache_clear()
+    get_datastore_client.cache_clear()
+
+
 # Entity kind constants
 KIND_TIMEZONE = "Timezone"
 KIND_WORKER = "Worker"
 KIND_SHIFT = "Shift"
+KIND_SHIFT_TEMPLATE = "ShiftTemplate"
+KIND_IDEMPOTENCY_KEY = "IdempotencyKey"
+KIND_JOB = "Job"
+KIND_STATS_SHARD = "StatsShard"
+KIND_STATS_DELTA = "StatsDelta"
 
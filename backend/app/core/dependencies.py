@@ -0,0 +1,114 @@
+"""
+Service dependencies for API routes
+
+Services are constructed lazily on first use instead of at import time, so
+importing the app and answering /health never wait on Datastore client
+creation or credential discovery. The lifespan handler in app.main warms
+them up in the background and releases them on shutdown.
+
+Each tenant gets its own service instances bound to its namespace, so any
+state a service caches is scoped to that tenant.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Type, TypeVar
+
+from fastapi import Depends
+
+from app.core.config import settings
+from app.core.datastore import close_datastore_client
+from app.core.jobs import JobRunner
+from app.core.tenancy import DEFAULT_TENANT, get_tenant
+from app.services.job_handlers import JOB_HANDLERS
+from app.services.schedule_service import ScheduleService
+from app.services.shift_service import ShiftService
+from app.services.stats_service import StatsService
+from app.services.timezone_service import TimezoneService
+from app.services.worker_service import WorkerService
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ServiceRegistry:
+    """
+    Process-wide, lazily populated service instances per tenant.
+    Only the most recently used MAX_CACHED_TENANTS tenants are kept; an
+    evicted tenant's services (and caches) are rebuilt on its next request.
+    """
+
+    def __init__(self, max_tenants: int = settings.MAX_CACHED_TENANTS):
+        self.max_tenants = max_tenants
+        self._tenants: "OrderedDict[str, Dict[type, object]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, service_class: Type[T], tenant: str = DEFAULT_TENANT) -> T:
+        """Return the tenant's instance of a service, constructing it on first use"""
+        with self._lock:
+            services = self._tenants.get(tenant)
+            if services is None:
+                services = self._tenants[tenant] = {}
+                while len(self._tenants) > self.max_tenants:
+                    self._tenants.popitem(last=False)
+            else:
+                self._tenants.move_to_end(tenant)
+            service = services.get(service_class)
+            if service is None:
+                service = services[service_class] = service_class(namespace=tenant or None)
+        return service
+
+    def warm_up(self) -> None:
+        """Construct the default tenant's services and load its search index ahead of the first request"""
+        try:
+            for service_class in (TimezoneService, WorkerService, ShiftService):
+                self.get(service_class)
+            self.get(WorkerService).warm_search_index()
+        except Exception:
+            # Not fatal: services will be constructed again on first use
+            logger.exception("Service warm-up failed")
+
+    def close(self) -> None:
+        """Drop all services and close the shared Datastore client"""
+        with self._lock:
+            self._tenants.clear()
+        close_datastore_client()
+
+
+registry = ServiceRegistry()
+job_runner = JobRunner(registry, JOB_HANDLERS)
+
+
+def get_timezone_service(tenant: str = Depends(get_tenant)) -> TimezoneService:
+    """Timezone service dependency for the request's tenant"""
+    return registry.get(TimezoneService, tenant)
+
+
+def get_worker_service(tenant: str = Depends(get_tenant)) -> WorkerService:
+    """Worker service dependency for the request's tenant"""
+    return registry.get(WorkerService, tenant)
+
+
+def get_shift_service(tenant: str = Depends(get_tenant)) -> ShiftService:
+    """Shift service dependency for the request's tenant"""
+    return registry.get(ShiftService, tenant)
+
+
+def get_stats_service(tenant: str = Depends(get_tenant)) -> StatsService:
+    """Statistics counters dependency for the request's tenant"""
+    return registry.get(StatsService, tenant)
+
+
+def get_schedule_service(
+    shift_service: ShiftService = Depends(get_shift_service),
+    worker_service: WorkerService = Depends(get_worker_service),
+) -> ScheduleService:
+    """Schedule service dependency, built on the tenant's shift and worker services"""
+    return ScheduleService(shift_service, worker_service)
+
+
+def get_job_runner() -> JobRunner:
+    """Background job runner dependency"""
+    return job_runner
@@ -0,0 +1,264 @@
+"""
+Idempotency-Key support for POST/PUT requests
+
+The first response to a request carrying an `Idempotency-Key` header is
+stored and replayed for retries with the same key, without calling the
+services again. Keys are scoped per tenant and bound to a fingerprint of
+the request, so reusing a key for a different request is rejected.
+
+Records live in an in-memory LRU with TTL eviction. With
+IDEMPOTENCY_BACKEND=datastore they are also written to the tenant's
+Datastore namespace so retries landing on another instance are replayed.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from google.cloud import datastore
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.datastore import get_datastore_client, KIND_IDEMPOTENCY_KEY
+from app.core.tenancy import TENANT_HEADER, is_valid_tenant
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+@dataclass
+class IdempotencyRecord:
+    """A stored response for an idempotency key"""
+    fingerprint: str
+    status_code: int
+    media_type: Optional[str]
+    body: bytes
+
+
+class MemoryIdempotencyStore:
+    """LRU of idempotency records with TTL eviction"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._records: "OrderedDict[str, tuple]" = OrderedDict()
+        self._in_flight = set()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[IdempotencyRecord]:
+        with self._lock:
+            item = self._records.get(key)
+            if item is None:
+                return None
+            record, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._records[key]
+                return None
+            self._records.move_to_end(key)
+            return record
+
+    def put(self, key: str, record: IdempotencyRecord) -> None:
+        with self._lock:
+            self._records[key] = (record, time.monotonic() + self.ttl_seconds)
+            self._records.move_to_end(key)
+            while len(self._records) > self.max_entries:
+                self._records.popitem(last=False)
+
+    def begin(self, key: str) -> bool:
+        """Mark a key as in flight. Returns False if it already is."""
+        with self._lock:
+            if key in self._in_flight:
+                return False
+            self._in_flight.add(key)
+            return True
+
+    def finish(self, key: str) -> None:
+        with self._lock:
+            self._in_flight.discard(key)
+
+
+class DatastoreIdempotencyStore(MemoryIdempotencyStore):
+    """
+    Memory store backed by Datastore for cross-instance replay.
+    Entities carry `expire_at` for a Datastore TTL policy.
+    """
+
+    def get(self, key: str) -> Optional[IdempotencyRecord]:
+        record = super().get(key)
+        if record is not None:
+            return record
+
+        entity = self._client(key).get(self._key(key))
+        if entity is None or entity["expire_at"] <= datetime.now(timezone.utc):
+            return None
+        record = IdempotencyRecord(
+            fingerprint=entity["fingerprint"],
+            status_code=entity["status_code"],
+            media_type=entity.get("media_type"),
+            body=entity["body"],
+        )
+        super().put(key, record)
+        return record
+
+    def put(self, key: str, record: IdempotencyRecord) -> None:
+        super().put(key, record)
+        entity = datastore.Entity(key=self._key(key), exclude_from_indexes=("fingerprint", "body", "media_type"))
+        entity.update({
+            "fingerprint": record.fingerprint,
+            "status_code": record.status_code,
+            "media_type": record.media_type,
+            "body": record.body,
+            "expire_at": datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds),
+        })
+        self._client(key).put(entity)
+
+    @staticmethod
+    def _client(key: str):
+        tenant, _, _ = key.partition(":")
+        return get_datastore_client(tenant or None)
+
+    def _key(self, key: str) -> datastore.Key:
+        _, _, name = key.partition(":")
+        return self._client(key).key(KIND_IDEMPOTENCY_KEY, hashlib.sha256(name.encode()).hexdigest())
+
+
+def create_store() -> MemoryIdempotencyStore:
+    """Build the store configured by IDEMPOTENCY_BACKEND"""
+    store_class = DatastoreIdempotencyStore if settings.IDEMPOTENCY_BACKEND == "datastore" else MemoryIdempotencyStore
+    return store_class(settings.IDEMPOTENCY_MAX_ENTRIES, settings.IDEMPOTENCY_TTL_SECONDS)
+
+
+def fingerprint_request(scope: Scope, body: bytes) -> str:
+    """Hash the parts of a request that must match for a replay"""
+    digest = hashlib.sha256()
+    for part in (scope["method"].encode(), scope["path"].encode(), scope.get("query_string", b""), body):
+        digest.update(part)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class IdempotencyMiddleware:
+    """
+    ASGI middleware replaying stored responses for retried POST/PUT requests.
+    Responses with status >= 500 are not stored, so those requests can be retried.
+    """
+
+    def __init__(self, app: ASGIApp, methods=("POST", "PUT"), path_prefix: str = "/api/"):
+        self.app = app
+        self.methods = methods
+        self.path_prefix = path_prefix
+        self._store: Optional[MemoryIdempotencyStore] = None
+
+    @property
+    def store(self) -> MemoryIdempotencyStore:
+        if self._store is None:
+            self._store = create_store()
+        return self._store
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in self.methods
+            or not scope["path"].startswith(self.path_prefix)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        idempotency_key = headers.get(IDEMPOTENCY_HEADER)
+        tenant = headers.get(TENANT_HEADER, "")
+        # Invalid tenants are rejected by the route itself
+        if not idempotency_key or not is_valid_tenant(tenant):
+            await self.app(scope, receive, send)
+            return
+        if len(idempotency_key) > MAX_KEY_LENGTH:
+            await JSONResponse(
+                {"detail": f"{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters"}, status_code=400
+            )(scope, receive, send)
+            return
+
+        body = await self._read_body(receive)
+        store_key = f"{tenant}:{idempotency_key}"
+        fingerprint = fingerprint_request(scope, body)
+
+        record = await run_in_threadpool(self.store.get, store_key)
+        if record is not None:
+            if record.fingerprint != fingerprint:
+                await JSONResponse(
+                    {"detail": f"{IDEMPOTENCY_HEADER} was already used for a different request"}, status_code=422
+                )(scope, receive, send)
+                return
+            await self._replay(record, send)
+            return
+
+        if not self.store.begin(store_key):
+            await JSONResponse(
+                {"detail": f"A request with this {IDEMPOTENCY_HEADER} is still in progress"},
+                status_code=409,
+                headers={"Retry-After": "1"},
+            )(scope, receive, send)
+            return
+
+        try:
+            response = {"status": 500, "media_type": None, "body": []}
+
+            async def replay_receive() -> Message:
+                nonlocal body
+                if body is None:
+                    return await receive()
+                message = {"type": "http.request", "body": body, "more_body": False}
+                body = None
+                return message
+
+            async def capture_send(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    response["status"] = message["status"]
+                    response["media_type"] = Headers(raw=message["headers"]).get("content-type")
+                elif message["type"] == "http.response.body":
+                    response["body"].append(message.get("body", b""))
+                await send(message)
+
+            await self.app(scope, replay_receive, capture_send)
+
+            if response["status"] < 500:
+                record = IdempotencyRecord(
+                    fingerprint=fingerprint,
+                    status_code=response["status"],
+                    media_type=response["media_type"],
+                    body=b"".join(response["body"]),
+                )
+                try:
+                    await run_in_threadpool(self.store.put, store_key, record)
+                except Exception:
+                    # The response was already sent; a retry will simply run again
+                    logger.exception("Failed to store idempotent response")
+        finally:
+            self.store.finish(store_key)
+
+    @staticmethod
+    async def _read_body(receive: Receive) -> bytes:
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        return b"".join(chunks)
+
+    @staticmethod
+    async def _replay(record: IdempotencyRecord, send: Send) -> None:
+        headers = [(b"idempotent-replayed", b"true"), (b"content-length", str(len(record.body)).encode())]
+        if record.media_type:
+            headers.append((b"content-type", record.media_type.encode()))
+        await send({"type": "http.response.start", "status": record.status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": record.body})
@@ -0,0 +1,284 @@
+"""
+In-process background jobs
+
+Operations too slow for one request (cascade deletes, tombstone purges,
+large auto-fills) are submitted as jobs and run on a bounded thread pool.
+Job state is persisted to the tenant's Datastore namespace as `Job`
+entities, so progress and results can be read from any instance with
+GET /api/jobs/{id}. Params stay in memory, since they can be larger than
+an entity may be.
+
+Jobs are not durable: a job running on an instance that shuts down is
+recorded as failed and has to be submitted again. Handlers report progress
+through their JobContext, which is also where cancellation is noticed, so
+long loops should call `ctx.progress()` between units of work.
+"""
+
+import json
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional, Type
+
+from google.cloud import datastore
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.core.datastore import get_datastore_client, update_properties, KIND_JOB
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+FINISHED_STATUSES = (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED)
+# Properties that can outgrow the indexed string limit
+UNINDEXED_PROPERTIES = ("result", "error", "message")
+
+
+class JobError(Exception):
+    """Raised when a job can't be submitted"""
+    pass
+
+
+class JobQueueFull(JobError):
+    """Raised when the instance already has the maximum number of pending jobs"""
+    pass
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler when its job has been cancelled"""
+    pass
+
+
+@dataclass
+class JobHandler:
+    """A job type: the function running it and the model validating its params"""
+    run: Callable[["JobContext", dict], Optional[dict]]
+    params_model: Optional[Type[BaseModel]] = None
+
+
+class JobContext:
+    """Handed to a running job for progress reporting and cancellation checks"""
+
+    def __init__(self, runner: "JobRunner", tenant: str, job_id: str, cancel_event: threading.Event):
+        self.runner = runner
+        self.tenant = tenant
+        self.job_id = job_id
+        self._cancel_event = cancel_event
+        self._last_write = 0.0
+
+    def service(self, service_class):
+        """The tenant's instance of a service"""
+        return self.runner.registry.get(service_class, self.tenant)
+
+    def progress(self, done: int, total: Optional[int] = None, message: Optional[str] = None) -> None:
+        """
+        Record progress and raise JobCancelled if the job was cancelled.
+        Datastore is written (and checked for cancellation from other
+        instances) at most every JOB_PROGRESS_INTERVAL_SECONDS.
+        """
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+        now = time.monotonic()
+        if now - self._last_write < settings.JOB_PROGRESS_INTERVAL_SECONDS:
+            return
+        self._last_write = now
+        properties = {"progress_done": done, "updated_at": _now()}
+        if total is not None:
+            properties["progress_total"] = total
+        if message is not None:
+            properties["message"] = message
+        self.runner._update(self.tenant, self.job_id, properties)
+
+        job = self.runner.get(self.tenant, self.job_id)
+        if job is not None and job["cancel_requested"]:
+            self._cancel_event.set()
+            raise JobCancelled()
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def job_to_dict(entity: datastore.Entity) -> dict:
+    """Convert a Job entity to a dictionary"""
+    result = entity.get("result")
+    return {
+        "id": entity.key.id_or_name,
+        "type": entity["type"],
+        "status": entity["status"],
+        "progress_done": entity.get("progress_done", 0),
+        "progress_total": entity.get("progress_total"),
+        "message": entity.get("message"),
+        "result": json.loads(result) if result else None,
+        "error": entity.get("error"),
+        "cancel_requested": entity.get("cancel_requested", False),
+        "created_at": entity.get("created_at"),
+        "started_at": entity.get("started_at"),
+        "finished_at": entity.get("finished_at"),
+    }
+
+
+class JobRunner:
+    """
+    Bounded pool running jobs for every tenant.
+    At most JOB_WORKERS jobs run at once per instance and at most
+    JOB_MAX_PENDING are queued or running; further submissions are refused
+    with JobQueueFull instead of piling up.
+    """
+
+    def __init__(self, registry, handlers: Dict[str, JobHandler],
+                 max_workers: int = settings.JOB_WORKERS, max_pending: int = settings.JOB_MAX_PENDING):
+        self.registry = registry
+        self.handlers = handlers
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # (tenant, job ID) -> (future, cancel event) of jobs on this instance
+        self._local: Dict[tuple, tuple] = {}
+        self._closing = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _client(tenant: str):
+        return get_datastore_client(tenant or None)
+
+    def _key(self, tenant: str, job_id: str) -> datastore.Key:
+        return self._client(tenant).key(KIND_JOB, job_id)
+
+    def _update(self, tenant: str, job_id: str, properties: dict) -> bool:
+        return update_properties(self._client(tenant), self._key(tenant, job_id), properties,
+                                 exclude_from_indexes=UNINDEXED_PROPERTIES)
+
+    def submit(self, tenant: str, job_type: str, params: Optional[dict] = None) -> dict:
+        """Validate and persist a job, then queue it on the pool"""
+        handler = self.handlers.get(job_type)
+        if handler is None:
+            raise JobError(f"Unknown job type: {job_type}")
+        params = params or {}
+        if handler.params_model is not None:
+            try:
+                params = handler.params_model.model_validate(params).model_dump()
+            except ValueError as e:
+                raise JobError(f"Invalid params for {job_type}: {e}")
+
+        job_id = str(uuid.uuid4())
+        now = _now()
+        entity = datastore.Entity(key=self._key(tenant, job_id), exclude_from_indexes=UNINDEXED_PROPERTIES)
+        entity.update({
+            "type": job_type,
+            "status": JOB_QUEUED,
+            "progress_done": 0,
+            "progress_total": None,
+            "message": None,
+            "result": None,
+            "error": None,
+            "cancel_requested": False,
+            "created_at": now,
+            "started_at": None,
+            "finished_at": None,
+            "updated_at": now,
+            "expire_at": now + timedelta(days=settings.JOB_TTL_DAYS),
+        })
+
+        with self._lock:
+            if self._closing:
+                raise JobError("Shutting down")
+            if len(self._local) >= self.max_pending:
+                raise JobQueueFull("Too many pending jobs, retry later")
+            self._client(tenant).put(entity)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+            cancel_event = threading.Event()
+            future = self._executor.submit(self._run, tenant, job_id, handler, params, cancel_event)
+            self._local[(tenant, job_id)] = (future, cancel_event)
+        future.add_done_callback(lambda _: self._forget(tenant, job_id))
+        return job_to_dict(entity)
+
+    def _forget(self, tenant: str, job_id: str) -> None:
+        with self._lock:
+            self._local.pop((tenant, job_id), None)
+
+    def get(self, tenant: str, job_id: str) -> Optional[dict]:
+        entity = self._client(tenant).get(self._key(tenant, job_id))
+        if entity is None:
+            return None
+        return job_to_dict(entity)
+
+    def cancel(self, tenant: str, job_id: str) -> Optional[dict]:
+        """
+        Request cancellation of a job. A queued job never starts; a running
+        one stops at its next progress report. Finished jobs are unchanged.
+        """
+        job = self.get(tenant, job_id)
+        if job is None or job["status"] in FINISHED_STATUSES:
+            return job
+        self._update(tenant, job_id, {"cancel_requested": True, "updated_at": _now()})
+        with self._lock:
+            local = self._local.get((tenant, job_id))
+        if local is not None:
+            local[1].set()
+        return self.get(tenant, job_id)
+
+    def _run(self, tenant: str, job_id: str, handler: JobHandler, params: dict,
+             cancel_event: threading.Event) -> None:
+        ctx = JobContext(self, tenant, job_id, cancel_event)
+        try:
+            if cancel_event.is_set():
+                raise JobCancelled()
+            self._update(tenant, job_id, {"status": JOB_RUNNING, "started_at": _now(), "updated_at": _now()})
+            result = handler.run(ctx, params)
+            self._finish(tenant, job_id, JOB_SUCCEEDED, result=result)
+        except JobCancelled:
+            if self._closing:
+                self._finish(tenant, job_id, JOB_FAILED, error="Interrupted by instance shutdown")
+            else:
+                self._finish(tenant, job_id, JOB_CANCELLED)
+        except Exception as e:
+            logger.exception("Job %s failed", job_id)
+            self._finish(tenant, job_id, JOB_FAILED, error=str(e))
+
+    def _finish(self, tenant: str, job_id: str, status: str, result: Optional[Any] = None,
+                error: Optional[str] = None) -> None:
+        properties = {"status": status, "finished_at": _now(), "updated_at": _now()}
+        if result is not None:
+            properties["result"] = json.dumps(result, default=str)
+        if error is not None:
+            properties["error"] = error
+        try:
+            self._update(tenant, job_id, properties)
+        except Exception:
+            logger.exception("Could not record the end of job %s", job_id)
+            # Don't leave the job running forever; record it as failed without the details
+            try:
+                self._update(tenant, job_id, {
+                    "status": JOB_FAILED,
+                    "error": "Could not record the job's outcome",
+                    "finished_at": _now(),
+                    "updated_at": _now(),
+                })
+            except Exception:
+                logger.exception("Could not record the failure of job %s", job_id)
+
+    def shutdown(self) -> None:
+        """
+        Stop accepting jobs, stop running ones at their next progress report
+        and mark queued ones as failed. Does not wait for running jobs.
+        """
+        with self._lock:
+            self._closing = True
+            local = dict(self._local)
+            executor, self._executor = self._executor, None
+        for (tenant, job_id), (future, cancel_event) in local.items():
+            cancel_event.set()
+            if future.cancel():
+                self._finish(tenant, job_id, JOB_FAILED, error="Interrupted by instance shutdown")
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
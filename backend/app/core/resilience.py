@@ -0,0 +1,305 @@
+"""
+Resilience layer for Datastore RPCs
+
+Wraps the API object under the shared Datastore client, so every RPC made
+through it (gets, query pages, commits, transactions and the blind updates
+in update_properties) gets:
+
+  - a deadline per operation, covering all of its attempts
+  - retries with full-jitter exponential backoff, for calls that are safe
+    to repeat: reads, and non-transactional commits without inserts
+  - a circuit breaker that fails fast after repeated transient errors,
+    instead of queueing requests behind an unavailable backend
+  - optional hedged lookups: if a `get` has not answered after
+    DATASTORE_HEDGE_AFTER_MS, an identical lookup is sent and whichever
+    answers first wins
+
+Transient failures surface as DatastoreUnavailable, which the API maps to
+503 with Retry-After instead of 500.
+
+Latency is recorded per RPC; with hedging on, `lookup.primary` records how
+long the first attempt alone took, i.e. the tail without hedging.
+"""
+
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Optional
+
+from google.api_core import exceptions
+from google.cloud.datastore_v1.types import datastore as datastore_pb2
+
+from app.core.config import settings
+
+# Errors that say nothing about the request itself and may pass on retry
+TRANSIENT_ERRORS = (
+    exceptions.ServiceUnavailable,
+    exceptions.DeadlineExceeded,
+    exceptions.InternalServerError,
+    exceptions.ResourceExhausted,
+    exceptions.RetryError,
+)
+
+# RPCs under the read deadline; the others get the write deadline
+READ_METHODS = ("lookup", "run_query", "run_aggregation_query")
+
+
+class DatastoreUnavailable(Exception):
+    """Raised when Datastore is failing transiently or the circuit is open"""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LatencyRecorder:
+    """Recent latencies and event counts per operation"""
+
+    def __init__(self, window: int = 2048):
+        self._latencies: Dict[str, deque] = defaultdict(lambda: deque(maxlen=window))
+        self._counts: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+
+    def record(self, operation: str, seconds: float) -> None:
+        with self._lock:
+            self._latencies[operation].append(seconds)
+            self._counts[operation]["calls"] += 1
+
+    def count(self, operation: str, event: str) -> None:
+        with self._lock:
+            self._counts[operation][event] += 1
+
+    def snapshot(self) -> dict:
+        """Counts and p50/p95/p99/max in milliseconds per operation"""
+        with self._lock:
+            latencies = {operation: sorted(values) for operation, values in self._latencies.items()}
+            counts = {operation: dict(events) for operation, events in self._counts.items()}
+        snapshot = {}
+        for operation in sorted(set(latencies) | set(counts)):
+            values = latencies.get(operation) or []
+            entry = dict(counts.get(operation, {}))
+            if values:
+                for name, q in (("p50_ms", 0.50), ("p95_ms", 0.95), ("p99_ms", 0.99)):
+                    entry[name] = round(values[min(len(values) - 1, int(q * len(values)))] * 1000, 2)
+                entry["max_ms"] = round(values[-1] * 1000, 2)
+            snapshot[operation] = entry
+        return snapshot
+
+    def reset(self) -> None:
+        with self._lock:
+            self._latencies.clear()
+            self._counts.clear()
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive transient failures and rejects calls
+    for `reset_seconds`; then lets one trial call through (half-open) and
+    closes again if it succeeds.
+    """
+
+    def __init__(self, threshold: int, reset_seconds: float):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_seconds:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> bool:
+        if self.threshold <= 0:
+            return True
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_seconds or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def retry_after(self) -> float:
+        with self._lock:
+            if self._opened_at is None:
+                return 1.0
+            return max(1.0, self.reset_seconds - (time.monotonic() - self._opened_at))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.threshold > 0:
+                self._opened_at = time.monotonic()
+
+
+def is_idempotent_commit(request) -> bool:
+    """Non-transactional commits without inserts leave the same state when repeated"""
+    mode = request.get("mode") if isinstance(request, dict) else getattr(request, "mode", None)
+    if mode != datastore_pb2.CommitRequest.Mode.NON_TRANSACTIONAL:
+        return False
+    mutations = request.get("mutations") if isinstance(request, dict) else request.mutations
+    # Inserts are used for keys without an ID, which get a new one each time
+    return not any("insert" in mutation for mutation in mutations or ())
+
+
+def _in_transaction(request) -> bool:
+    read_options = request.get("read_options") if isinstance(request, dict) else getattr(request, "read_options", None)
+    return bool(read_options) and bool(getattr(read_options, "transaction", None) or "new_transaction" in read_options)
+
+
+# Shared by every client in the process: one backend, one breaker
+datastore_metrics = LatencyRecorder()
+datastore_breaker = CircuitBreaker(settings.DATASTORE_BREAKER_FAILURES, settings.DATASTORE_BREAKER_RESET_SECONDS)
+
+
+class ResilientDatastoreApi:
+    """Datastore API wrapper applying deadlines, retries, the breaker and hedging"""
+
+    def __init__(self, api, metrics: Optional[LatencyRecorder] = None, breaker: Optional[CircuitBreaker] = None,
+                 read_deadline: float = settings.DATASTORE_READ_DEADLINE_SECONDS,
+                 write_deadline: float = settings.DATASTORE_WRITE_DEADLINE_SECONDS,
+                 max_retries: int = settings.DATASTORE_MAX_RETRIES,
+                 backoff_base: float = settings.DATASTORE_RETRY_BASE_SECONDS,
+                 backoff_max: float = settings.DATASTORE_RETRY_MAX_SECONDS,
+                 hedge_after: float = settings.DATASTORE_HEDGE_AFTER_MS / 1000.0,
+                 sleep: Callable[[float], None] = time.sleep):
+        self._api = api
+        self.metrics = metrics if metrics is not None else datastore_metrics
+        self.breaker = breaker if breaker is not None else datastore_breaker
+        self.read_deadline = read_deadline
+        self.write_deadline = write_deadline
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_after = hedge_after
+        self._sleep = sleep
+        self._hedge_pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self._api, name)
+
+    def lookup(self, request=None, **kwargs):
+        if self.hedge_after > 0 and not _in_transaction(request):
+            return self._call("lookup", self._hedged_lookup, request, kwargs, idempotent=True)
+        return self._call("lookup", self._api.lookup, request, kwargs, idempotent=True)
+
+    def run_query(self, request=None, **kwargs):
+        return self._call("run_query", self._api.run_query, request, kwargs, idempotent=True)
+
+    def run_aggregation_query(self, request=None, **kwargs):
+        return self._call("run_aggregation_query", self._api.run_aggregation_query, request, kwargs, idempotent=True)
+
+    def commit(self, request=None, **kwargs):
+        return self._call("commit", self._api.commit, request, kwargs, idempotent=is_idempotent_commit(request))
+
+    def begin_transaction(self, request=None, **kwargs):
+        return self._call("begin_transaction", self._api.begin_transaction, request, kwargs, idempotent=True)
+
+    def rollback(self, request=None, **kwargs):
+        return self._call("rollback", self._api.rollback, request, kwargs, idempotent=True)
+
+    def allocate_ids(self, request=None, **kwargs):
+        return self._call("allocate_ids", self._api.allocate_ids, request, kwargs, idempotent=True)
+
+    def reserve_ids(self, request=None, **kwargs):
+        return self._call("reserve_ids", self._api.reserve_ids, request, kwargs, idempotent=True)
+
+    def close(self) -> None:
+        with self._pool_lock:
+            pool, self._hedge_pool = self._hedge_pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+    def _call(self, operation: str, method: Callable, request, kwargs: dict, idempotent: bool):
+        if not self.breaker.allow():
+            self.metrics.count(operation, "rejected")
+            raise DatastoreUnavailable("Datastore circuit is open", retry_after=self.breaker.retry_after())
+
+        budget = self.read_deadline if operation in READ_METHODS else self.write_deadline
+        deadline = time.monotonic() + min(budget, kwargs.pop("timeout", None) or budget)
+        # Retries are done here, not by the client library
+        kwargs["retry"] = None
+        attempt = 0
+        while True:
+            started = time.monotonic()
+            try:
+                result = method(request=request, timeout=max(0.001, deadline - started), **kwargs)
+            except TRANSIENT_ERRORS as e:
+                self.breaker.record_failure()
+                self.metrics.count(operation, "errors")
+                attempt += 1
+                backoff = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                if not idempotent or attempt > self.max_retries or time.monotonic() + backoff >= deadline:
+                    raise DatastoreUnavailable(f"Datastore {operation} failed: {e}") from e
+                self.metrics.count(operation, "retries")
+                self._sleep(backoff)
+                continue
+            except Exception:
+                # Any other answer (NotFound, conflicts, bad requests) means the backend is up
+                self.breaker.record_success()
+                raise
+            self.metrics.record(operation, time.monotonic() - started)
+            self.breaker.record_success()
+            return result
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._pool_lock:
+            if self._hedge_pool is None:
+                self._hedge_pool = ThreadPoolExecutor(
+                    max_workers=settings.DATASTORE_HEDGE_THREADS, thread_name_prefix="datastore-hedge"
+                )
+            return self._hedge_pool
+
+    def _hedged_lookup(self, request=None, timeout: Optional[float] = None, **kwargs):
+        """Send the lookup, and a second copy if the first is slower than hedge_after"""
+        pool = self._pool()
+        started = time.monotonic()
+        primary = pool.submit(self._api.lookup, request=request, timeout=timeout, **kwargs)
+        primary.add_done_callback(lambda _: self.metrics.record("lookup.primary", time.monotonic() - started))
+
+        done, _ = wait([primary], timeout=self.hedge_after)
+        if done:
+            return primary.result()
+
+        self.metrics.count("lookup", "hedges")
+        remaining = max(0.001, (timeout or self.read_deadline) - (time.monotonic() - started))
+        hedge = pool.submit(self._api.lookup, request=request, timeout=remaining, **kwargs)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self.metrics.count("lookup", "hedge_wins")
+                    return future.result()
+                error = future.exception()
+        if error is not None:
+            raise error
+        raise exceptions.DeadlineExceeded("Hedged lookup timed out")
+
+
+def install(client) -> ResilientDatastoreApi:
+    """Route a client's RPCs through a ResilientDatastoreApi"""
+    api = ResilientDatastoreApi(client._datastore_api)
+    client._datastore_api_internal = api
+    return api
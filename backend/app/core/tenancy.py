@@ -0,0 +1,34 @@
+"""
+Tenant resolution
+
+Every tenant's data lives in its own Datastore namespace, so queries and
+indexes only ever cover that tenant's entities.
+"""
+
+import re
+from typing import Optional
+from fastapi import Header, HTTPException
+
+TENANT_HEADER = "X-Tenant-ID"
+
+# Datastore namespace names: up to 100 of [0-9A-Za-z._-], not starting with "__"
+_TENANT_PATTERN = re.compile(r"^(?!__)[0-9A-Za-z._-]{1,100}$")
+
+DEFAULT_TENANT = ""
+
+
+def is_valid_tenant(tenant: str) -> bool:
+    """Check whether a tenant ID is a usable Datastore namespace"""
+    return tenant == DEFAULT_TENANT or bool(_TENANT_PATTERN.match(tenant))
+
+
+def get_tenant(x_tenant_id: Optional[str] = Header(None, alias=TENANT_HEADER)) -> str:
+    """
+    Resolve the tenant for a request from the X-Tenant-ID header.
+    Returns DEFAULT_TENANT (the default namespace) when the header is absent.
+    """
+    if x_tenant_id is None or x_tenant_id == "":
+        return DEFAULT_TENANT
+    if not is_valid_tenant(x_tenant_id):
+        raise HTTPException(status_code=400, detail=f"Invalid {TENANT_HEADER} header")
+    return x_tenant_id
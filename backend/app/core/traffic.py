@@ -0,0 +1,173 @@
+"""
+Traffic capture for load testing
+
+With TRAFFIC_CAPTURE_PATH set, API requests are recorded as JSON lines that
+describe their shape only:
+
+  {"t": 12.034, "method": "PUT", "route": "/api/shifts/{shift_id}",
+   "query": ["from", "to"], "window_hours": 168.0, "tenant": "3f2a9c1e0b7d",
+   "request_bytes": 96, "response_bytes": 412, "status": 200, "duration_ms": 7.9}
+
+Path parameter values, query values, bodies and headers are never written.
+The tenant is reduced to a hash salted per process, so a capture keeps the
+per-tenant mix without naming tenants. `t` is seconds since capture started,
+which benchmarks/replay_traffic.py uses to reproduce arrival times.
+
+Lines are handed to a writer thread through a bounded queue, so a slow disk
+never holds up a request; lines that don't fit are dropped and counted.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+from urllib.parse import parse_qsl
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.tenancy import TENANT_HEADER
+
+logger = logging.getLogger(__name__)
+
+MAX_PENDING_LINES = 10000
+
+
+class TrafficRecorder:
+    """Appends capture lines to a file from a background thread"""
+
+    def __init__(self, path: str, max_pending: int = MAX_PENDING_LINES):
+        self.path = path
+        self.started = time.monotonic()
+        self.dropped = 0
+        self._salt = os.urandom(16)
+        self._queue: "queue.Queue[Optional[dict]]" = queue.Queue(maxsize=max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def tenant_hash(self, tenant: str) -> str:
+        return hashlib.sha256(self._salt + tenant.encode()).hexdigest()[:12]
+
+    def record(self, line: dict) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._write, name="traffic-capture", daemon=True)
+                self._thread.start()
+        try:
+            self._queue.put_nowait(line)
+        except queue.Full:
+            self.dropped += 1
+
+    def _write(self) -> None:
+        with open(self.path, "a") as out:
+            while True:
+                line = self._queue.get()
+                if line is None:
+                    return
+                out.write(json.dumps(line, separators=(",", ":")) + "\n")
+                if self._queue.empty():
+                    out.flush()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write what is queued and stop the writer thread"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._queue.put(None)
+        thread.join(timeout)
+        if self.dropped:
+            logger.warning("Traffic capture dropped %d lines", self.dropped)
+
+
+def _window_hours(query: dict) -> Optional[float]:
+    """Length of a from/to window, the one query value shape worth keeping"""
+    try:
+        window_start = datetime.fromisoformat(query["from"].replace("Z", "+00:00"))
+        window_end = datetime.fromisoformat(query["to"].replace("Z", "+00:00"))
+        return round((window_end - window_start).total_seconds() / 3600.0, 3)
+    except (KeyError, ValueError, TypeError):
+        return None
+
+
+# Shared by the middleware and the app's shutdown, None when capture is off
+traffic_recorder: Optional[TrafficRecorder] = (
+    TrafficRecorder(settings.TRAFFIC_CAPTURE_PATH) if settings.TRAFFIC_CAPTURE_PATH else None
+)
+
+
+class TrafficCaptureMiddleware:
+    """
+    ASGI middleware recording the shape, status and timing of API requests.
+    Added outermost so durations cover the other middleware too.
+    """
+
+    def __init__(self, app: ASGIApp, recorder: Optional[TrafficRecorder] = None,
+                 sample_rate: float = settings.TRAFFIC_CAPTURE_SAMPLE_RATE, path_prefix: str = "/api/"):
+        self.app = app
+        self.recorder = recorder if recorder is not None else traffic_recorder
+        self.sample_rate = sample_rate
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            self.recorder is None
+            or scope["type"] != "http"
+            or not scope["path"].startswith(self.path_prefix)
+            or random.random() >= self.sample_rate
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        arrived = time.monotonic()
+        sizes = {"request": 0, "response": 0}
+        status = {"code": 500}
+
+        async def counting_receive() -> Message:
+            message = await receive()
+            if message["type"] == "http.request":
+                sizes["request"] += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            elif message["type"] == "http.response.body":
+                sizes["response"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            self._record(scope, arrived, sizes, status["code"])
+
+    def _record(self, scope: Scope, arrived: float, sizes: dict, status: int) -> None:
+        # The router stores the matched route in the scope; unmatched paths stay anonymous
+        route = scope.get("route")
+        query = dict(parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True))
+        headers = Headers(scope=scope)
+        # Bodies a route never reads are not counted on the way in
+        length = headers.get("content-length", "")
+        request_bytes = int(length) if length.isdigit() else sizes["request"]
+        line = {
+            "t": round(arrived - self.recorder.started, 4),
+            "method": scope["method"],
+            "route": getattr(route, "path_format", None) or "<unmatched>",
+            "query": sorted(query),
+            "tenant": self.recorder.tenant_hash(headers.get(TENANT_HEADER, "")),
+            "request_bytes": request_bytes,
+            "response_bytes": sizes["response"],
+            "status": status,
+            "duration_ms": round((time.monotonic() - arrived) * 1000, 3),
+        }
+        window = _window_hours(query)
+        if window is not None:
+            line["window_hours"] = window
+        self.recorder.record(line)
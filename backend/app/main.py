@@ -2,17 +2,53 @@
 Main FastAPI application entry point
 """
 
+import threading
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse
 from app.api.v1 import router as api_router
+from app.core.admission import AdmissionControlMiddleware, admission_controller
 from app.core.config import settings
+from app.core.dependencies import job_runner, registry
+from app.core.idempotency import IdempotencyMiddleware
+from app.core.resilience import datastore_breaker, datastore_metrics
+from app.core.traffic import TrafficCaptureMiddleware, traffic_recorder
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start serving immediately and build services in the background.
+    Requests that arrive before warm-up finishes construct what they need.
+    """
+    if settings.WARMUP_SERVICES:
+        threading.Thread(target=registry.warm_up, name="service-warmup", daemon=True).start()
+    yield
+    job_runner.shutdown()
+    registry.close()
+    if traffic_recorder is not None:
+        traffic_recorder.close()
+
 
 app = FastAPI(
     title="Fareclock API",
     description="API for managing working shifts",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
+# Replay stored responses for POST/PUT retries carrying an Idempotency-Key.
+# Added first so it runs inside CORS and replays get CORS headers too.
+app.add_middleware(IdempotencyMiddleware)
+
+# Concurrency limits and queues per route class, and token buckets per
+# client. Outside idempotency so shed requests never reach the store, and
+# inside CORS so 429 and 503 responses carry CORS headers.
+if settings.ADMISSION_CONTROL:
+    app.add_middleware(AdmissionControlMiddleware)
+
 # CORS middleware for frontend integration
 app.add_middleware(
     CORSMiddleware,
@@ -22,6 +58,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON responses above the size threshold. Binary shift streams
+# negotiate their own encoding (including brotli) and are skipped here.
+app.add_middleware(GZipMiddleware, minimum_size=settings.COMPRESSION_MIN_BYTES)
+
+# Record request shapes and timings for replay when TRAFFIC_CAPTURE_PATH is
+# set. Outermost, so durations include the middleware above.
+if traffic_recorder is not None:
+    app.add_middleware(TrafficCaptureMiddleware)
+
 # Include API routes
 app.include_router(api_router, prefix="/api")
 
@@ -37,3 +82,36 @@ async def health():
     """Health check endpoint"""
     return {"status": "healthy"}
 
+
+@app.get("/ready")
+async def ready():
+    """
+    Readiness endpoint: 503 while admission queues are backing up, requests
+    were shed recently or the Datastore circuit is open. /health stays a
+    liveness check and answers 200 regardless.
+    """
+    reasons = admission_controller.readiness()
+    if datastore_breaker.state == "open":
+        reasons.append("datastore circuit open")
+    if reasons:
+        return JSONResponse({"status": "saturated", "reasons": reasons}, status_code=503)
+    return {"status": "ready"}
+
+
+@app.get("/metrics/datastore")
+async def datastore_metrics_endpoint():
+    """
+    Datastore RPC metrics of this instance: calls, errors, retries and
+    latency percentiles per RPC, hedging counts and the circuit state.
+    """
+    return {"circuit": datastore_breaker.state, "operations": datastore_metrics.snapshot()}
+
+
+@app.get("/metrics/admission")
+async def admission_metrics_endpoint():
+    """
+    Admission control state of this instance per route class: limits,
+    in-flight and queued requests, queue wait percentiles, admitted,
+    shed and rate limited counts.
+    """
+    return admission_controller.snapshot()
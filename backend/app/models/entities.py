@@ -2,10 +2,12 @@
 Datastore entity models and utilities
 """
 
+from google.api_core import exceptions
 from google.cloud import datastore
-from datetime import datetime
-from typing import Optional
-from app.core.datastore import KIND_WORKER, KIND_SHIFT, KIND_TIMEZONE
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Tuple
+from app.core.datastore import KIND_WORKER, KIND_SHIFT, KIND_SHIFT_TEMPLATE, KIND_TIMEZONE
+from app.utils.trie import normalize_name
 
 
 def calculate_duration(start_iso: str, end_iso: str) -> float:
@@ -19,6 +21,59 @@ def calculate_duration(start_iso: str, end_iso: str) -> float:
     return delta.total_seconds() / 3600.0
 
 
+def is_deleted(entity: Optional[datastore.Entity]) -> bool:
+    """Return True if the entity is a tombstone left behind by a delete"""
+    return bool(entity is not None and entity.get("deleted", False))
+
+
+def tombstone_properties(ttl_days: int) -> dict:
+    """
+    Properties that turn an entity into a tombstone.
+    The entity keeps its key and other properties so delta sync can report
+    the delete; `expire_at` drives the Datastore TTL policy that removes it.
+    """
+    now = datetime.utcnow()
+    return {
+        "deleted": True,
+        "deleted_at": now,
+        "expire_at": now + timedelta(days=ttl_days),
+        "updated_at": now,
+    }
+
+
+def update_live_entity(
+    client: datastore.Client, key: datastore.Key, properties: dict, attempts: int = 3,
+    related: Optional[Callable[[datastore.Entity, datastore.Entity], List[datastore.Entity]]] = None,
+) -> Optional[Tuple[datastore.Entity, datastore.Entity, List[datastore.Entity]]]:
+    """
+    Update properties of an entity unless it is missing or a tombstone.
+    Returns copies of the entity before and after the update, and the
+    entities `related` built from those two, which are written in the same
+    commit. Returns None if there was no live entity to update.
+    The transaction is begun by the lookup itself (`begin_later`), so a
+    write is one lookup and one commit, the same two RPCs as a plain get
+    and put, while the commit still fails if the entity changed since it
+    was read. Such a conflict is retried and sees the other write, so of
+    two racing deletes only one finds the entity live.
+    """
+    for attempt in range(attempts):
+        try:
+            with client.transaction(begin_later=True):
+                entity = client.get(key)
+                if entity is None or is_deleted(entity):
+                    return None
+                previous = datastore.Entity(key=key, exclude_from_indexes=tuple(entity.exclude_from_indexes))
+                previous.update(entity)
+                entity.update(properties)
+                written = related(previous, entity) if related is not None else []
+                client.put_multi([entity, *written])
+            return previous, entity, written
+        except exceptions.Conflict:
+            if attempt == attempts - 1:
+                raise
+    return None
+
+
 class WorkerEntity:
     """Worker entity model"""
     
@@ -41,6 +96,8 @@ class WorkerEntity:
         entity = datastore.Entity(key=key)
         entity.update({
             "name": data["name"],
+            # Normalized copy of the name for prefix range queries
+            "name_lower": normalize_name(data["name"]),
             "created_at": data.get("created_at", datetime.utcnow()),
             "updated_at": datetime.utcnow(),
         })
@@ -63,6 +120,7 @@ class ShiftEntity:
             "start": start_iso,
             "end": end_iso,
             "duration": duration,
+            "template_id": entity.get("template_id"),
             "created_at": entity.get("created_at"),
             "updated_at": entity.get("updated_at"),
         }
@@ -87,6 +145,49 @@ class ShiftEntity:
         return entity
 
 
+class ShiftTemplateEntity:
+    """Recurring shift template entity model"""
+    
+    @staticmethod
+    def to_dict(entity: datastore.Entity) -> dict:
+        """Convert Datastore entity to dictionary"""
+        start = datetime.fromisoformat(entity.get("start"))
+        end = datetime.fromisoformat(entity.get("end"))
+        
+        return {
+            "id": entity.key.id_or_name,
+            "worker_id": entity.get("worker_id", ""),
+            "start": entity.get("start"),
+            "end": entity.get("end"),
+            "rrule": entity.get("rrule"),
+            "timezone": entity.get("timezone"),
+            "duration": (end - start).total_seconds() / 3600.0,
+            "exdates": list(entity.get("exdates") or []),
+            "created_at": entity.get("created_at"),
+            "updated_at": entity.get("updated_at"),
+        }
+    
+    @staticmethod
+    def from_dict(data: dict, key: Optional[datastore.Key] = None) -> datastore.Entity:
+        """Create Datastore entity from dictionary"""
+        if key is None:
+            key = datastore.Key(KIND_SHIFT_TEMPLATE, data.get("id"))
+        
+        entity = datastore.Entity(key=key, exclude_from_indexes=("rrule", "exdates"))
+        entity.update({
+            "worker_id": data["worker_id"],
+            "start": data["start"],
+            "end": data["end"],
+            "rrule": data["rrule"],
+            "timezone": data["timezone"],
+            # Local dates of occurrences that were deleted or materialized
+            "exdates": list(data.get("exdates") or []),
+            "created_at": data.get("created_at", datetime.utcnow()),
+            "updated_at": datetime.utcnow(),
+        })
+        return entity
+
+
 class TimezoneEntity:
     """Timezone setting entity model"""
     
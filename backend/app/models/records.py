@@ -0,0 +1,231 @@
+"""
+Compact in-process shift representations
+
+Shift lists used to be held as Datastore entities, then as dicts from
+ShiftEntity.to_dict, then as the converted copies made for the timezone.
+ShiftBatch keeps a list as columns instead: times as arrays of epoch
+microseconds (UTC), worker IDs interned into a per-batch table and
+referenced by index, and shift IDs in a plain list. Timezone conversion
+and aggregation work on the columns; dicts are only built when a response
+is encoded.
+
+ShiftRecord is the row type, used for single shifts and when iterating over
+a batch. It has __slots__, so a row costs no per-instance dict.
+"""
+
+import sys
+from array import array
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import Dict, Iterator, List, Optional
+
+from google.cloud import datastore
+
+from app.utils.timezone import get_tzinfo, parse_iso_datetime
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+US_PER_HOUR = 3_600_000_000
+
+# Stands for a missing created_at / updated_at in the timestamp columns
+MISSING = -(2 ** 63)
+
+
+def to_epoch_us(value: datetime) -> int:
+    """Epoch microseconds of a datetime, naive values are UTC"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - EPOCH) // MICROSECOND
+
+
+def from_epoch_us(value: int, tz: tzinfo = timezone.utc) -> datetime:
+    """Aware datetime in `tz` for epoch microseconds"""
+    seconds, micros = divmod(value, 1_000_000)
+    moment = datetime.fromtimestamp(seconds, tz)
+    return moment.replace(microsecond=micros) if micros else moment
+
+
+def format_epoch_us(value: int, tz: Optional[tzinfo] = None) -> str:
+    """ISO 8601 string in `tz`, or in UTC with a Z suffix by default"""
+    if tz is None:
+        return from_epoch_us(value).isoformat().replace("+00:00", "Z")
+    return from_epoch_us(value, tz).isoformat()
+
+
+class _Memo(dict):
+    """
+    Converts each distinct key once: shift times repeat a lot (every 9:00
+    start of a day, every row written by one batch), and hits stay in C.
+    Cleared when full so one-off values can't grow it without bound.
+    """
+
+    def __init__(self, convert, max_entries: int = 65536):
+        super().__init__()
+        self.convert = convert
+        self.max_entries = max_entries
+
+    def __missing__(self, key):
+        if len(self) >= self.max_entries:
+            self.clear()
+        value = self[key] = self.convert(key)
+        return value
+
+
+def _optional_us(value: Optional[datetime]) -> int:
+    return MISSING if value is None else to_epoch_us(value)
+
+
+def _optional_datetime(value: int) -> Optional[datetime]:
+    return None if value == MISSING else from_epoch_us(value)
+
+
+class ShiftRecord:
+    """One shift, with times as epoch microseconds (UTC)"""
+    __slots__ = ("id", "worker_id", "start", "end", "template_id", "created_at", "updated_at")
+
+    def __init__(self, shift_id: str, worker_id: str, start: int, end: int, template_id: Optional[str] = None,
+                 created_at: int = MISSING, updated_at: int = MISSING):
+        self.id = shift_id
+        self.worker_id = worker_id
+        self.start = start
+        self.end = end
+        self.template_id = template_id
+        self.created_at = created_at
+        self.updated_at = updated_at
+
+    @classmethod
+    def from_entity(cls, entity: datastore.Entity) -> "ShiftRecord":
+        """Convert a Shift entity"""
+        # flat_path is cached on the key, id_or_name deep-copies the path
+        return cls(
+            entity.key.flat_path[-1],
+            entity.get("worker_id", ""),
+            to_epoch_us(parse_iso_datetime(entity["start"])),
+            to_epoch_us(parse_iso_datetime(entity["end"])),
+            entity.get("template_id"),
+            _optional_us(entity.get("created_at")),
+            _optional_us(entity.get("updated_at")),
+        )
+
+    @property
+    def duration(self) -> float:
+        """Duration in hours"""
+        return (self.end - self.start) / US_PER_HOUR
+
+    def overlaps(self, window_start: Optional[int], window_end: Optional[int]) -> bool:
+        """Check whether the shift overlaps [window_start, window_end), bounds in epoch microseconds"""
+        return (window_start is None or self.end > window_start) and (window_end is None or self.start < window_end)
+
+    def to_dict(self, tz: Optional[tzinfo] = None) -> dict:
+        """Shift dict as returned by the API, times in `tz` (UTC with a Z suffix by default)"""
+        return {
+            "id": self.id,
+            "worker_id": self.worker_id,
+            "start": format_epoch_us(self.start, tz),
+            "end": format_epoch_us(self.end, tz),
+            "duration": self.duration,
+            "template_id": self.template_id,
+            "created_at": _optional_datetime(self.created_at),
+            "updated_at": _optional_datetime(self.updated_at),
+        }
+
+
+class ShiftBatch:
+    """
+    Columnar list of shifts.
+    Row `i` is (ids[i], workers[worker_rows[i]], starts[i], ends[i], ...);
+    template IDs are sparse since most shifts have none.
+    """
+    __slots__ = ("ids", "workers", "worker_rows", "starts", "ends", "created", "updated",
+                 "template_ids", "_worker_index")
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self.workers: List[str] = []
+        self.worker_rows = array("I")
+        self.starts = array("q")
+        self.ends = array("q")
+        self.created = array("q")
+        self.updated = array("q")
+        self.template_ids: Dict[int, str] = {}
+        self._worker_index: Dict[str, int] = {}
+
+    @classmethod
+    def from_records(cls, records) -> "ShiftBatch":
+        batch = cls()
+        for record in records:
+            batch.append(record)
+        return batch
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def worker_number(self, worker_id: str) -> int:
+        """Index of a worker ID in `workers`, adding it if it's new"""
+        number = self._worker_index.get(worker_id)
+        if number is None:
+            number = self._worker_index[worker_id] = len(self.workers)
+            self.workers.append(sys.intern(worker_id))
+        return number
+
+    def append(self, record: ShiftRecord) -> None:
+        if record.template_id is not None:
+            self.template_ids[len(self.ids)] = record.template_id
+        self.ids.append(record.id)
+        self.worker_rows.append(self.worker_number(record.worker_id))
+        self.starts.append(record.start)
+        self.ends.append(record.end)
+        self.created.append(record.created_at)
+        self.updated.append(record.updated_at)
+
+    def record(self, row: int) -> ShiftRecord:
+        return ShiftRecord(
+            self.ids[row],
+            self.workers[self.worker_rows[row]],
+            self.starts[row],
+            self.ends[row],
+            self.template_ids.get(row),
+            self.created[row],
+            self.updated[row],
+        )
+
+    def __iter__(self) -> Iterator[ShiftRecord]:
+        for row in range(len(self.ids)):
+            yield self.record(row)
+
+    def sorted_by_start(self) -> "ShiftBatch":
+        """A copy ordered by start; rows with equal starts keep their order"""
+        order = sorted(range(len(self.ids)), key=self.starts.__getitem__)
+        batch = ShiftBatch()
+        # Copied, so appending to either batch leaves the other's workers alone
+        batch.workers = list(self.workers)
+        batch._worker_index = dict(self._worker_index)
+        batch.ids = [self.ids[row] for row in order]
+        for name in ("worker_rows", "starts", "ends", "created", "updated"):
+            column = getattr(self, name)
+            setattr(batch, name, array(column.typecode, (column[row] for row in order)))
+        positions = {row: position for position, row in enumerate(order)} if self.template_ids else {}
+        batch.template_ids = {positions[row]: template_id for row, template_id in self.template_ids.items()}
+        return batch
+
+    def iter_dicts(self, target_timezone: Optional[str] = None) -> Iterator[dict]:
+        """Shift dicts with times converted to the timezone, built one row at a time"""
+        tz = get_tzinfo(target_timezone) if target_timezone else None
+        texts = _Memo(lambda value: format_epoch_us(value, tz))
+        moments = _Memo(_optional_datetime)
+        workers, worker_rows, template_ids = self.workers, self.worker_rows, self.template_ids
+        starts, ends, created, updated = self.starts, self.ends, self.created, self.updated
+        for row, shift_id in enumerate(self.ids):
+            start, end = starts[row], ends[row]
+            yield {
+                "id": shift_id,
+                "worker_id": workers[worker_rows[row]],
+                "start": texts[start],
+                "end": texts[end],
+                "duration": (end - start) / US_PER_HOUR,
+                "template_id": template_ids.get(row),
+                "created_at": moments[created[row]],
+                "updated_at": moments[updated[row]],
+            }
+
+    def to_dicts(self, target_timezone: Optional[str] = None) -> List[dict]:
+        return list(self.iter_dicts(target_timezone))
@@ -3,7 +3,7 @@ Pydantic schemas for request/response validation
 """
 
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -44,6 +44,19 @@ class Worker(WorkerBase):
         from_attributes = True
 
 
+class WorkerChanges(BaseModel):
+    """Delta sync response for workers"""
+    items: List[Worker] = Field(..., description="Workers created or updated since the cursor")
+    deleted: List[str] = Field(..., description="IDs of workers deleted since the cursor")
+    synced_at: datetime = Field(..., description="Cursor to send as updated_since on the next sync")
+
+
+class WorkerSummary(BaseModel):
+    """Worker fields embedded in shift responses"""
+    id: str
+    name: str
+
+
 class ShiftBase(BaseModel):
     """Base shift schema"""
     worker_id: str = Field(..., description="ID of the associated worker")
@@ -67,6 +80,8 @@ class Shift(ShiftBase):
     """Shift response schema"""
     id: str
     duration: float = Field(..., description="Duration in hours (read-only, computed)")
+    template_id: Optional[str] = Field(None, description="Recurring template the shift is an occurrence or exception of")
+    worker: Optional[WorkerSummary] = Field(None, description="Embedded worker, only with include=worker")
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
     
@@ -74,6 +89,157 @@ class Shift(ShiftBase):
         from_attributes = True
 
 
+class ShiftChanges(BaseModel):
+    """Delta sync response for shifts"""
+    items: List[Shift] = Field(..., description="Shifts created or updated since the cursor")
+    deleted: List[str] = Field(..., description="IDs of shifts deleted since the cursor")
+    synced_at: datetime = Field(..., description="Cursor to send as updated_since on the next sync")
+
+
+class ShiftTemplateBase(BaseModel):
+    """Base recurring shift template schema"""
+    worker_id: str = Field(..., description="ID of the associated worker")
+    start: str = Field(..., description="Local start of the first occurrence, ISO 8601 without offset")
+    end: str = Field(..., description="Local end of the first occurrence, ISO 8601 without offset")
+    rrule: str = Field(..., description="Recurrence rule: FREQ=DAILY|WEEKLY with INTERVAL, BYDAY, UNTIL or COUNT")
+    timezone: Optional[str] = Field(None, description="IANA timezone of start and end, defaults to the configured timezone")
+
+
+class ShiftTemplateCreate(ShiftTemplateBase):
+    """Schema for creating a recurring shift template"""
+    pass
+
+
+class ShiftTemplateUpdate(BaseModel):
+    """Schema for updating a recurring shift template"""
+    worker_id: Optional[str] = Field(None, description="ID of the associated worker")
+    start: Optional[str] = Field(None, description="Local start of the first occurrence, ISO 8601 without offset")
+    end: Optional[str] = Field(None, description="Local end of the first occurrence, ISO 8601 without offset")
+    rrule: Optional[str] = Field(None, description="Recurrence rule")
+    timezone: Optional[str] = Field(None, description="IANA timezone of start and end")
+
+
+class ShiftTemplate(ShiftTemplateBase):
+    """Recurring shift template response schema"""
+    id: str
+    timezone: str
+    duration: float = Field(..., description="Duration of each occurrence in hours (read-only, computed)")
+    exdates: List[str] = Field(..., description="Local dates of deleted or individually edited occurrences")
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+class AutoFillSlot(BaseModel):
+    """An open slot to fill"""
+    start: str = Field(..., description="Start datetime in ISO 8601 format")
+    end: str = Field(..., description="End datetime in ISO 8601 format")
+    worker_ids: Optional[List[str]] = Field(None, description="Only these workers may take the slot")
+
+
+class AutoFillRequest(BaseModel):
+    """Schema for auto-filling open slots"""
+    slots: List[AutoFillSlot] = Field(..., max_length=10000, description="Open slots to fill")
+    worker_ids: Optional[List[str]] = Field(None, description="Workers to draw from, defaults to all workers")
+    dry_run: bool = Field(False, description="Plan the assignments without storing shifts")
+
+
+class AutoFillAssignment(BaseModel):
+    """A slot assigned to a worker"""
+    slot_index: int = Field(..., description="Index of the slot in the request")
+    worker_id: str
+    start: str
+    end: str
+    shift_id: Optional[str] = Field(None, description="ID of the created shift, unset for dry runs")
+
+
+class UnfilledSlot(BaseModel):
+    """A slot no worker could take"""
+    slot_index: int = Field(..., description="Index of the slot in the request")
+    start: str
+    end: str
+    reason: str
+
+
+class AutoFillResult(BaseModel):
+    """Result of an auto-fill run"""
+    assigned: List[AutoFillAssignment]
+    unfilled: List[UnfilledSlot]
+
+
+class GridDay(BaseModel):
+    """A local calendar day of a schedule grid"""
+    date: str = Field(..., description="Local date, YYYY-MM-DD")
+    start: str = Field(..., description="Start of the day in UTC (local midnight)")
+    end: str = Field(..., description="End of the day in UTC; 23 or 25 hours after start on DST changes")
+    hours: float = Field(..., description="Hours worked by all workers on this day")
+    workers: int = Field(..., description="Number of workers working on this day")
+
+
+class GridRow(BaseModel):
+    """A worker's hours per grid day"""
+    worker_id: str
+    hours: List[float] = Field(..., description="Hours per day, aligned with days")
+    total_hours: float
+
+
+class ScheduleGrid(BaseModel):
+    """Worker x local day matrix of scheduled hours"""
+    timezone: str
+    from_: str = Field(..., alias="from", description="Window start in UTC")
+    to: str = Field(..., description="Window end in UTC")
+    today: Optional[str] = Field(None, description="Today's local date")
+    days: List[GridDay]
+    rows: List[GridRow] = Field(..., description="Workers with shifts in the window")
+    total_hours: float
+    shift_count: int
+    version: str = Field(..., description="Collection version the grid was computed at")
+
+
+class WorkerStats(BaseModel):
+    """A worker's shift totals"""
+    worker_id: str
+    shifts: int
+    hours: float
+
+
+class DayStats(BaseModel):
+    """Shift totals of a UTC day, by shift start"""
+    date: str = Field(..., description="UTC date, YYYY-MM-DD")
+    shifts: int
+    hours: float
+
+
+class Stats(BaseModel):
+    """Tenant totals from the statistics counters"""
+    shifts: int = Field(..., description="Stored shifts, including edited template occurrences")
+    hours: float
+    workers: int
+    worker: Optional[WorkerStats] = None
+    days: List[DayStats] = Field(default_factory=list, description="Totals per day of the requested range")
+
+
+class JobCreate(BaseModel):
+    """Schema for submitting a background job"""
+    type: str = Field(..., description="Job type: cascade_delete_worker, purge_tombstones, auto_fill or reconcile_stats")
+    params: dict = Field(default_factory=dict, description="Parameters of the job type")
+
+
+class Job(BaseModel):
+    """Background job status"""
+    id: str
+    type: str
+    status: str = Field(..., description="queued, running, succeeded, failed or cancelled")
+    progress_done: int = 0
+    progress_total: Optional[int] = None
+    message: Optional[str] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
 class ErrorResponse(BaseModel):
     """Error response schema"""
     message: str
@@ -0,0 +1,87 @@
+"""
+Background job types
+
+Each handler runs on the job pool with a JobContext for the submitting
+tenant and returns a small JSON-serializable result.
+"""
+
+from pydantic import BaseModel, Field
+
+from app.core.jobs import JobContext, JobHandler
+from app.models.schemas import AutoFillRequest
+from app.services.schedule_service import ScheduleService
+from app.services.shift_service import ShiftService
+from app.services.stats_service import StatsService
+from app.services.worker_service import WorkerService
+
+
+class CascadeDeleteWorkerParams(BaseModel):
+    worker_id: str = Field(..., min_length=1)
+
+
+def cascade_delete_worker(ctx: JobContext, params: dict) -> dict:
+    """Delete a worker's shifts and templates in batches, then the worker"""
+    worker_id = params["worker_id"]
+    worker_service: WorkerService = ctx.service(WorkerService)
+    shift_service: ShiftService = ctx.service(ShiftService)
+    if worker_service.get_worker(worker_id) is None:
+        raise ValueError("Worker not found")
+
+    deleted = 0
+    for deleted in shift_service.delete_worker_shifts(worker_id):
+        ctx.progress(deleted, message="Deleting shifts")
+    worker_service.delete_worker(worker_id)
+    return {"worker_id": worker_id, "shifts_deleted": deleted}
+
+
+def purge_tombstones(ctx: JobContext, params: dict) -> dict:
+    """Remove expired tombstones of every kind with delta sync"""
+    ctx.progress(0, total=2)
+    workers = ctx.service(WorkerService).purge_tombstones()
+    ctx.progress(1, total=2)
+    shifts = ctx.service(ShiftService).purge_tombstones()
+    return {"workers": workers, "shifts": shifts}
+
+
+def auto_fill(ctx: JobContext, params: dict) -> dict:
+    """Auto-fill for slot sets too large to plan and write within a request"""
+    schedule_service = ScheduleService(ctx.service(ShiftService), ctx.service(WorkerService))
+    ctx.progress(0, total=len(params["slots"]), message="Planning")
+    result = schedule_service.auto_fill(params["slots"], worker_ids=params["worker_ids"], dry_run=params["dry_run"])
+    # Results are stored on the Job entity, so only a sample of unfilled slots is kept
+    return {
+        "assigned": len(result["assigned"]),
+        "unfilled": len(result["unfilled"]),
+        "unfilled_sample": result["unfilled"][:100],
+    }
+
+
+def reconcile_stats(ctx: JobContext, params: dict) -> dict:
+    """Recount the statistics counters from stored shifts and workers"""
+    return ctx.service(StatsService).reconcile(lambda scanned: ctx.progress(scanned, message="Counting shifts"))
+
+
+def backfill_worker_names(ctx: JobContext, params: dict) -> dict:
+    """Store `name_lower` on workers created before name search existed"""
+    updated = 0
+    for updated in ctx.service(WorkerService).backfill_name_lower():
+        ctx.progress(updated, message="Updating workers")
+    return {"updated": updated}
+
+
+def normalize_shift_times(ctx: JobContext, params: dict) -> dict:
+    """Rewrite shift times stored before they were normalized to canonical UTC"""
+    rewritten = 0
+    for rewritten in ctx.service(ShiftService).normalize_stored_times():
+        ctx.progress(rewritten, message="Rewriting shifts")
+    return {"rewritten": rewritten}
+
+
+JOB_HANDLERS = {
+    "cascade_delete_worker": JobHandler(cascade_delete_worker, CascadeDeleteWorkerParams),
+    "purge_tombstones": JobHandler(purge_tombstones),
+    "auto_fill": JobHandler(auto_fill, AutoFillRequest),
+    "reconcile_stats": JobHandler(reconcile_stats),
+    "backfill_worker_names": JobHandler(backfill_worker_names),
+    "normalize_shift_times": JobHandler(normalize_shift_times),
+}
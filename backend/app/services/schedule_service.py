@@ -0,0 +1,107 @@
+"""
+Schedule service - business logic for filling open slots with workers
+"""
+
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from app.services.shift_service import ShiftService, ShiftValidationError
+from app.services.worker_service import WorkerService
+from app.utils.scheduling import Slot, plan_assignments
+from app.utils.timezone import format_utc, parse_iso_datetime
+
+
+class ScheduleService:
+    """Service for assigning open slots to workers"""
+
+    def __init__(self, shift_service: ShiftService, worker_service: WorkerService):
+        self.shift_service = shift_service
+        self.worker_service = worker_service
+
+    def _parse_slots(self, slots: List[dict]) -> List[Slot]:
+        parsed = []
+        for index, slot in enumerate(slots):
+            try:
+                start = parse_iso_datetime(slot["start"])
+                end = parse_iso_datetime(slot["end"])
+            except ValueError as e:
+                raise ShiftValidationError(f"Invalid datetime format in slot {index}: {e}")
+            if end <= start:
+                raise ShiftValidationError(f"Slot {index}: end time must be after start time")
+            worker_ids = slot.get("worker_ids")
+            parsed.append(Slot(start, end, index, frozenset(worker_ids) if worker_ids is not None else None))
+        return parsed
+
+    def _worker_pool(self, worker_ids: Optional[List[str]], slots: List[Slot]) -> List[str]:
+        """The workers to draw from: the given ones, or every worker"""
+        if worker_ids is None:
+            pool = [worker["id"] for worker in self.worker_service.get_all_workers()]
+            known = set(pool)
+        else:
+            pool = list(dict.fromkeys(worker_ids))
+            known = set()
+
+        requested = set(pool) - known
+        for slot in slots:
+            if slot.worker_ids is not None:
+                requested |= slot.worker_ids - known
+        if requested:
+            found = self.worker_service.get_workers_by_ids(requested)
+            missing = sorted(requested - set(found))
+            if missing:
+                raise ShiftValidationError(f"Unknown worker IDs: {', '.join(missing[:10])}")
+        return pool
+
+    def auto_fill(self, slots: List[dict], worker_ids: Optional[List[str]] = None, dry_run: bool = False) -> dict:
+        """
+        Assign open slots to workers without breaking the labor rules,
+        balancing scheduled hours across the pool, and store the assignments
+        as shifts unless `dry_run` is set.
+
+        Existing shifts of the whole pool are loaded with one range query
+        over the slots (widened by the rules' reach), so planning needs no
+        Datastore reads per slot. Shifts written concurrently by other
+        requests are not seen; the slots are planned against a snapshot.
+        """
+        parsed = self._parse_slots(slots)
+        if not parsed:
+            return {"assigned": [], "unfilled": []}
+        pool = self._worker_pool(worker_ids, parsed)
+
+        rules = self.shift_service.rules
+        first = min(slot.start for slot in parsed)
+        last = max(slot.end for slot in parsed)
+        timelines = self.shift_service.get_timelines(first - rules.reach - rules.max_duration, last + rules.reach)
+
+        # Hours already scheduled within the slots' range count towards balancing
+        hours: Dict[str, float] = {}
+        for worker_id, timeline in timelines.items():
+            hours[worker_id] = sum(
+                max(timedelta(0), min(interval.end, last) - max(interval.start, first)).total_seconds()
+                for interval in timeline.intervals
+            ) / 3600.0
+
+        assignments, unfilled = plan_assignments(parsed, pool, timelines, rules, hours)
+
+        assigned = [{
+            "slot_index": assignment.slot.index,
+            "worker_id": assignment.worker_id,
+            "start": format_utc(assignment.slot.start),
+            "end": format_utc(assignment.slot.end),
+            "shift_id": None,
+        } for assignment in assignments]
+
+        if not dry_run and assigned:
+            created = self.shift_service.create_shifts(assigned)
+            for item, shift in zip(assigned, created):
+                item["shift_id"] = shift["id"]
+
+        return {
+            "assigned": assigned,
+            "unfilled": [{
+                "slot_index": item.slot.index,
+                "start": format_utc(item.slot.start),
+                "end": format_utc(item.slot.end),
+                "reason": item.reason,
+            } for item in unfilled],
+        }
@@ -3,83 +3,163 @@ Shift service for CRUD operations with validation
 """
 
 from google.cloud import datastore
-from app.core.datastore import get_datastore_client, KIND_SHIFT
-from app.models.entities import ShiftEntity, calculate_duration
+from app.core.config import settings
+from app.core.datastore import get_datastore_client, put_atomically, KIND_SHIFT, KIND_SHIFT_TEMPLATE
+from app.models.entities import (
+    ShiftEntity,
+    ShiftTemplateEntity,
+    is_deleted,
+    tombstone_properties,
+    update_live_entity,
+)
+from app.models.records import MISSING, ShiftBatch, ShiftRecord, from_epoch_us, to_epoch_us
+from app.services.stats_service import CounterDeltas, StatsService, count_shift, new_deltas, shift_deltas
 from app.services.timezone_service import TimezoneService
-from typing import List, Optional
-from datetime import datetime
+from app.utils.cache import CachedShiftList, LRUCache, ShiftResultCache
+from app.utils.grid import build_grid
+from app.utils.labor_rules import Interval, LaborRuleViolation, RuleEngine, Timeline
+from app.utils.recurrence import (
+    Recurrence,
+    RecurrenceError,
+    build_recurrence,
+    expand,
+    merge_sorted,
+    occurrence_dates,
+    occurrence_times,
+)
+from app.utils.sync import normalize_since, split_changes, purge_expired_tombstones
+from app.utils.timezone import format_utc, parse_iso_datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+from collections import defaultdict, deque
+from datetime import date, datetime, timedelta, timezone
+import heapq
 import uuid
 
+# Widest UTC offset a stored ISO string can carry. `start` is stored as a
+# string, so Datastore range filters on it are widened by this much.
+MAX_UTC_OFFSET = timedelta(hours=14)
+
+# Shifts written per commit, leaving room in its 500 mutations for the
+# statistics deltas recorded with them
+SHIFTS_PER_COMMIT = 450
+
+
+def occurrence_id(template_id: str, day: date) -> str:
+    """ID of a template occurrence, usable wherever a shift ID is"""
+    return f"{template_id}@{day.isoformat()}"
+
+
+def parse_occurrence_id(shift_id: str) -> Optional[Tuple[str, date]]:
+    """Split an occurrence ID into template ID and local date, None for stored shifts"""
+    template_id, separator, day = shift_id.rpartition("@")
+    if not separator:
+        return None
+    try:
+        return template_id, date.fromisoformat(day)
+    except ValueError:
+        return None
+
+
+def _to_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Normalize an optional window bound to aware UTC, naive values are UTC"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def canonical_utc(value: str) -> str:
+    """
+    Canonical UTC form of an ISO 8601 datetime, in which shifts are stored.
+    Range filters on the `start` string only hold for this form.
+    """
+    return format_utc(parse_iso_datetime(value))
+
+
+def _interval(record: ShiftRecord) -> Interval:
+    """Labor rule interval of a shift record"""
+    return Interval(from_epoch_us(record.start), from_epoch_us(record.end), record.id)
+
 
 class ShiftValidationError(Exception):
     """Custom exception for shift validation errors"""
     pass
 
 
+def normalize_window(window_start: Optional[datetime], window_end: Optional[datetime]):
+    """Normalize optional window bounds to aware UTC and check their order"""
+    window_start, window_end = _to_utc(window_start), _to_utc(window_end)
+    if window_start is not None and window_end is not None and window_start >= window_end:
+        raise ShiftValidationError("Window start must be before window end")
+    return window_start, window_end
+
+
 class ShiftService:
-    """Service for managing shifts with validation"""
+    """Service for managing shifts of one tenant namespace, with validation"""
     
-    def __init__(self):
-        self.client = get_datastore_client()
-        self.timezone_service = TimezoneService()
+    def __init__(self, namespace: Optional[str] = None):
+        self.client = get_datastore_client(namespace)
+        self.timezone_service = TimezoneService(namespace)
+        self.stats = StatsService(namespace)
+        self.rules = RuleEngine.from_settings(settings)
+        self.result_cache = ShiftResultCache(settings.SHIFT_CACHE_MAX_ENTRIES, settings.SHIFT_CACHE_TTL_SECONDS)
+        self.grid_cache = LRUCache(settings.GRID_CACHE_MAX_ENTRIES)
     
-    def _validate_shift(self, start_iso: str, end_iso: str, shift_id: Optional[str] = None) -> None:
+    def _validate_shift(self, start_iso: str, end_iso: str, shift_id: Optional[str] = None) -> Tuple[str, str]:
         """
-        Validate shift constraints:
+        Validate shift constraints that don't depend on other shifts:
         1. End time must be after start time
-        2. Duration must not exceed 12 hours
-        3. No overlapping shifts for the same worker
+        2. Shape rules of the labor rule engine (maximum duration)
+        Rules involving the worker's other shifts are checked by _check_rules.
+        Returns start and end in the canonical UTC form they are stored in.
         """
-        # Parse datetimes
-        start = datetime.fromisoformat(start_iso.replace('Z', '+00:00'))
-        end = datetime.fromisoformat(end_iso.replace('Z', '+00:00'))
+        try:
+            start = parse_iso_datetime(start_iso)
+            end = parse_iso_datetime(end_iso)
+        except ValueError:
+            raise ShiftValidationError("start and end must be ISO 8601 datetimes")
         
         # Check end is after start
         if end <= start:
             raise ShiftValidationError("End time must be after start time")
         
-        # Check duration doesn't exceed 12 hours
-        duration = calculate_duration(start_iso, end_iso)
-        if duration > 12.0:
-            raise ShiftValidationError(f"Shift duration ({duration:.2f} hours) exceeds maximum of 12 hours")
-        
-        # Note: Overlap checking is done in create/update methods with worker_id
+        self._apply_rules(Interval(start, end, shift_id))
+        return format_utc(start), format_utc(end)
+    
+    def _apply_rules(self, shift: Interval, timeline: Optional[Timeline] = None) -> None:
+        """Run shape rules, or neighbour rules when a timeline is given"""
+        try:
+            if timeline is None:
+                self.rules.check_shape(shift)
+            else:
+                self.rules.check(shift, timeline)
+        except LaborRuleViolation as e:
+            raise ShiftValidationError(str(e))
     
-    def _check_overlaps(self, worker_id: str, start_iso: str, end_iso: str, exclude_shift_id: Optional[str] = None) -> None:
+    def _neighbours(self, worker_id: str, window_start: datetime, window_end: datetime) -> List[Interval]:
+        """A worker's shifts and template occurrences overlapping a window, as rule intervals"""
+        return [_interval(record) for record in self.get_shift_batch(worker_id, window_start, window_end)]
+    
+    def _check_rules(self, worker_id: str, start_iso: str, end_iso: str, exclude_shift_id: Optional[str] = None) -> None:
         """
-        Check if a shift overlaps with existing shifts for the same worker.
-        Raises ShiftValidationError if overlap is found.
+        Check a shift against the labor rules involving the worker's other shifts
+        (no overlap, minimum rest, rolling hour cap).
+        Only shifts within the rules' reach are loaded, through an ordered
+        range query on (worker_id, start), instead of the worker's whole history.
+        Raises ShiftValidationError if a rule is broken.
         """
-        start = datetime.fromisoformat(start_iso.replace('Z', '+00:00'))
-        end = datetime.fromisoformat(end_iso.replace('Z', '+00:00'))
-        
-        # Query all shifts for this worker
-        query = self.client.query(kind=KIND_SHIFT)
-        query.add_filter("worker_id", "=", worker_id)
-        
-        for entity in query.fetch():
-            # Skip the shift we're updating
-            if exclude_shift_id and entity.key.id_or_name == exclude_shift_id:
-                continue
-            
-            existing_start = datetime.fromisoformat(entity.get("start").replace('Z', '+00:00'))
-            existing_end = datetime.fromisoformat(entity.get("end").replace('Z', '+00:00'))
-            
-            # Check for overlap: two time ranges overlap if:
-            # start1 < end2 AND start2 < end1
-            if start < existing_end and existing_start < end:
-                raise ShiftValidationError(
-                    f"Shift overlaps with existing shift "
-                    f"({existing_start.isoformat()} to {existing_end.isoformat()})"
-                )
+        shift = Interval(parse_iso_datetime(start_iso), parse_iso_datetime(end_iso), exclude_shift_id)
+        neighbours = self._neighbours(worker_id, shift.start - self.rules.reach, shift.end + self.rules.reach)
+        self._apply_rules(shift, self.rules.timeline(neighbours))
     
     def create_shift(self, worker_id: str, start: str, end: str) -> dict:
         """Create a new shift with validation"""
         # Validate shift
-        self._validate_shift(start, end)
+        start, end = self._validate_shift(start, end)
         
-        # Check for overlaps
-        self._check_overlaps(worker_id, start, end)
+        # Check overlaps and the other labor rules
+        self._check_rules(worker_id, start, end)
         
         # Create shift
         shift_id = str(uuid.uuid4())
@@ -92,37 +172,283 @@ class ShiftService:
             "end": end,
         }, key)
         
-        self.client.put(entity)
+        deltas = self._record_stats(None, entity)
+        put_atomically(self.client, [entity, *deltas])
+        self._invalidate(shift_id, worker_id, start, end)
+        self.stats.fold(deltas)
         return ShiftEntity.to_dict(entity)
     
+    def create_shifts(self, shifts: List[dict]) -> List[dict]:
+        """
+        Store shifts the caller has already validated against the labor
+        rules, with batched commits instead of one commit per shift, each
+        with the statistics deltas of its shifts. Not atomic: a failure can
+        leave earlier batches written.
+        """
+        entities = []
+        for shift in shifts:
+            shift_id = str(uuid.uuid4())
+            entities.append(ShiftEntity.from_dict({
+                "id": shift_id,
+                "worker_id": shift["worker_id"],
+                "start": canonical_utc(shift["start"]),
+                "end": canonical_utc(shift["end"]),
+            }, self.client.key(KIND_SHIFT, shift_id)))
+        
+        recorded = []
+        for i in range(0, len(entities), SHIFTS_PER_COMMIT):
+            batch = entities[i:i + SHIFTS_PER_COMMIT]
+            deltas = new_deltas()
+            for entity in batch:
+                count_shift(deltas, entity)
+            recorded.extend(self._commit_with_stats(batch, deltas))
+        
+        created = [ShiftEntity.to_dict(entity) for entity in entities]
+        for shift in created:
+            self._invalidate(shift["id"], shift["worker_id"], shift["start"], shift["end"])
+        self.stats.fold(recorded)
+        return created
+    
+    def get_timelines(self, window_start: datetime, window_end: datetime) -> Dict[str, Timeline]:
+        """
+        Every worker's shifts and template occurrences overlapping a window,
+        as labor rule timelines keyed by worker ID, from one range query.
+        """
+        by_worker = defaultdict(list)
+        for record in self.get_shift_batch(None, window_start, window_end):
+            by_worker[record.worker_id].append(_interval(record))
+        return {worker_id: self.rules.timeline(intervals) for worker_id, intervals in by_worker.items()}
+    
+    def collection_version(self) -> str:
+        """
+        Version of the tenant's shifts and templates: the latest `updated_at`
+        of each kind. Every write (including deletes, which leave tombstones)
+        bumps it, on any instance, at the cost of two single-entity queries.
+        """
+        parts = []
+        for kind in (KIND_SHIFT, KIND_SHIFT_TEMPLATE):
+            query = self.client.query(kind=kind)
+            query.order = ["-updated_at"]
+            latest = next(iter(query.fetch(limit=1)), None)
+            parts.append(latest["updated_at"].isoformat() if latest is not None else "")
+        return "|".join(parts)
+    
+    def get_grid(self, target_timezone: str, window_start: datetime, window_end: datetime,
+                 version: Optional[str] = None) -> dict:
+        """
+        Hours per worker and local day in the timezone (see app/utils/grid.py).
+        Grids are cached per (window, timezone, collection version), so a
+        cached grid is served until a shift or template changes.
+        """
+        if window_end - window_start > timedelta(days=settings.GRID_MAX_DAYS):
+            raise ShiftValidationError(f"Grid windows are limited to {settings.GRID_MAX_DAYS} days")
+        version = version or self.collection_version()
+        key = (window_start, window_end, target_timezone, version)
+        grid = self.grid_cache.get(key)
+        if grid is None:
+            grid = build_grid(self.get_shift_batch(None, window_start, window_end), window_start, window_end, target_timezone)
+            grid["version"] = version
+            self.grid_cache.put(key, grid)
+        return grid
+    
     def get_shift(self, shift_id: str) -> Optional[dict]:
-        """Get a shift by ID"""
+        """Get a shift by ID, which may be the ID of a template occurrence"""
+        if parse_occurrence_id(shift_id):
+            found = self._get_occurrence(shift_id)
+            if found is None:
+                return None
+            template, recurrence, day = found
+            return self._occurrence_record(template, *occurrence_times(recurrence, day), day).to_dict()
+        
         key = self.client.key(KIND_SHIFT, shift_id)
         entity = self.client.get(key)
         
-        if entity:
+        if entity and not is_deleted(entity):
             return ShiftEntity.to_dict(entity)
         return None
     
-    def get_shifts(self, worker_id: Optional[str] = None) -> List[dict]:
-        """Get all shifts, optionally filtered by worker_id"""
+    def _shift_query(self, worker_id: Optional[str] = None, window_start: Optional[datetime] = None,
+                     window_end: Optional[datetime] = None) -> datastore.Query:
+        """
+        Build the query for shifts ordered by start.
+        A window only narrows the query; results still have to be checked
+        with _in_window, since start is compared as a string. The range
+        holds because shifts are stored with canonical_utc start strings
+        (see normalize_stored_times for shifts stored before that).
+        """
         query = self.client.query(kind=KIND_SHIFT)
         
         if worker_id:
             query.add_filter("worker_id", "=", worker_id)
+        # Shifts last at most MAX_SHIFT_HOURS, so one overlapping the window
+        # must start after window_start minus that
+        if window_start is not None:
+            lower = window_start - timedelta(hours=settings.MAX_SHIFT_HOURS) - MAX_UTC_OFFSET
+            query.add_filter("start", ">=", lower.strftime("%Y-%m-%dT%H:%M:%S"))
+        if window_end is not None:
+            upper = window_end + MAX_UTC_OFFSET
+            query.add_filter("start", "<", upper.strftime("%Y-%m-%dT%H:%M:%S"))
         
         query.order = ["start"]
+        return query
+    
+    @staticmethod
+    def _in_window(entity: datastore.Entity, window_start: Optional[datetime],
+                   window_end: Optional[datetime]) -> bool:
+        """Check whether a live shift overlaps [window_start, window_end)"""
+        if is_deleted(entity):
+            return False
+        if window_start is not None and parse_iso_datetime(entity.get("end")) <= window_start:
+            return False
+        if window_end is not None and parse_iso_datetime(entity.get("start")) >= window_end:
+            return False
+        return True
+    
+    def get_shift_batch(self, worker_id: Optional[str] = None, window_start: Optional[datetime] = None,
+                        window_end: Optional[datetime] = None) -> ShiftBatch:
+        """
+        Get all shifts as a columnar batch, optionally filtered by worker_id
+        and to the shifts overlapping [window_start, window_end), ordered by start.
+        Template occurrences are expanded for the window only; without
+        window_end they are included up to RECURRENCE_HORIZON_DAYS ahead.
+        """
+        window_start, window_end = normalize_window(window_start, window_end)
+        batch = self._get_stored_shifts(worker_id, window_start, window_end)
+        occurrences = self._get_occurrences(worker_id, window_start, window_end)
+        if not occurrences:
+            return batch
+        for record in occurrences:
+            batch.append(record)
+        return batch.sorted_by_start()
+    
+    def get_shifts(self, worker_id: Optional[str] = None, window_start: Optional[datetime] = None,
+                   window_end: Optional[datetime] = None) -> List[dict]:
+        """Same as get_shift_batch, as a list of dicts with UTC times"""
+        return self.get_shift_batch(worker_id, window_start, window_end).to_dicts()
+    
+    def _get_stored_shifts(self, worker_id: Optional[str], window_start: Optional[datetime],
+                           window_end: Optional[datetime]) -> ShiftBatch:
+        """
+        Shifts stored as entities, without template occurrences. Entities are
+        converted as result pages arrive, so only the batch is kept.
+        """
+        query = self._shift_query(worker_id, window_start, window_end)
+        lower = to_epoch_us(window_start) if window_start is not None else None
+        upper = to_epoch_us(window_end) if window_end is not None else None
+        batch = ShiftBatch()
+        for entity in query.fetch():
+            if is_deleted(entity):
+                continue
+            record = ShiftRecord.from_entity(entity)
+            if record.overlaps(lower, upper):
+                batch.append(record)
+        return batch
+    
+    def get_shift_list(self, target_timezone: str, worker_id: Optional[str] = None,
+                       window_start: Optional[datetime] = None,
+                       window_end: Optional[datetime] = None) -> CachedShiftList:
+        """
+        Get shifts for `target_timezone` through the result cache.
+        The entry keeps the shifts as a batch, shared between requests; they
+        are converted to the timezone when a caller builds the response, and
+        its `body` holds the serialized list once a caller sets it.
+        """
+        window = normalize_window(window_start, window_end)
+        key = (worker_id or None, window, target_timezone)
+        cached = self.result_cache.get(key)
+        if cached is not None:
+            return cached
         
-        entities = list(query.fetch())
-        return [ShiftEntity.to_dict(entity) for entity in entities]
+        generation = self.result_cache.generation
+        batch = self.get_shift_batch(worker_id, *window)
+        return self.result_cache.put(key, worker_id or None, window, batch, generation)
+    
+    def iter_shift_pages(self, worker_id: Optional[str] = None, window_start: Optional[datetime] = None,
+                         window_end: Optional[datetime] = None) -> Iterator[List[datastore.Entity]]:
+        """
+        Iterate over shifts one Datastore result page at a time.
+        Used by the binary encoders so large lists are never held in memory
+        as dicts.
+        """
+        window_start, window_end = normalize_window(window_start, window_end)
+        query = self._shift_query(worker_id, window_start, window_end)
+        # Occurrences are merged into the pages they sort into
+        pending = deque(self._occurrence_entity(shift) for shift in self._get_occurrences(
+            worker_id, window_start, window_end
+        ))
+        
+        def start_of(entity: datastore.Entity) -> datetime:
+            return parse_iso_datetime(entity.get("start"))
+        
+        for page in query.fetch().pages:
+            page = [entity for entity in page if self._in_window(entity, window_start, window_end)]
+            if page and pending:
+                last_start = start_of(page[-1])
+                due = []
+                while pending and start_of(pending[0]) <= last_start:
+                    due.append(pending.popleft())
+                page = list(heapq.merge(page, due, key=start_of))
+            yield page
+        if pending:
+            yield list(pending)
+    
+    def get_changes(self, updated_since: datetime, worker_id: Optional[str] = None) -> dict:
+        """
+        Get shifts created, updated or deleted after `updated_since`.
+        Returns live shifts under `items`, deleted shift IDs under `deleted`
+        and the cursor for the next sync under `synced_at`.
+        """
+        updated_since = normalize_since(updated_since)
+        # Capture the cursor before querying so concurrent writes are not skipped
+        synced_at = datetime.now(timezone.utc)
+        
+        query = self.client.query(kind=KIND_SHIFT)
+        if worker_id:
+            query.add_filter("worker_id", "=", worker_id)
+        query.add_filter("updated_at", ">", updated_since)
+        query.order = ["updated_at"]
+        
+        return split_changes(query.fetch(), ShiftEntity.to_dict, synced_at)
     
     def update_shift(self, shift_id: str, worker_id: Optional[str] = None, 
                      start: Optional[str] = None, end: Optional[str] = None) -> Optional[dict]:
-        """Update a shift with validation"""
+        """
+        Update a shift with validation.
+        Updating a template occurrence stores it as a separate shift (returned
+        with its own ID) and records the date as an exception of the template.
+        When worker_id, start and end are all given, validation needs nothing
+        from the stored shift, so it is validated first and then written in
+        one transaction that only checks the shift is still live. The
+        statistics deltas are computed from the shift as that transaction
+        read it and committed with it, so racing writes each count what
+        they replaced.
+        """
+        if parse_occurrence_id(shift_id):
+            return self._materialize_occurrence(shift_id, worker_id, start, end)
+        
         key = self.client.key(KIND_SHIFT, shift_id)
+        
+        if worker_id is not None and start is not None and end is not None:
+            start, end = self._validate_shift(start, end, shift_id)
+            self._check_rules(worker_id, start, end, exclude_shift_id=shift_id)
+            
+            properties = {
+                "worker_id": worker_id,
+                "start": start,
+                "end": end,
+                "updated_at": datetime.utcnow(),
+            }
+            updated = update_live_entity(self.client, key, properties, related=self._record_stats)
+            if updated is None:
+                return None
+            _, entity, deltas = updated
+            self._invalidate(shift_id, worker_id, start, end)
+            self.stats.fold(deltas)
+            return ShiftEntity.to_dict(entity)
+        
         entity = self.client.get(key)
         
-        if not entity:
+        if not entity or is_deleted(entity):
             return None
         
         # Get current values
@@ -131,32 +457,389 @@ class ShiftService:
         current_end = end if end is not None else entity.get("end")
         
         # Validate shift
-        self._validate_shift(current_start, current_end, shift_id)
-        
-        # Check for overlaps (excluding current shift)
-        self._check_overlaps(current_worker_id, current_start, current_end, exclude_shift_id=shift_id)
+        current_start, current_end = self._validate_shift(current_start, current_end, shift_id)
         
-        # Update entity
-        if worker_id is not None:
-            entity["worker_id"] = worker_id
-        if start is not None:
-            entity["start"] = start
-        if end is not None:
-            entity["end"] = end
+        # Check overlaps and the other labor rules (excluding current shift)
+        self._check_rules(current_worker_id, current_start, current_end, exclude_shift_id=shift_id)
         
-        entity["updated_at"] = datetime.utcnow()
-        
-        self.client.put(entity)
+        # Update entity with the values checked, unless it was deleted meanwhile
+        properties = {
+            "worker_id": current_worker_id,
+            "start": current_start,
+            "end": current_end,
+            "updated_at": datetime.utcnow(),
+        }
+        updated = update_live_entity(self.client, key, properties, related=self._record_stats)
+        if updated is None:
+            return None
+        _, entity, deltas = updated
+        self._invalidate(shift_id, current_worker_id, current_start, current_end)
+        self.stats.fold(deltas)
         return ShiftEntity.to_dict(entity)
     
     def delete_shift(self, shift_id: str) -> bool:
-        """Delete a shift"""
+        """
+        Delete a shift, leaving a tombstone for delta sync. The stored shift
+        is read and written in one transaction; deleting an already deleted
+        shift returns False, and the statistics counters are updated from
+        the shift that transaction deleted. Deleting a template occurrence
+        records it as an exception of the template.
+        """
+        if parse_occurrence_id(shift_id):
+            return self._skip_occurrence(shift_id)
+        
         key = self.client.key(KIND_SHIFT, shift_id)
-        entity = self.client.get(key)
+        deleted = update_live_entity(self.client, key, tombstone_properties(settings.TOMBSTONE_TTL_DAYS),
+                                     related=self._record_stats)
+        if deleted is None:
+            return False
+        self.result_cache.invalidate(shift_id)
+        self.stats.fold(deleted[2])
+        return True
+    
+    def _record_stats(self, previous: Optional[datastore.Entity],
+                      entity: datastore.Entity) -> List[datastore.Entity]:
+        """Statistics deltas for replacing `previous` with `entity`, to commit with the write"""
+        return self.stats.record(shift_deltas(previous, entity))
+    
+    def _commit_with_stats(self, entities: List[datastore.Entity],
+                           deltas: CounterDeltas) -> List[datastore.Entity]:
+        """Write entities and the statistics deltas recording `deltas` in one commit"""
+        recorded = self.stats.record(deltas)
+        put_atomically(self.client, [*entities, *recorded])
+        return recorded
+    
+    def _invalidate(self, shift_id: str, worker_id: str, start: str, end: str) -> None:
+        """Drop cached lists affected by writing a shift with these values"""
+        self.result_cache.invalidate(shift_id, worker_id, parse_iso_datetime(start), parse_iso_datetime(end))
+    
+    def delete_worker_shifts(self, worker_id: str, batch_size: int = 500) -> Iterator[int]:
+        """
+        Delete all of a worker's shifts and templates, leaving tombstones.
+        Writes one put_multi per batch and yields the number deleted so far
+        after each, so a job can report progress and stop between batches.
+        """
+        deleted = 0
+        for kind in (KIND_SHIFT, KIND_SHIFT_TEMPLATE):
+            query = self.client.query(kind=kind)
+            query.add_filter("worker_id", "=", worker_id)
+            batch = []
+            for entity in query.fetch():
+                if is_deleted(entity):
+                    continue
+                entity.update(tombstone_properties(settings.TOMBSTONE_TTL_DAYS))
+                batch.append(entity)
+                if len(batch) >= batch_size:
+                    self._delete_batch(kind, worker_id, batch)
+                    deleted += len(batch)
+                    batch = []
+                    yield deleted
+            if batch:
+                self._delete_batch(kind, worker_id, batch)
+                deleted += len(batch)
+                yield deleted
+    
+    def _delete_batch(self, kind: str, worker_id: str, tombstones: List[datastore.Entity]) -> None:
+        """Write a batch of a worker's tombstones and update what depends on them"""
+        recorded = []
+        for i in range(0, len(tombstones), SHIFTS_PER_COMMIT):
+            batch = tombstones[i:i + SHIFTS_PER_COMMIT]
+            deltas = new_deltas()
+            if kind == KIND_SHIFT:
+                for entity in batch:
+                    count_shift(deltas, entity, -1)
+            recorded.extend(self._commit_with_stats(batch, deltas))
+        self.result_cache.invalidate_worker(worker_id)
+        self.stats.fold(recorded)
+    
+    def normalize_stored_times(self, batch_size: int = 500) -> Iterator[int]:
+        """
+        Rewrite start and end of shifts stored before writes normalized them
+        (e.g. "2024-01-01 09:00:00+02:00") in canonical UTC form, so range
+        queries on start find them. Each batch is re-read and written in one
+        transaction. Yields the number of shifts rewritten so far after each batch.
+        """
+        def stale(entity: datastore.Entity) -> bool:
+            try:
+                return any(entity.get(name) and entity[name] != canonical_utc(entity[name]) for name in ("start", "end"))
+            except ValueError:
+                # Not a datetime at all; nothing to normalize
+                return False
+        
+        rewritten = 0
+        keys = []
+        for entity in self.client.query(kind=KIND_SHIFT).fetch():
+            if not is_deleted(entity) and stale(entity):
+                keys.append(entity.key)
+            if len(keys) >= batch_size:
+                rewritten += self._normalize_batch(keys, stale)
+                keys = []
+                yield rewritten
+        if keys:
+            rewritten += self._normalize_batch(keys, stale)
+            yield rewritten
+    
+    def _normalize_batch(self, keys: List[datastore.Key], stale) -> int:
+        with self.client.transaction():
+            entities = [entity for entity in self.client.get_multi(keys) if not is_deleted(entity) and stale(entity)]
+            for entity in entities:
+                entity["start"] = canonical_utc(entity["start"])
+                entity["end"] = canonical_utc(entity["end"])
+            self.client.put_multi(entities)
+        # Cached lists hold the old strings
+        self.result_cache.clear()
+        return len(entities)
+    
+    def purge_tombstones(self) -> int:
+        """Remove expired shift tombstones"""
+        return purge_expired_tombstones(self.client, KIND_SHIFT)
+    
+    # Recurring shift templates
+    
+    def _templates(self, worker_id: Optional[str] = None) -> List[datastore.Entity]:
+        """Live templates, optionally only a worker's"""
+        query = self.client.query(kind=KIND_SHIFT_TEMPLATE)
+        if worker_id:
+            query.add_filter("worker_id", "=", worker_id)
+        return [entity for entity in query.fetch() if not is_deleted(entity)]
+    
+    @staticmethod
+    def _recurrence(template: datastore.Entity) -> Recurrence:
+        return build_recurrence(template["start"], template["end"], template["rrule"], template["timezone"])
+    
+    @staticmethod
+    def _exdates(template: datastore.Entity) -> set:
+        return {date.fromisoformat(day) for day in template.get("exdates") or []}
+    
+    @staticmethod
+    def _occurrence_record(template: datastore.Entity, start: datetime, end: datetime, day: date) -> ShiftRecord:
+        """Shift record for one occurrence of a template"""
+        created_at, updated_at = template.get("created_at"), template.get("updated_at")
+        return ShiftRecord(
+            occurrence_id(template.key.id_or_name, day),
+            template.get("worker_id", ""),
+            to_epoch_us(start),
+            to_epoch_us(end),
+            template.key.id_or_name,
+            to_epoch_us(created_at) if created_at is not None else MISSING,
+            to_epoch_us(updated_at) if updated_at is not None else MISSING,
+        )
+    
+    def _occurrence_entity(self, record: ShiftRecord) -> datastore.Entity:
+        """Unsaved shift entity for an occurrence, for the binary encoders"""
+        shift = record.to_dict()
+        entity = datastore.Entity(key=self.client.key(KIND_SHIFT, shift["id"]))
+        entity.update({name: value for name, value in shift.items() if name not in ("id", "duration")})
+        return entity
+    
+    def _get_occurrences(self, worker_id: Optional[str], window_start: Optional[datetime],
+                         window_end: Optional[datetime]) -> List[ShiftRecord]:
+        """Occurrences of templates overlapping the window, ordered by start"""
+        if window_end is None:
+            window_end = datetime.now(timezone.utc) + timedelta(days=settings.RECURRENCE_HORIZON_DAYS)
+            if window_start is not None and window_start >= window_end:
+                return []
+        
+        expanded = [
+            [(start, end, day, template) for start, end, day in expand(
+                self._recurrence(template), window_start, window_end, self._exdates(template)
+            )]
+            for template in self._templates(worker_id)
+        ]
+        return [
+            self._occurrence_record(template, start, end, day)
+            for start, end, day, template in merge_sorted(expanded)
+        ]
+    
+    def _get_occurrence(self, shift_id: str) -> Optional[Tuple[datastore.Entity, Recurrence, date]]:
+        """Template, recurrence and date of an occurrence ID, None if there is no such occurrence"""
+        template_id, day = parse_occurrence_id(shift_id)
+        template = self.client.get(self.client.key(KIND_SHIFT_TEMPLATE, template_id))
+        if template is None or is_deleted(template) or day in self._exdates(template):
+            return None
+        recurrence = self._recurrence(template)
+        if next(occurrence_dates(recurrence, day, day), None) != day:
+            return None
+        return template, recurrence, day
+    
+    def _add_exdate(self, template_key: datastore.Key, day: date, *entities: datastore.Entity) -> bool:
+        """
+        Record an occurrence date as an exception of a template, writing
+        `entities` in the same transaction. Returns False if the template is
+        gone or the occurrence already is an exception.
+        """
+        with self.client.transaction():
+            template = self.client.get(template_key)
+            exdates = set(template.get("exdates") or []) if template is not None else set()
+            if template is None or is_deleted(template) or day.isoformat() in exdates:
+                return False
+            template["exdates"] = sorted(exdates | {day.isoformat()})
+            template["updated_at"] = datetime.utcnow()
+            self.client.put_multi([template, *entities])
+        return True
+    
+    def _materialize_occurrence(self, shift_id: str, worker_id: Optional[str] = None,
+                                start: Optional[str] = None, end: Optional[str] = None) -> Optional[dict]:
+        """Store an edited occurrence as a shift of its own"""
+        found = self._get_occurrence(shift_id)
+        if found is None:
+            return None
+        template, recurrence, day = found
+        occurrence_start, occurrence_end = occurrence_times(recurrence, day)
         
-        if not entity:
+        worker_id = worker_id if worker_id is not None else template["worker_id"]
+        start = start if start is not None else format_utc(occurrence_start)
+        end = end if end is not None else format_utc(occurrence_end)
+        start, end = self._validate_shift(start, end)
+        self._check_rules(worker_id, start, end, exclude_shift_id=shift_id)
+        
+        new_id = str(uuid.uuid4())
+        entity = ShiftEntity.from_dict({
+            "id": new_id,
+            "worker_id": worker_id,
+            "start": start,
+            "end": end,
+        }, self.client.key(KIND_SHIFT, new_id))
+        entity.update({"template_id": template.key.id_or_name, "occurrence_date": day.isoformat()})
+        
+        deltas = self._record_stats(None, entity)
+        if not self._add_exdate(template.key, day, entity, *deltas):
+            return None
+        self._invalidate(shift_id, worker_id, start, end)
+        self.stats.fold(deltas)
+        return ShiftEntity.to_dict(entity)
+    
+    def _skip_occurrence(self, shift_id: str) -> bool:
+        """Delete a single occurrence of a template"""
+        found = self._get_occurrence(shift_id)
+        if found is None:
             return False
+        template, _, day = found
+        if not self._add_exdate(template.key, day):
+            return False
+        self.result_cache.invalidate(shift_id)
+        return True
+    
+    def _build_recurrence(self, start: str, end: str, rrule: str, tz: str) -> Recurrence:
+        """Parse and validate a template's recurrence"""
+        try:
+            recurrence = build_recurrence(start, end, rrule, tz)
+        except RecurrenceError as e:
+            raise ShiftValidationError(str(e))
+        self._apply_rules(Interval(datetime.fromisoformat(start), datetime.fromisoformat(end)))
+        return recurrence
+    
+    def _check_template_rules(self, worker_id: str, recurrence: Recurrence, exdates=(),
+                              template_id: Optional[str] = None) -> None:
+        """
+        Check a template's occurrences against the labor rules, up to UNTIL or
+        RECURRENCE_CHECK_DAYS ahead. The worker's shifts and other templates'
+        occurrences in that range are loaded once; each occurrence then finds
+        its neighbours in the timeline by bisection.
+        """
+        window_start = occurrence_times(recurrence, recurrence.start_date)[0]
+        window_end = max(window_start, datetime.now(timezone.utc)) + timedelta(days=settings.RECURRENCE_CHECK_DAYS)
+        if recurrence.until is not None:
+            window_end = min(window_end, occurrence_times(recurrence, recurrence.until)[1])
+        
+        occurrences = [
+            Interval(start, end, occurrence_id(template_id or "", day))
+            for start, end, day in expand(recurrence, window_start, window_end, exdates)
+        ]
+        if not occurrences:
+            return
+        first = occurrences[0].start - self.rules.reach
+        last = occurrences[-1].end + self.rules.reach
         
-        self.client.delete(key)
+        neighbours = [_interval(record) for record in self._get_stored_shifts(worker_id, first, last)]
+        for template in self._templates(worker_id):
+            if template.key.id_or_name == template_id:
+                continue
+            neighbours.extend(
+                Interval(start, end, occurrence_id(template.key.id_or_name, day))
+                for start, end, day in expand(self._recurrence(template), first, last, self._exdates(template))
+            )
+        
+        timeline = self.rules.timeline(neighbours + occurrences)
+        for occurrence in occurrences:
+            self._apply_rules(occurrence, timeline)
+    
+    def get_templates(self, worker_id: Optional[str] = None) -> List[dict]:
+        """Get all recurring shift templates, optionally filtered by worker_id"""
+        return [ShiftTemplateEntity.to_dict(template) for template in self._templates(worker_id)]
+    
+    def get_template(self, template_id: str) -> Optional[dict]:
+        """Get a recurring shift template by ID"""
+        template = self.client.get(self.client.key(KIND_SHIFT_TEMPLATE, template_id))
+        if template and not is_deleted(template):
+            return ShiftTemplateEntity.to_dict(template)
+        return None
+    
+    def create_template(self, worker_id: str, start: str, end: str, rrule: str,
+                        tz: Optional[str] = None) -> dict:
+        """
+        Create a recurring shift template with validation.
+        `start` and `end` are the local times of the first occurrence in `tz`,
+        which defaults to the configured timezone.
+        """
+        tz = tz or self.timezone_service.get_timezone()
+        recurrence = self._build_recurrence(start, end, rrule, tz)
+        self._check_template_rules(worker_id, recurrence)
+        
+        template_id = str(uuid.uuid4())
+        entity = ShiftTemplateEntity.from_dict({
+            "id": template_id,
+            "worker_id": worker_id,
+            "start": datetime.fromisoformat(start).isoformat(),
+            "end": datetime.fromisoformat(end).isoformat(),
+            "rrule": recurrence.to_rrule(),
+            "timezone": tz,
+        }, self.client.key(KIND_SHIFT_TEMPLATE, template_id))
+        
+        self.client.put(entity)
+        self.result_cache.invalidate_worker(worker_id)
+        return ShiftTemplateEntity.to_dict(entity)
+    
+    def update_template(self, template_id: str, worker_id: Optional[str] = None, start: Optional[str] = None,
+                        end: Optional[str] = None, rrule: Optional[str] = None,
+                        tz: Optional[str] = None) -> Optional[dict]:
+        """
+        Update a recurring shift template with validation.
+        Exceptions already recorded for it are kept.
+        """
+        key = self.client.key(KIND_SHIFT_TEMPLATE, template_id)
+        template = self.client.get(key)
+        if not template or is_deleted(template):
+            return None
+        
+        previous_worker_id = template["worker_id"]
+        data = ShiftTemplateEntity.to_dict(template)
+        for name, value in (("worker_id", worker_id), ("start", start), ("end", end), ("rrule", rrule), ("timezone", tz)):
+            if value is not None:
+                data[name] = value
+        
+        recurrence = self._build_recurrence(data["start"], data["end"], data["rrule"], data["timezone"])
+        self._check_template_rules(data["worker_id"], recurrence, self._exdates(template), template_id)
+        
+        data.update({
+            "start": datetime.fromisoformat(data["start"]).isoformat(),
+            "end": datetime.fromisoformat(data["end"]).isoformat(),
+            "rrule": recurrence.to_rrule(),
+        })
+        entity = ShiftTemplateEntity.from_dict(data, key)
+        self.client.put(entity)
+        self.result_cache.invalidate_worker(previous_worker_id)
+        self.result_cache.invalidate_worker(data["worker_id"])
+        return ShiftTemplateEntity.to_dict(entity)
+    
+    def delete_template(self, template_id: str) -> bool:
+        """
+        Delete a recurring shift template, unless it is already deleted.
+        Occurrences that were edited into shifts of their own are kept.
+        """
+        key = self.client.key(KIND_SHIFT_TEMPLATE, template_id)
+        deleted = update_live_entity(self.client, key, tombstone_properties(settings.TOMBSTONE_TTL_DAYS))
+        if deleted is None:
+            return False
+        self.result_cache.invalidate_worker(deleted[0]["worker_id"])
         return True
-
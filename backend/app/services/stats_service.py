@@ -0,0 +1,281 @@
+"""
+Sharded counters for shift and worker statistics
+
+Totals are kept per tenant, per worker and per UTC day (of the shift start)
+in `StatsShard` entities, so GET /api/stats reads a few dozen keys instead of
+counting shifts. Each counter is split over STATS_COUNTER_SHARDS entities
+named `<scope>#<n>`. Folding changes in adds them to one randomly picked
+shard of every counter they touch, in one transaction; on a conflict it
+retries on freshly picked shards after a jittered backoff. Concurrent
+writers therefore rarely meet on the same entity, however hot the tenant
+counter is.
+
+A shift or worker write does not touch the shards itself. It records its
+changes as a `StatsDelta` entity in the same commit as the write, computed
+from the entity as that write's transaction read it, so the write and its
+counter changes are stored together or not at all. The delta is then
+folded into the shards, and deleted in the same transaction. Reads sum the
+shards of a counter and any deltas still pending, in one read-only
+transaction, so a delta whose fold failed (or was interrupted by a crash)
+is still counted, exactly once. The reconcile_stats job folds whatever is
+pending and corrects any remaining drift from a recount.
+
+Stored shifts are counted, including edited template occurrences; the
+occurrences templates expand to on read are not.
+"""
+
+import json
+import logging
+import random
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import date, datetime, timezone
+from typing import Callable, DefaultDict, Iterable, List, Mapping, Optional
+
+from google.api_core import exceptions
+from google.cloud import datastore
+
+from app.core.config import settings
+from app.core.datastore import get_datastore_client, KIND_SHIFT, KIND_STATS_DELTA, KIND_STATS_SHARD, KIND_WORKER
+from app.models.entities import is_deleted
+from app.utils.timezone import parse_iso_datetime
+
+logger = logging.getLogger(__name__)
+
+TENANT_SCOPE = "tenant"
+FIELDS = ("shifts", "seconds", "workers")
+
+# Counters written per transaction, within the 500 mutations of a commit;
+# also the most counters one delta records, so it folds in one commit
+MAX_COUNTERS_PER_COMMIT = 250
+RETRY_BASE_SECONDS = 0.01
+
+# Scope -> field -> change
+CounterDeltas = DefaultDict[str, Counter]
+
+
+def worker_scope(worker_id: str) -> str:
+    return f"worker:{worker_id}"
+
+
+def day_scope(day: date) -> str:
+    return f"day:{day.isoformat()}"
+
+
+def new_deltas() -> CounterDeltas:
+    return defaultdict(Counter)
+
+
+def count_shift(deltas: CounterDeltas, shift: Mapping, sign: int = 1) -> None:
+    """Add (sign 1) or remove (sign -1) a shift's contribution to its counters"""
+    start = parse_iso_datetime(shift["start"])
+    seconds = int((parse_iso_datetime(shift["end"]) - start).total_seconds())
+    for scope in (TENANT_SCOPE, worker_scope(shift["worker_id"]), day_scope(start.astimezone(timezone.utc).date())):
+        deltas[scope]["shifts"] += sign
+        deltas[scope]["seconds"] += sign * seconds
+
+
+def shift_deltas(old: Optional[Mapping], new: Optional[Mapping]) -> CounterDeltas:
+    """Counter changes for replacing shift `old` with `new`; None and tombstones stand for no shift"""
+    deltas = new_deltas()
+    if old is not None and not is_deleted(old):
+        count_shift(deltas, old, -1)
+    if new is not None and not is_deleted(new):
+        count_shift(deltas, new, 1)
+    return deltas
+
+
+def _scope_of(key: datastore.Key) -> str:
+    return key.id_or_name.rsplit("#", 1)[0]
+
+
+class StatsService:
+    """Sharded statistics counters of one tenant namespace"""
+
+    def __init__(self, namespace: Optional[str] = None):
+        self.client = get_datastore_client(namespace)
+        self.shards = settings.STATS_COUNTER_SHARDS
+
+    def _key(self, scope: str, shard: int) -> datastore.Key:
+        return self.client.key(KIND_STATS_SHARD, f"{scope}#{shard}")
+
+    def record(self, deltas: Mapping[str, Mapping[str, int]]) -> List[datastore.Entity]:
+        """
+        Delta entities recording counter changes, to be written in the same
+        commit as the write they describe and folded in after it
+        """
+        changes = {scope: {f: v for f, v in fields.items() if v} for scope, fields in deltas.items()}
+        scopes = [scope for scope, fields in changes.items() if fields]
+        entities = []
+        for i in range(0, len(scopes), MAX_COUNTERS_PER_COMMIT):
+            entity = datastore.Entity(
+                key=self.client.key(KIND_STATS_DELTA, str(uuid.uuid4())),
+                exclude_from_indexes=("changes",),
+            )
+            entity.update({
+                "changes": json.dumps({scope: changes[scope] for scope in scopes[i:i + MAX_COUNTERS_PER_COMMIT]}),
+                "created_at": datetime.utcnow(),
+            })
+            entities.append(entity)
+        return entities
+
+    def fold(self, deltas: Iterable[datastore.Entity]) -> bool:
+        """
+        Add recorded changes to the counter shards, deleting each delta in
+        the same transaction. Never raises: the write they describe is
+        already committed, and a delta that could not be folded stays
+        pending, counted by reads until a later fold.
+        Returns False if any delta is still pending.
+        """
+        folded = True
+        for delta in deltas:
+            try:
+                folded = self._increment(json.loads(delta["changes"]), delta.key) and folded
+            except Exception:
+                logger.exception("Could not fold statistics delta %s", delta.key.id_or_name)
+                folded = False
+        return folded
+
+    def fold_pending(self) -> int:
+        """Fold every pending delta, returning how many could not be folded"""
+        return sum(not self.fold([delta]) for delta in self.client.query(kind=KIND_STATS_DELTA).fetch())
+
+    def apply(self, deltas: Mapping[str, Mapping[str, int]]) -> bool:
+        """
+        Add counter changes directly, for corrections that no write has
+        recorded. Never raises; failures are logged and left for the next
+        reconciliation. Returns False if any change was dropped.
+        """
+        changes = {scope: {f: v for f, v in fields.items() if v} for scope, fields in deltas.items()}
+        scopes = [scope for scope, fields in changes.items() if fields]
+        applied = True
+        for i in range(0, len(scopes), MAX_COUNTERS_PER_COMMIT):
+            chunk = {scope: changes[scope] for scope in scopes[i:i + MAX_COUNTERS_PER_COMMIT]}
+            try:
+                applied = self._increment(chunk) and applied
+            except Exception:
+                logger.exception("Could not update %d statistics counters", len(chunk))
+                applied = False
+        return applied
+
+    def _increment(self, changes: Mapping[str, Mapping[str, int]], delta: Optional[datastore.Key] = None) -> bool:
+        """
+        Add changes to one random shard per counter, retrying conflicts on
+        other shards. With `delta`, the changes are those of that delta,
+        which is deleted in the same transaction; if it is already gone it
+        was folded by someone else and nothing is added.
+        """
+        for attempt in range(settings.STATS_COUNTER_RETRIES + 1):
+            keys = {scope: self._key(scope, random.randrange(self.shards)) for scope in changes}
+            try:
+                with self.client.transaction(begin_later=True):
+                    lookup = list(keys.values()) + ([delta] if delta is not None else [])
+                    stored = {entity.key: entity for entity in self.client.get_multi(lookup)}
+                    if delta is not None and delta not in stored:
+                        return True
+                    shards = []
+                    for scope, key in keys.items():
+                        shard = stored.get(key)
+                        if shard is None:
+                            shard = datastore.Entity(key=key, exclude_from_indexes=FIELDS)
+                        for field, change in changes[scope].items():
+                            shard[field] = shard.get(field, 0) + change
+                        shards.append(shard)
+                    self.client.put_multi(shards)
+                    if delta is not None:
+                        self.client.delete(delta)
+                return True
+            except exceptions.Conflict:
+                time.sleep(random.uniform(0, RETRY_BASE_SECONDS * 2 ** attempt))
+        logger.warning("Statistics counters still contended after %d attempts", settings.STATS_COUNTER_RETRIES + 1)
+        return False
+
+    def _pending_deltas(self) -> CounterDeltas:
+        """Changes of the deltas not folded yet"""
+        totals = new_deltas()
+        for delta in self.client.query(kind=KIND_STATS_DELTA).fetch():
+            for scope, fields in json.loads(delta["changes"]).items():
+                totals[scope].update(fields)
+        return totals
+
+    def _sum(self, scopes: Iterable[str]) -> CounterDeltas:
+        """Totals of counters, summed over their shards"""
+        keys = [self._key(scope, shard) for scope in scopes for shard in range(self.shards)]
+        totals = new_deltas()
+        # Lookups are limited to 1000 keys per request
+        for i in range(0, len(keys), 1000):
+            for entity in self.client.get_multi(keys[i:i + 1000]):
+                totals[_scope_of(entity.key)].update({field: entity.get(field, 0) for field in FIELDS})
+        return totals
+
+    def get_stats(self, worker_id: Optional[str] = None, days: List[date] = ()) -> dict:
+        """Tenant totals, plus a worker's totals and totals per UTC day when asked for"""
+        scopes = [TENANT_SCOPE] + ([worker_scope(worker_id)] if worker_id else []) + [day_scope(day) for day in days]
+        # One snapshot, so a delta folded meanwhile is counted exactly once
+        with self.client.transaction(read_only=True, begin_later=True):
+            totals = self._sum(scopes)
+            for scope, fields in self._pending_deltas().items():
+                totals[scope].update(fields)
+        tenant = totals[TENANT_SCOPE]
+        stats = {
+            "shifts": tenant["shifts"],
+            "hours": round(tenant["seconds"] / 3600.0, 2),
+            "workers": tenant["workers"],
+            "worker": None,
+            "days": [],
+        }
+        if worker_id:
+            worker = totals[worker_scope(worker_id)]
+            stats["worker"] = {
+                "worker_id": worker_id,
+                "shifts": worker["shifts"],
+                "hours": round(worker["seconds"] / 3600.0, 2),
+            }
+        for day in days:
+            counter = totals[day_scope(day)]
+            stats["days"].append({
+                "date": day.isoformat(),
+                "shifts": counter["shifts"],
+                "hours": round(counter["seconds"] / 3600.0, 2),
+            })
+        return stats
+
+    def reconcile(self, progress: Optional[Callable[[int], None]] = None) -> dict:
+        """
+        Fold pending deltas, then recount every counter from the stored
+        shifts and workers and apply the differences. Writes racing with the
+        recount can still leave a small drift, which the next run corrects.
+        `progress` is called with the number of shifts scanned so far.
+        """
+        pending = self.fold_pending()
+        expected = new_deltas()
+        scanned = 0
+        for entity in self.client.query(kind=KIND_SHIFT).fetch():
+            if not is_deleted(entity) and entity.get("start") and entity.get("end"):
+                count_shift(expected, entity)
+            scanned += 1
+            if progress is not None and scanned % 1000 == 0:
+                progress(scanned)
+        for entity in self.client.query(kind=KIND_WORKER).fetch():
+            if not is_deleted(entity):
+                expected[TENANT_SCOPE]["workers"] += 1
+
+        stored = self._pending_deltas() if pending else new_deltas()
+        for entity in self.client.query(kind=KIND_STATS_SHARD).fetch():
+            stored[_scope_of(entity.key)].update({field: entity.get(field, 0) for field in FIELDS})
+
+        corrections = new_deltas()
+        for scope in set(expected) | set(stored):
+            for field in FIELDS:
+                difference = expected[scope][field] - stored[scope][field]
+                if difference:
+                    corrections[scope][field] = difference
+        applied = self.apply(corrections)
+        return {
+            "shifts_scanned": scanned,
+            "counters": len(set(expected) | set(stored)),
+            "corrected": len(corrections),
+            "applied": applied,
+            "pending": pending,
+        }
@@ -3,30 +3,41 @@ Timezone service for managing timezone settings
 """
 
 from google.cloud import datastore
+from app.core.config import settings
 from app.core.datastore import get_datastore_client, KIND_TIMEZONE
 from app.models.entities import TimezoneEntity
 from typing import Optional
+import time
 
 
 class TimezoneService:
-    """Service for managing timezone settings"""
+    """Service for managing timezone settings of one tenant namespace"""
     
-    def __init__(self):
-        self.client = get_datastore_client()
+    def __init__(self, namespace: Optional[str] = None):
+        self.client = get_datastore_client(namespace)
         self.default_key = self.client.key(KIND_TIMEZONE, "default")
+        # Cached (timezone, expires_at); every shift read needs the timezone
+        self._cached: Optional[tuple] = None
     
     def get_timezone(self) -> Optional[str]:
         """
         Get the current timezone setting.
         Returns UTC as default if not set.
+        Cached for TIMEZONE_CACHE_TTL_SECONDS.
         """
+        cached = self._cached
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
         try:
             entity = self.client.get(self.default_key)
             if entity:
-                return TimezoneEntity.to_dict(entity).get("timezone", "UTC")
-            return "UTC"
+                timezone = TimezoneEntity.to_dict(entity).get("timezone", "UTC")
+            else:
+                timezone = "UTC"
         except Exception:
             return "UTC"
+        self._cached = (timezone, time.monotonic() + settings.TIMEZONE_CACHE_TTL_SECONDS)
+        return timezone
     
     def set_timezone(self, timezone: str) -> str:
         """
@@ -35,5 +46,6 @@ class TimezoneService:
         """
         entity = TimezoneEntity.from_dict({"timezone": timezone}, self.default_key)
         self.client.put(entity)
+        self._cached = (timezone, time.monotonic() + settings.TIMEZONE_CACHE_TTL_SECONDS)
         return timezone
 
@@ -3,18 +3,30 @@ Worker service for CRUD operations
 """
 
 from google.cloud import datastore
-from app.core.datastore import get_datastore_client, KIND_WORKER
-from app.models.entities import WorkerEntity
-from typing import List, Optional
-from datetime import datetime
+from app.core.config import settings
+from app.core.datastore import get_datastore_client, put_atomically, KIND_WORKER
+from app.models.entities import WorkerEntity, is_deleted, tombstone_properties, update_live_entity
+from app.services.stats_service import TENANT_SCOPE, StatsService
+from app.utils.sync import SyncWindowExpiredError, normalize_since, split_changes, purge_expired_tombstones
+from app.utils.trie import NameTrie, normalize_name
+from typing import Dict, Iterable, Iterator, List, Optional
+from datetime import datetime, timezone
+import threading
+import time
 import uuid
 
 
 class WorkerService:
-    """Service for managing workers"""
+    """Service for managing workers of one tenant namespace"""
     
-    def __init__(self):
-        self.client = get_datastore_client()
+    def __init__(self, namespace: Optional[str] = None):
+        self.client = get_datastore_client(namespace)
+        self.stats = StatsService(namespace)
+        # Name search index, loaded on first search
+        self._name_index: Optional[NameTrie] = None
+        self._index_synced_at: Optional[datetime] = None
+        self._index_checked_at = 0.0
+        self._index_lock = threading.Lock()
     
     def create_worker(self, name: str) -> dict:
         """Create a new worker"""
@@ -26,50 +38,190 @@ class WorkerService:
             "name": name,
         }, key)
         
-        self.client.put(entity)
-        return WorkerEntity.to_dict(entity)
+        deltas = self.stats.record({TENANT_SCOPE: {"workers": 1}})
+        put_atomically(self.client, [entity, *deltas])
+        worker = WorkerEntity.to_dict(entity)
+        self._index_upsert(worker)
+        self.stats.fold(deltas)
+        return worker
     
     def get_worker(self, worker_id: str) -> Optional[dict]:
         """Get a worker by ID"""
         key = self.client.key(KIND_WORKER, worker_id)
         entity = self.client.get(key)
         
-        if entity:
+        if entity and not is_deleted(entity):
             return WorkerEntity.to_dict(entity)
         return None
     
+    def get_workers_by_ids(self, worker_ids: Iterable[str]) -> Dict[str, dict]:
+        """Get several workers in one lookup, keyed by ID. Missing workers are omitted."""
+        keys = [self.client.key(KIND_WORKER, worker_id) for worker_id in set(worker_ids)]
+        workers = {}
+        # Lookups are limited to 1000 keys per request
+        for i in range(0, len(keys), 1000):
+            for entity in self.client.get_multi(keys[i:i + 1000]):
+                if not is_deleted(entity):
+                    workers[entity.key.id_or_name] = WorkerEntity.to_dict(entity)
+        return workers
+    
     def get_all_workers(self) -> List[dict]:
         """Get all workers"""
         query = self.client.query(kind=KIND_WORKER)
         query.order = ["name"]
         
         entities = list(query.fetch())
-        return [WorkerEntity.to_dict(entity) for entity in entities]
+        return [WorkerEntity.to_dict(entity) for entity in entities if not is_deleted(entity)]
+    
+    def search_workers(self, prefix: str, limit: int) -> List[dict]:
+        """Get up to `limit` workers whose name starts with `prefix`, ignoring case, ordered by name"""
+        if settings.WORKER_SEARCH_INDEX:
+            return self._search_index().search(prefix, limit)
+        
+        prefix = normalize_name(prefix)
+        query = self.client.query(kind=KIND_WORKER)
+        query.add_filter("name_lower", ">=", prefix)
+        # U+10FFFF sorts after every character that can follow the prefix
+        query.add_filter("name_lower", "<", prefix + "\U0010ffff")
+        query.order = ["name_lower"]
+        
+        workers = []
+        for entity in query.fetch():
+            if is_deleted(entity):
+                continue
+            workers.append(WorkerEntity.to_dict(entity))
+            if len(workers) >= limit:
+                break
+        return workers
+    
+    def warm_search_index(self) -> None:
+        """Load the name search index ahead of the first search"""
+        if settings.WORKER_SEARCH_INDEX:
+            self._search_index()
+    
+    def _search_index(self) -> NameTrie:
+        """
+        Return the name search index, loading it on first use.
+        Writes made through this service update it directly; writes from
+        other instances are applied from delta sync once per refresh interval.
+        """
+        with self._index_lock:
+            now = time.monotonic()
+            if self._name_index is None:
+                self._load_index()
+            elif now - self._index_checked_at >= settings.WORKER_INDEX_REFRESH_SECONDS:
+                try:
+                    changes = self.get_changes(self._index_synced_at)
+                except SyncWindowExpiredError:
+                    self._load_index()
+                else:
+                    for worker in changes["items"]:
+                        self._name_index.upsert(worker["id"], worker["name"], worker)
+                    for worker_id in changes["deleted"]:
+                        self._name_index.remove(worker_id)
+                    self._index_synced_at = changes["synced_at"]
+                    self._index_checked_at = now
+            return self._name_index
+    
+    def _load_index(self) -> None:
+        """Build the name search index from all workers"""
+        synced_at = datetime.now(timezone.utc)
+        index = NameTrie()
+        for worker in self.get_all_workers():
+            index.upsert(worker["id"], worker["name"], worker)
+        self._name_index = index
+        self._index_synced_at = synced_at
+        self._index_checked_at = time.monotonic()
+    
+    def _index_upsert(self, worker: dict) -> None:
+        index = self._name_index
+        if index is not None:
+            index.upsert(worker["id"], worker["name"], worker)
+    
+    def get_changes(self, updated_since: datetime) -> dict:
+        """
+        Get workers created, updated or deleted after `updated_since`.
+        Returns live workers under `items`, deleted worker IDs under `deleted`
+        and the cursor for the next sync under `synced_at`.
+        """
+        updated_since = normalize_since(updated_since)
+        # Capture the cursor before querying so concurrent writes are not skipped
+        synced_at = datetime.now(timezone.utc)
+        
+        query = self.client.query(kind=KIND_WORKER)
+        query.add_filter("updated_at", ">", updated_since)
+        query.order = ["updated_at"]
+        
+        return split_changes(query.fetch(), WorkerEntity.to_dict, synced_at)
     
     def update_worker(self, worker_id: str, name: str) -> Optional[dict]:
-        """Update a worker"""
+        """
+        Rename a worker.
+        The stored worker is read and written in one transaction, so a
+        deleted worker is not updated.
+        """
         key = self.client.key(KIND_WORKER, worker_id)
-        entity = self.client.get(key)
-        
-        if not entity:
+        properties = {"name": name, "name_lower": normalize_name(name), "updated_at": datetime.utcnow()}
+        updated = update_live_entity(self.client, key, properties)
+        if updated is None:
             return None
         
-        entity.update({
-            "name": name,
-            "updated_at": datetime.utcnow(),
-        })
-        
-        self.client.put(entity)
-        return WorkerEntity.to_dict(entity)
+        worker = WorkerEntity.to_dict(updated[1])
+        index = self._name_index
+        # Workers missing from the index are deleted or not caught up yet,
+        # in which case the next refresh brings them in
+        if index is not None and index.get(worker_id) is not None:
+            index.upsert(worker_id, name, worker)
+        return worker
     
     def delete_worker(self, worker_id: str) -> bool:
-        """Delete a worker"""
+        """
+        Delete a worker, leaving a tombstone for delta sync.
+        The stored worker is read and written in one transaction; deleting
+        an already deleted worker returns False, so concurrent deletes
+        decrement the worker count once, in the commit of the tombstone.
+        """
         key = self.client.key(KIND_WORKER, worker_id)
-        entity = self.client.get(key)
-        
-        if not entity:
+        deleted = update_live_entity(
+            self.client, key, tombstone_properties(settings.TOMBSTONE_TTL_DAYS),
+            related=lambda previous, entity: self.stats.record({TENANT_SCOPE: {"workers": -1}}),
+        )
+        if deleted is None:
             return False
-        
-        self.client.delete(key)
+        if self._name_index is not None:
+            self._name_index.remove(worker_id)
+        self.stats.fold(deleted[2])
         return True
+    
+    def backfill_name_lower(self, batch_size: int = 500) -> Iterator[int]:
+        """
+        Set `name_lower` on workers stored without it (or with a stale one),
+        so range query searches find them. Each batch is re-read and written
+        in one transaction, so concurrent renames are not undone. Yields the
+        number of workers updated so far after each batch.
+        """
+        updated = 0
+        keys = []
+        for entity in self.client.query(kind=KIND_WORKER).fetch():
+            if not is_deleted(entity) and entity.get("name_lower") != normalize_name(entity.get("name", "")):
+                keys.append(entity.key)
+            if len(keys) >= batch_size:
+                updated += self._backfill_batch(keys)
+                keys = []
+                yield updated
+        if keys:
+            updated += self._backfill_batch(keys)
+            yield updated
+    
+    def _backfill_batch(self, keys: List[datastore.Key]) -> int:
+        with self.client.transaction():
+            entities = [entity for entity in self.client.get_multi(keys) if not is_deleted(entity)]
+            for entity in entities:
+                entity["name_lower"] = normalize_name(entity.get("name", ""))
+            self.client.put_multi(entities)
+        return len(entities)
+    
+    def purge_tombstones(self) -> int:
+        """Remove expired worker tombstones"""
+        return purge_expired_tombstones(self.client, KIND_WORKER)
 
@@ -0,0 +1,174 @@
+"""
+Result cache for shift lists
+
+Lists are cached per (worker_id, window, timezone) as a columnar ShiftBatch,
+plus their serialized JSON body once a response has been produced, so repeat
+reads skip Datastore, timezone conversion and serialization.
+
+Writes invalidate only the entries they can affect, using two indexes:
+  - per worker: entries listing that worker's shifts (or all workers) whose
+    window overlaps the written shift
+  - per shift: entries that contain the shift, which covers the previous
+    worker and time of an updated or deleted shift without reading it
+
+Entries also expire after a TTL, which bounds staleness from writes made on
+other instances.
+
+LRUCache is for results keyed by a collection version, like schedule grids.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Hashable, Optional, Set, Tuple
+
+from app.models.records import ShiftBatch
+
+Window = Tuple[Optional[datetime], Optional[datetime]]
+
+
+class CachedShiftList:
+    """A cached shift list: the shift batch and the lazily filled JSON body"""
+    __slots__ = ("batch", "body", "worker_id", "window", "shift_ids", "expires_at")
+
+    def __init__(self, batch: ShiftBatch, worker_id: Optional[str], window: Window, expires_at: float):
+        self.batch = batch
+        self.body: Optional[bytes] = None
+        self.worker_id = worker_id
+        self.window = window
+        self.shift_ids = set(batch.ids)
+        self.expires_at = expires_at
+
+
+def _overlaps(window: Window, start: datetime, end: datetime) -> bool:
+    """Check whether [start, end) overlaps a window with optional bounds"""
+    window_start, window_end = window
+    return (window_start is None or end > window_start) and (window_end is None or start < window_end)
+
+
+class LRUCache:
+    """
+    Small thread-safe LRU for values whose keys already say when they are
+    stale (e.g. they include a version), so nothing is ever invalidated.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, object]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[object]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: object) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class ShiftResultCache:
+    """LRU of shift lists with TTL expiry and targeted invalidation"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, CachedShiftList]" = OrderedDict()
+        self._by_worker: Dict[Optional[str], Set[Hashable]] = {}
+        self._by_shift: Dict[str, Set[Hashable]] = {}
+        # Bumped on every invalidation so reads that raced a write are not stored
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key: Hashable) -> Optional[CachedShiftList]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Hashable, worker_id: Optional[str], window: Window, batch: ShiftBatch,
+            generation: int) -> CachedShiftList:
+        """
+        Store a shift list computed when the cache was at `generation`.
+        The entry is returned but not stored if a write happened since.
+        """
+        entry = CachedShiftList(batch, worker_id, window, time.monotonic() + self.ttl_seconds)
+        with self._lock:
+            if generation != self._generation or self.max_entries <= 0:
+                return entry
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._by_worker.setdefault(worker_id, set()).add(key)
+            for shift_id in entry.shift_ids:
+                self._by_shift.setdefault(shift_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+        return entry
+
+    def invalidate(self, shift_id: str, worker_id: Optional[str] = None,
+                   start: Optional[datetime] = None, end: Optional[datetime] = None) -> None:
+        """
+        Drop entries affected by a write to a shift.
+        `worker_id`, `start` and `end` describe the shift as written; leave them
+        out for deletes. Entries that contained the shift are always dropped.
+        """
+        with self._lock:
+            self._generation += 1
+            stale = set(self._by_shift.get(shift_id, ()))
+            if worker_id is not None and start is not None and end is not None:
+                for scope in (worker_id, None):
+                    for key in self._by_worker.get(scope, ()):
+                        if _overlaps(self._entries[key].window, start, end):
+                            stale.add(key)
+            for key in stale:
+                self._remove(key)
+
+    def invalidate_worker(self, worker_id: str) -> None:
+        """Drop every entry listing a worker's shifts, including all-worker lists"""
+        with self._lock:
+            self._generation += 1
+            for scope in (worker_id, None):
+                for key in list(self._by_worker.get(scope, ())):
+                    self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._by_worker.clear()
+            self._by_shift.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        keys = self._by_worker.get(entry.worker_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_worker[entry.worker_id]
+        for shift_id in entry.shift_ids:
+            keys = self._by_shift.get(shift_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_shift[shift_id]
@@ -0,0 +1,35 @@
+"""
+Request-scoped batch loaders
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+
+class WorkerLoader:
+    """
+    Batch loader for workers, created once per request.
+    Worker IDs are deduplicated and fetched with a single get_multi; results
+    are memoized so repeated lookups within the request are free.
+    """
+
+    def __init__(self, worker_service):
+        self.worker_service = worker_service
+        self._cache: Dict[str, Optional[dict]] = {}
+
+    def load_many(self, worker_ids: Iterable[str]) -> Dict[str, Optional[dict]]:
+        """Load workers by ID. Unknown or deleted workers map to None."""
+        worker_ids = list(worker_ids)
+        missing = {worker_id for worker_id in worker_ids if worker_id and worker_id not in self._cache}
+        if missing:
+            found = self.worker_service.get_workers_by_ids(missing)
+            for worker_id in missing:
+                self._cache[worker_id] = found.get(worker_id)
+        return {worker_id: self._cache.get(worker_id) for worker_id in worker_ids}
+
+    def embed(self, shifts: List[dict]) -> List[dict]:
+        """Attach a `worker` summary (id and name) to each shift dict in place"""
+        workers = self.load_many(shift.get("worker_id") for shift in shifts)
+        for shift in shifts:
+            worker = workers.get(shift.get("worker_id"))
+            shift["worker"] = {"id": worker["id"], "name": worker["name"]} if worker else None
+        return shifts
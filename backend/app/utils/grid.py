@@ -0,0 +1,115 @@
+"""
+Worker x day schedule grid
+
+Hours are bucketed by local calendar day in the configured timezone. Day
+boundaries are the local midnights converted to UTC, so days around DST
+changes are 23 or 25 hours long and shifts crossing midnight are split
+between the two days they touch.
+
+Shifts are sorted by start once and swept with a day pointer that only
+moves forward; each shift touches at most the few days it spans. The sweep
+reads the epoch columns of a ShiftBatch directly.
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Set, Tuple
+from zoneinfo import ZoneInfo
+
+from app.models.records import US_PER_HOUR, ShiftBatch, to_epoch_us
+from app.utils.timezone import format_utc
+
+
+def local_midnight(day: date, zone: ZoneInfo) -> datetime:
+    """Start of a local calendar day in UTC"""
+    return datetime(day.year, day.month, day.day, tzinfo=zone).astimezone(timezone.utc)
+
+
+def day_bounds(window_start: datetime, window_end: datetime, tz: str) -> Tuple[List[date], List[datetime]]:
+    """
+    Local dates overlapping [window_start, window_end) and their boundaries:
+    `bounds[i]` is the UTC start of `days[i]` and `bounds[-1]` the end of the
+    last day, so there is one more bound than days.
+    """
+    zone = ZoneInfo(tz)
+    day = window_start.astimezone(zone).date()
+    last = (window_end - timedelta(microseconds=1)).astimezone(zone).date()
+    days: List[date] = []
+    bounds: List[datetime] = []
+    while day <= last:
+        days.append(day)
+        bounds.append(local_midnight(day, zone))
+        day += timedelta(days=1)
+    bounds.append(local_midnight(day, zone))
+    return days, bounds
+
+
+def build_grid(batch: ShiftBatch, window_start: datetime, window_end: datetime, tz: str) -> dict:
+    """
+    Hours per worker and local day for shifts overlapping the window.
+    Shifts are clipped to the window; days are local dates in `tz`.
+    Works on the batch's epoch columns, without building a row per shift.
+    """
+    days, bounds = day_bounds(window_start, window_end, tz)
+    cuts = [to_epoch_us(bound) for bound in bounds]
+    lower, upper = to_epoch_us(window_start), to_epoch_us(window_end)
+    starts, ends, worker_rows = batch.starts, batch.ends, batch.worker_rows
+
+    # Cells per worker, keyed by the worker's index in the batch
+    rows: Dict[int, List[float]] = {}
+    day_workers: List[Set[int]] = [set() for _ in days]
+    shift_count = 0
+    day = 0
+    for row in sorted(range(len(batch)), key=starts.__getitem__):
+        start = max(starts[row], lower)
+        end = min(ends[row], upper)
+        if end <= start:
+            continue
+        shift_count += 1
+        # Starts only grow, so the day pointer only moves forward
+        while cuts[day + 1] <= start:
+            day += 1
+        worker = worker_rows[row]
+        cells = rows.get(worker)
+        if cells is None:
+            cells = rows[worker] = [0.0] * len(days)
+        i = day
+        while i < len(days) and cuts[i] < end:
+            micros = min(end, cuts[i + 1]) - max(start, cuts[i])
+            if micros > 0:
+                cells[i] += micros / US_PER_HOUR
+                day_workers[i].add(worker)
+            i += 1
+
+    day_hours = [0.0] * len(days)
+    for cells in rows.values():
+        for i, hours in enumerate(cells):
+            day_hours[i] += hours
+
+    return {
+        "timezone": tz,
+        "from": format_utc(window_start),
+        "to": format_utc(window_end),
+        "days": [
+            {
+                "date": day.isoformat(),
+                "start": format_utc(bounds[i]),
+                "end": format_utc(bounds[i + 1]),
+                "hours": round(day_hours[i], 4),
+                "workers": len(day_workers[i]),
+            }
+            for i, day in enumerate(days)
+        ],
+        "rows": sorted(
+            (
+                {
+                    "worker_id": batch.workers[worker],
+                    "hours": [round(hours, 4) for hours in cells],
+                    "total_hours": round(sum(cells), 4),
+                }
+                for worker, cells in rows.items()
+            ),
+            key=lambda grid_row: grid_row["worker_id"],
+        ),
+        "total_hours": round(sum(day_hours), 4),
+        "shift_count": shift_count,
+    }
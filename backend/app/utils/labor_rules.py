@@ -0,0 +1,183 @@
+"""
+Labor rules checked on every shift write
+
+Rules come in two kinds:
+  - shape rules look at the shift alone (maximum duration)
+  - neighbour rules look at the worker's other shifts near it (no overlap,
+    minimum rest, rolling hour cap)
+
+Every neighbour rule declares how far around the shift it needs to see
+(`reach`). The caller loads only the worker's shifts within the widest reach
+with one ordered range query, and rules find their neighbours in that
+Timeline by bisection, so a write never rescans the worker's history.
+"""
+
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+
+
+class LaborRuleViolation(Exception):
+    """Raised when a shift breaks a labor rule"""
+    pass
+
+
+class Interval(NamedTuple):
+    """A shift as seen by the rules, in aware UTC datetimes"""
+    start: datetime
+    end: datetime
+    id: Optional[str] = None
+
+    @property
+    def hours(self) -> float:
+        return (self.end - self.start).total_seconds() / 3600.0
+
+
+class Timeline:
+    """A worker's shifts around a write, sorted by start"""
+
+    def __init__(self, intervals: Iterable[Interval], max_duration: timedelta):
+        self.intervals: List[Interval] = sorted(intervals, key=lambda interval: interval.start)
+        self._starts = [interval.start for interval in self.intervals]
+        # Bounds how far back a shift overlapping a point can start
+        self.max_duration = max_duration
+
+    def add(self, interval: Interval) -> None:
+        """Insert an interval, keeping the timeline sorted"""
+        i = bisect_left(self._starts, interval.start)
+        self._starts.insert(i, interval.start)
+        self.intervals.insert(i, interval)
+
+    def overlapping(self, start: datetime, end: datetime, exclude_id: Optional[str] = None) -> Iterator[Interval]:
+        """Intervals overlapping [start, end), except the one with `exclude_id`"""
+        i = bisect_left(self._starts, start - self.max_duration)
+        stop = bisect_left(self._starts, end)
+        for interval in self.intervals[i:stop]:
+            if interval.end > start and (exclude_id is None or interval.id != exclude_id):
+                yield interval
+
+
+class LaborRule:
+    """
+    Base class for labor rules.
+    `reach` is how far before the start and after the end of a shift the rule
+    needs to see other shifts; None for rules that only look at the shift.
+    """
+    reach: Optional[timedelta] = None
+
+    def check(self, shift: Interval, timeline: Optional[Timeline]) -> Optional[str]:
+        """Return an error message if the shift breaks the rule"""
+        raise NotImplementedError
+
+
+class MaxDurationRule(LaborRule):
+    """Shifts may not be longer than `max_hours`"""
+
+    def __init__(self, max_hours: float):
+        self.max_hours = max_hours
+
+    def check(self, shift: Interval, timeline: Optional[Timeline]) -> Optional[str]:
+        if shift.hours > self.max_hours:
+            return f"Shift duration ({shift.hours:.2f} hours) exceeds maximum of {self.max_hours:g} hours"
+        return None
+
+
+class NoOverlapRule(LaborRule):
+    """A worker's shifts may not overlap"""
+    reach = timedelta(0)
+
+    def check(self, shift: Interval, timeline: Optional[Timeline]) -> Optional[str]:
+        for other in timeline.overlapping(shift.start, shift.end, exclude_id=shift.id):
+            return f"Shift overlaps with existing shift ({other.start.isoformat()} to {other.end.isoformat()})"
+        return None
+
+
+class MinRestRule(LaborRule):
+    """At least `hours` of rest between the end of one shift and the start of the next"""
+
+    def __init__(self, hours: float):
+        self.hours = hours
+        self.reach = timedelta(hours=hours)
+
+    def check(self, shift: Interval, timeline: Optional[Timeline]) -> Optional[str]:
+        for other in timeline.overlapping(shift.start - self.reach, shift.end + self.reach, exclude_id=shift.id):
+            return (
+                f"Shift leaves less than {self.hours:g} hours of rest next to existing shift "
+                f"({other.start.isoformat()} to {other.end.isoformat()})"
+            )
+        return None
+
+
+class RollingHoursCapRule(LaborRule):
+    """At most `max_hours` of work in any rolling period of `days` days"""
+
+    def __init__(self, max_hours: float, days: int = 7):
+        self.max_hours = max_hours
+        self.days = days
+        self.reach = timedelta(days=days)
+
+    def check(self, shift: Interval, timeline: Optional[Timeline]) -> Optional[str]:
+        period = self.reach
+        intervals = list(timeline.overlapping(shift.start - period, shift.end + period, exclude_id=shift.id))
+        intervals.append(shift)
+
+        # Hours in a window are piecewise linear in its start, so the maximum
+        # is at a window edge meeting a shift edge. Only windows overlapping
+        # the new shift can have changed.
+        candidates = set()
+        for interval in intervals:
+            for edge in (interval.start, interval.end):
+                candidates.update((edge, edge - period))
+        worst = 0.0
+        for window_start in candidates:
+            window_end = window_start + period
+            if window_end <= shift.start or window_start >= shift.end:
+                continue
+            hours = sum(
+                max(timedelta(0), min(interval.end, window_end) - max(interval.start, window_start)).total_seconds()
+                for interval in intervals
+            ) / 3600.0
+            worst = max(worst, hours)
+        if worst > self.max_hours:
+            return f"Shift brings worked hours to {worst:.2f} in {self.days} days, above the maximum of {self.max_hours:g}"
+        return None
+
+
+class RuleEngine:
+    """An ordered set of labor rules"""
+
+    def __init__(self, rules: List[LaborRule], max_shift_hours: float):
+        self.rules = rules
+        self.shape_rules = [rule for rule in rules if rule.reach is None]
+        self.neighbour_rules = [rule for rule in rules if rule.reach is not None]
+        self.max_duration = timedelta(hours=max_shift_hours)
+        # How far around a shift neighbours have to be loaded
+        self.reach = max((rule.reach for rule in self.neighbour_rules), default=timedelta(0))
+
+    @classmethod
+    def from_settings(cls, settings) -> "RuleEngine":
+        """Build the rules enabled in the settings"""
+        rules: List[LaborRule] = [MaxDurationRule(settings.MAX_SHIFT_HOURS), NoOverlapRule()]
+        if settings.MIN_REST_HOURS > 0:
+            rules.append(MinRestRule(settings.MIN_REST_HOURS))
+        if settings.MAX_HOURS_PER_7_DAYS > 0:
+            rules.append(RollingHoursCapRule(settings.MAX_HOURS_PER_7_DAYS, days=7))
+        return cls(rules, settings.MAX_SHIFT_HOURS)
+
+    def timeline(self, intervals: Iterable[Interval]) -> Timeline:
+        return Timeline(intervals, self.max_duration)
+
+    def check_shape(self, shift: Interval) -> None:
+        """Run the rules that only look at the shift itself"""
+        self._run(self.shape_rules, shift, None)
+
+    def check(self, shift: Interval, timeline: Timeline) -> None:
+        """Run the rules that look at neighbouring shifts"""
+        self._run(self.neighbour_rules, shift, timeline)
+
+    @staticmethod
+    def _run(rules: List[LaborRule], shift: Interval, timeline: Optional[Timeline]) -> None:
+        for rule in rules:
+            message = rule.check(shift, timeline)
+            if message:
+                raise LaborRuleViolation(message)
@@ -0,0 +1,227 @@
+"""
+Recurrence rules for shift templates
+
+A template repeats a wall-clock shift (e.g. 09:00-17:00 in Europe/Berlin)
+following a subset of iCalendar RRULE: FREQ=DAILY or FREQ=WEEKLY with
+INTERVAL, BYDAY, UNTIL and COUNT. Occurrences are only computed for the
+window being read, starting from the first period that can reach it, and
+each one is resolved in the template's timezone so it keeps its local
+times across DST changes. A start inside a DST gap moves forward by the
+length of the gap.
+"""
+
+import heapq
+from dataclasses import dataclass, replace
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:
+    # Fallback for Python < 3.9
+    from backports.zoneinfo import ZoneInfo
+
+WEEKDAYS = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+FREQUENCIES = ("DAILY", "WEEKLY")
+# COUNT is resolved to an UNTIL date when the template is saved
+MAX_COUNT = 1000
+# Days or weeks between periods
+MAX_INTERVAL = 1000
+
+Occurrence = Tuple[datetime, datetime, date]
+
+
+class RecurrenceError(ValueError):
+    """Raised for unsupported or invalid recurrence rules"""
+    pass
+
+
+@dataclass(frozen=True)
+class Recurrence:
+    """A parsed recurrence: when a template's occurrences start and end"""
+    freq: str
+    interval: int
+    weekdays: Tuple[int, ...]
+    start_date: date
+    start_time: time
+    end_time: time
+    timezone: str
+    until: Optional[date] = None
+
+    @property
+    def overnight(self) -> bool:
+        """Whether occurrences end on the day after they start"""
+        return self.end_time <= self.start_time
+
+    def to_rrule(self) -> str:
+        parts = [f"FREQ={self.freq}"]
+        if self.interval != 1:
+            parts.append(f"INTERVAL={self.interval}")
+        if self.weekdays:
+            parts.append("BYDAY=" + ",".join(WEEKDAYS[weekday] for weekday in self.weekdays))
+        if self.until:
+            parts.append(f"UNTIL={self.until:%Y%m%d}")
+        return ";".join(parts)
+
+
+def _parse_until(value: str) -> date:
+    try:
+        return datetime.strptime(value[:8], "%Y%m%d").date()
+    except ValueError:
+        raise RecurrenceError(f"Invalid UNTIL: {value}")
+
+
+def build_recurrence(start: str, end: str, rrule: str, tz: str) -> Recurrence:
+    """
+    Build a recurrence from the first occurrence's local start and end
+    (ISO 8601 without offset), an RRULE string and an IANA timezone.
+    """
+    try:
+        ZoneInfo(tz)
+    except Exception:
+        raise RecurrenceError(f"Unknown timezone: {tz}")
+    try:
+        start_local = datetime.fromisoformat(start)
+        end_local = datetime.fromisoformat(end)
+    except ValueError:
+        raise RecurrenceError("start and end must be ISO 8601 local datetimes")
+    if start_local.tzinfo is not None or end_local.tzinfo is not None:
+        raise RecurrenceError("start and end are local times in the template timezone and must not have an offset")
+    if end_local <= start_local:
+        raise RecurrenceError("End time must be after start time")
+    if end_local - start_local >= timedelta(days=1):
+        raise RecurrenceError("Occurrences must end within 24 hours of their start")
+
+    fields = {}
+    rrule = rrule.strip().upper()
+    if rrule.startswith("RRULE:"):
+        rrule = rrule[len("RRULE:"):]
+    for part in rrule.split(";"):
+        name, _, value = part.strip().partition("=")
+        if name:
+            fields[name] = value
+
+    freq = fields.pop("FREQ", None)
+    if freq not in FREQUENCIES:
+        raise RecurrenceError(f"FREQ must be one of {', '.join(FREQUENCIES)}")
+    try:
+        interval = int(fields.pop("INTERVAL", "1"))
+        count = int(fields.pop("COUNT")) if "COUNT" in fields else None
+    except ValueError:
+        raise RecurrenceError("INTERVAL and COUNT must be integers")
+    if not 1 <= interval <= MAX_INTERVAL:
+        raise RecurrenceError(f"INTERVAL must be between 1 and {MAX_INTERVAL}")
+    until = _parse_until(fields.pop("UNTIL")) if "UNTIL" in fields else None
+    if count is not None and until is not None:
+        raise RecurrenceError("COUNT and UNTIL cannot be combined")
+    if count is not None and not 1 <= count <= MAX_COUNT:
+        raise RecurrenceError(f"COUNT must be between 1 and {MAX_COUNT}")
+
+    weekdays: Tuple[int, ...] = ()
+    if "BYDAY" in fields:
+        if freq != "WEEKLY":
+            raise RecurrenceError("BYDAY is only supported with FREQ=WEEKLY")
+        try:
+            weekdays = tuple(sorted({WEEKDAYS.index(day.strip()) for day in fields.pop("BYDAY").split(",")}))
+        except ValueError:
+            raise RecurrenceError(f"BYDAY values must be among {', '.join(WEEKDAYS)}")
+    elif freq == "WEEKLY":
+        weekdays = (start_local.weekday(),)
+    if until is not None and until < start_local.date():
+        raise RecurrenceError("UNTIL must not be before the first occurrence")
+    if fields:
+        raise RecurrenceError(f"Unsupported RRULE parts: {', '.join(sorted(fields))}")
+
+    recurrence = Recurrence(
+        freq=freq,
+        interval=interval,
+        weekdays=weekdays,
+        start_date=start_local.date(),
+        start_time=start_local.time(),
+        end_time=end_local.time(),
+        timezone=tz,
+        until=until,
+    )
+    if count is not None:
+        dates = occurrence_dates(recurrence, recurrence.start_date, date.max)
+        try:
+            for _ in range(count):
+                until = next(dates)
+        except (OverflowError, StopIteration):
+            raise RecurrenceError("COUNT occurrences would reach past the last supported date")
+        recurrence = replace(recurrence, until=until)
+    return recurrence
+
+
+def occurrence_dates(recurrence: Recurrence, first: date, last: date) -> Iterator[date]:
+    """Local dates in [first, last] on which the recurrence has an occurrence"""
+    start = recurrence.start_date
+    first = max(first, start)
+    if recurrence.until is not None:
+        last = min(last, recurrence.until)
+    if first > last:
+        return
+
+    if recurrence.freq == "DAILY":
+        step = recurrence.interval
+        # Jump to the first occurrence on or after `first`
+        day = start + timedelta(days=-(-(first - start).days // step) * step)
+        while day <= last:
+            yield day
+            day += timedelta(days=step)
+        return
+
+    # WEEKLY: weeks are counted from the Monday of the start date
+    anchor = start - timedelta(days=start.weekday())
+    week = (first - anchor).days // 7
+    week -= week % recurrence.interval
+    while True:
+        monday = anchor + timedelta(weeks=week)
+        if monday > last:
+            return
+        for weekday in recurrence.weekdays:
+            day = monday + timedelta(days=weekday)
+            if day < first:
+                continue
+            if day > last:
+                return
+            yield day
+        week += recurrence.interval
+
+
+def occurrence_times(recurrence: Recurrence, day: date) -> Tuple[datetime, datetime]:
+    """UTC start and end of the occurrence starting on a local date"""
+    tz = ZoneInfo(recurrence.timezone)
+    end_day = day + timedelta(days=1) if recurrence.overnight else day
+    start = datetime.combine(day, recurrence.start_time, tzinfo=tz).astimezone(timezone.utc)
+    end = datetime.combine(end_day, recurrence.end_time, tzinfo=tz).astimezone(timezone.utc)
+    return start, end
+
+
+def expand(recurrence: Recurrence, window_start: Optional[datetime], window_end: datetime,
+           exdates: Iterable[date] = ()) -> Iterator[Occurrence]:
+    """
+    Occurrences overlapping [window_start, window_end) as (start, end, date)
+    in UTC, ordered by start. `exdates` are skipped.
+    """
+    tz = ZoneInfo(recurrence.timezone)
+    first = recurrence.start_date
+    if window_start is not None:
+        # An overnight occurrence from the previous day can reach into the window
+        first = window_start.astimezone(tz).date() - timedelta(days=1)
+    last = window_end.astimezone(tz).date()
+    skipped = set(exdates)
+
+    for day in occurrence_dates(recurrence, first, last):
+        if day in skipped:
+            continue
+        start, end = occurrence_times(recurrence, day)
+        if start >= window_end:
+            return
+        if window_start is None or end > window_start:
+            yield start, end, day
+
+
+def merge_sorted(lists: Iterable[List[tuple]]) -> List[tuple]:
+    """Merge lists of (start, end, ...) tuples sorted by start into one"""
+    return list(heapq.merge(*lists, key=lambda item: item[0]))
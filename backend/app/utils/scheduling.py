@@ -0,0 +1,87 @@
+"""
+Greedy assignment of open slots to workers
+
+Slots are processed in start order (interval scheduling). Each slot goes to
+the worker with the fewest hours so far who passes the labor rules, so hours
+even out across the pool. Workers are kept in a min-heap by hours; workers
+that can't take a slot are set aside and put back afterwards, so in the
+common case a slot costs one rule check and O(log W) heap work.
+"""
+
+import heapq
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from app.utils.labor_rules import Interval, LaborRuleViolation, RuleEngine, Timeline
+
+
+class Slot(NamedTuple):
+    """An open slot; `worker_ids` limits who may take it"""
+    start: object
+    end: object
+    index: int
+    worker_ids: Optional[frozenset] = None
+
+
+class Assignment(NamedTuple):
+    slot: Slot
+    worker_id: str
+
+
+class Unfilled(NamedTuple):
+    slot: Slot
+    reason: str
+
+
+def plan_assignments(slots: Iterable[Slot], worker_ids: Iterable[str], timelines: Dict[str, Timeline],
+                     engine: RuleEngine, hours: Optional[Dict[str, float]] = None
+                     ) -> Tuple[List[Assignment], List[Unfilled]]:
+    """
+    Assign slots to workers without breaking the labor rules.
+    `timelines` holds each worker's existing shifts around the slots and is
+    updated with the assignments; `hours` holds hours already scheduled in
+    the same range and is used to balance the pool.
+    """
+    hours = dict(hours or {})
+    heap = [(hours.get(worker_id, 0.0), worker_id) for worker_id in worker_ids]
+    heapq.heapify(heap)
+    for _, worker_id in heap:
+        timelines.setdefault(worker_id, engine.timeline(()))
+
+    assignments: List[Assignment] = []
+    unfilled: List[Unfilled] = []
+    for slot in sorted(slots, key=lambda slot: (slot.start, slot.end)):
+        interval = Interval(slot.start, slot.end)
+        try:
+            engine.check_shape(interval)
+        except LaborRuleViolation as e:
+            unfilled.append(Unfilled(slot, str(e)))
+            continue
+
+        skipped = []
+        reason = "No workers available"
+        chosen = None
+        while heap:
+            worker_hours, worker_id = heapq.heappop(heap)
+            if slot.worker_ids is not None and worker_id not in slot.worker_ids:
+                skipped.append((worker_hours, worker_id))
+                continue
+            try:
+                engine.check(interval, timelines[worker_id])
+            except LaborRuleViolation:
+                reason = "No worker can take this slot without breaking a labor rule"
+                skipped.append((worker_hours, worker_id))
+                continue
+            chosen = (worker_hours, worker_id)
+            break
+
+        for entry in skipped:
+            heapq.heappush(heap, entry)
+        if chosen is None:
+            unfilled.append(Unfilled(slot, reason))
+            continue
+
+        worker_hours, worker_id = chosen
+        timelines[worker_id].add(interval)
+        heapq.heappush(heap, (worker_hours + interval.hours, worker_id))
+        assignments.append(Assignment(slot, worker_id))
+    return assignments, unfilled
@@ -0,0 +1,267 @@
+"""
+Binary response formats for shift lists
+
+Shift lists can be returned as MessagePack or Apache Arrow IPC streams in
+addition to JSON. Both binary formats are columnar: every Datastore page of
+shifts is encoded as one batch of column arrays, so keys are not repeated
+per row and timestamps travel as epoch milliseconds (UTC) together with the
+configured timezone instead of per-row converted ISO strings.
+
+msgpack, pyarrow and brotli are pinned in requirements.txt; should one be
+missing, formats backed by it are simply not offered during content
+negotiation.
+"""
+
+import io
+import zlib
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+from google.cloud import datastore
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/vnd.msgpack"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# Accept header aliases mapped to the media type we respond with
+_MEDIA_TYPE_ALIASES = {
+    "application/json": JSON_MEDIA_TYPE,
+    "application/vnd.msgpack": MSGPACK_MEDIA_TYPE,
+    "application/msgpack": MSGPACK_MEDIA_TYPE,
+    "application/x-msgpack": MSGPACK_MEDIA_TYPE,
+    "application/vnd.apache.arrow.stream": ARROW_MEDIA_TYPE,
+}
+
+SHIFT_COLUMNS = ["id", "worker_id", "start", "end", "duration", "template_id", "created_at", "updated_at"]
+
+
+class UnsupportedMediaTypeError(Exception):
+    """Raised when none of the accepted media types can be produced"""
+    pass
+
+
+def encode_shifts_json(shifts: List[dict]) -> bytes:
+    """Serialize a shift list to JSON the same way the response model would"""
+    from app.models.schemas import Shift
+    from pydantic import TypeAdapter
+
+    adapter = TypeAdapter(List[Shift])
+    return adapter.dump_json(adapter.validate_python(shifts))
+
+
+def _available(media_type: str) -> bool:
+    """Check whether the library backing a media type is installed"""
+    try:
+        if media_type == MSGPACK_MEDIA_TYPE:
+            import msgpack  # noqa: F401
+        elif media_type == ARROW_MEDIA_TYPE:
+            import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _parse_header(value: Optional[str]) -> List[Tuple[str, float]]:
+    """Parse an Accept/Accept-Encoding header into (token, q) pairs sorted by preference"""
+    entries = []
+    for position, part in enumerate((value or "").split(",")):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, raw = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(raw)
+                except ValueError:
+                    q = 0.0
+        entries.append((token, q, position))
+    entries.sort(key=lambda entry: (-entry[1], entry[2]))
+    return [(token, q) for token, q, _ in entries if q > 0]
+
+
+def negotiate_media_type(accept: Optional[str]) -> str:
+    """
+    Pick the response media type for a shift list from the Accept header.
+    Falls back to JSON for missing or wildcard headers.
+    """
+    entries = _parse_header(accept)
+    if not entries:
+        return JSON_MEDIA_TYPE
+    for token, _ in entries:
+        if token in ("*/*", "application/*"):
+            return JSON_MEDIA_TYPE
+        media_type = _MEDIA_TYPE_ALIASES.get(token)
+        if media_type and _available(media_type):
+            return media_type
+    raise UnsupportedMediaTypeError(
+        f"Supported media types: {', '.join(t for t in _MEDIA_TYPE_ALIASES if _available(_MEDIA_TYPE_ALIASES[t]))}"
+    )
+
+
+def _epoch_ms(value) -> Optional[int]:
+    """Convert an ISO 8601 string or datetime to epoch milliseconds (UTC)"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1000)
+
+
+def shift_columns(entities: Iterable[datastore.Entity]) -> dict:
+    """Build column arrays for one page of shift entities"""
+    columns = {name: [] for name in SHIFT_COLUMNS}
+    for entity in entities:
+        start = _epoch_ms(entity.get("start"))
+        end = _epoch_ms(entity.get("end"))
+        columns["id"].append(entity.key.id_or_name)
+        columns["worker_id"].append(entity.get("worker_id", ""))
+        columns["start"].append(start)
+        columns["end"].append(end)
+        columns["duration"].append((end - start) / 3_600_000.0 if start is not None and end is not None else 0.0)
+        columns["template_id"].append(entity.get("template_id"))
+        columns["created_at"].append(_epoch_ms(entity.get("created_at")))
+        columns["updated_at"].append(_epoch_ms(entity.get("updated_at")))
+    return columns
+
+
+def _encode_msgpack(pages: Iterable[List[datastore.Entity]], target_timezone: str) -> Iterator[bytes]:
+    """
+    Encode shift pages as a stream of MessagePack objects.
+    The first object is a header with the timezone and column names, every
+    following object is a map of column name to array for one page.
+    """
+    import msgpack
+
+    yield msgpack.packb({"timezone": target_timezone, "time_unit": "ms", "columns": SHIFT_COLUMNS})
+    for page in pages:
+        if page:
+            yield msgpack.packb(shift_columns(page))
+
+
+def _arrow_schema(target_timezone: str):
+    """Arrow schema for shift batches"""
+    import pyarrow as pa
+
+    return pa.schema([
+        ("id", pa.string()),
+        ("worker_id", pa.dictionary(pa.int32(), pa.string())),
+        ("start", pa.timestamp("ms", tz=target_timezone)),
+        ("end", pa.timestamp("ms", tz=target_timezone)),
+        ("duration", pa.float64()),
+        ("template_id", pa.string()),
+        ("created_at", pa.timestamp("ms", tz="UTC")),
+        ("updated_at", pa.timestamp("ms", tz="UTC")),
+    ])
+
+
+def _encode_arrow(pages: Iterable[List[datastore.Entity]], target_timezone: str) -> Iterator[bytes]:
+    """
+    Encode shift pages as an Arrow IPC stream with one record batch per page.
+    Timestamps carry the configured timezone as metadata, so no per-row
+    conversion is needed.
+    """
+    import pyarrow as pa
+
+    schema = _arrow_schema(target_timezone)
+    sink = io.BytesIO()
+    writer = pa.ipc.new_stream(sink, schema)
+
+    def drain() -> bytes:
+        data = sink.getvalue()
+        sink.seek(0)
+        sink.truncate(0)
+        return data
+
+    for page in pages:
+        if not page:
+            continue
+        columns = shift_columns(page)
+        arrays = [
+            pa.array(columns[field.name]).dictionary_encode()
+            if pa.types.is_dictionary(field.type)
+            else pa.array(columns[field.name], type=field.type)
+            for field in schema
+        ]
+        writer.write_batch(pa.record_batch(arrays, schema=schema))
+        yield drain()
+    writer.close()
+    yield drain()
+
+
+def encode_shift_pages(pages: Iterable[List[datastore.Entity]], media_type: str,
+                       target_timezone: str) -> Iterator[bytes]:
+    """Encode pages of shift entities in the given binary media type"""
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return _encode_msgpack(pages, target_timezone)
+    if media_type == ARROW_MEDIA_TYPE:
+        return _encode_arrow(pages, target_timezone)
+    raise UnsupportedMediaTypeError(f"Cannot stream {media_type}")
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick a content encoding for binary streams: brotli if available, then gzip"""
+    tokens = [token for token, _ in _parse_header(accept_encoding)]
+    if "br" in tokens:
+        try:
+            import brotli  # noqa: F401
+            return "br"
+        except ImportError:
+            pass
+    if "gzip" in tokens:
+        return "gzip"
+    return None
+
+
+def _compressor(encoding: str):
+    """Return a (compress, flush) pair for a content encoding"""
+    if encoding == "br":
+        import brotli
+
+        compressor = brotli.Compressor(quality=5)
+        return compressor.process, compressor.finish
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress, compressor.flush
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: Optional[str],
+                    min_size: int) -> Tuple[Optional[str], Union[bytes, Iterator[bytes]]]:
+    """
+    Compress a chunked body once it grows past `min_size` bytes.
+    Chunks are buffered only until the threshold is reached, so the returned
+    encoding (None when left uncompressed) can be sent as a header before
+    the rest of the body is produced. Bodies that end below the threshold
+    are returned as plain bytes.
+    """
+    chunks = iter(chunks)
+    head = []
+    size = 0
+    for chunk in chunks:
+        head.append(chunk)
+        size += len(chunk)
+        if size >= min_size:
+            break
+    else:
+        return None, b"".join(head)
+
+    if encoding is None:
+        def passthrough() -> Iterator[bytes]:
+            yield from head
+            yield from chunks
+        return None, passthrough()
+
+    compress, flush = _compressor(encoding)
+
+    def compressed() -> Iterator[bytes]:
+        for chunk in head:
+            yield compress(chunk)
+        for chunk in chunks:
+            data = compress(chunk)
+            if data:
+                yield data
+        yield flush()
+
+    return encoding, compressed()
@@ -0,0 +1,200 @@
+"""
+Snapshot backup and restore of a tenant's entities
+
+A snapshot is a directory holding, per kind, one file per key range
+partition (`<Kind>.<partition>.snap`) and a `manifest.json` written last.
+Each file is a gzip stream of records, a record being a 4-byte big-endian
+length followed by the entity serialized as a Datastore Entity protobuf, so
+every property type, exclusions from indexes and tombstones survive as is.
+
+Backup runs one `__key__` range query per partition on a thread pool and
+streams each query's pages straight into its file. Restore reads files on a
+thread pool and writes `put_multi` batches as records arrive. Either way
+memory stays at about one page or batch per worker, whatever the size of
+the tenant.
+
+Statistics counters are not part of snapshots: after restoring workers or
+shifts, restore recounts them from the restored entities, which also
+corrects counters the target namespace already had.
+
+Partitions split the key name space evenly by hex prefix, which matches the
+UUID key names used for workers, shifts and templates. Numeric IDs sort
+before all names and end up in the first partition.
+"""
+
+import gzip
+import json
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from google.cloud import datastore
+from google.cloud.datastore import helpers
+from google.cloud.datastore_v1.types import entity as entity_pb2
+
+from app.core.datastore import (
+    get_datastore_client,
+    KIND_SHIFT,
+    KIND_SHIFT_TEMPLATE,
+    KIND_TIMEZONE,
+    KIND_WORKER,
+)
+from app.services.stats_service import StatsService
+
+SNAPSHOT_KINDS = (KIND_TIMEZONE, KIND_WORKER, KIND_SHIFT, KIND_SHIFT_TEMPLATE)
+MANIFEST = "manifest.json"
+FORMAT_VERSION = 1
+
+_LENGTH = struct.Struct(">I")
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot is missing, incomplete or corrupt"""
+    pass
+
+
+def partition_bounds(partitions: int) -> List[Tuple[Optional[str], Optional[str]]]:
+    """
+    Contiguous key name ranges [lower, upper) covering the whole key space,
+    split evenly over 4-digit hex prefixes. None means unbounded.
+    """
+    if partitions < 1 or partitions > 0x10000:
+        raise ValueError("partitions must be between 1 and 65536")
+    cuts = [f"{i * 0x10000 // partitions:04x}" for i in range(1, partitions)]
+    lowers = [None] + cuts
+    uppers = cuts + [None]
+    return list(zip(lowers, uppers))
+
+
+def write_records(path: str, entities: Iterator[datastore.Entity]) -> int:
+    """Stream entities into a compressed, length-prefixed file. Returns the count."""
+    count = 0
+    partial = path + ".partial"
+    with gzip.open(partial, "wb", compresslevel=6) as out:
+        for entity in entities:
+            data = entity_pb2.Entity.serialize(helpers.entity_to_protobuf(entity))
+            out.write(_LENGTH.pack(len(data)))
+            out.write(data)
+            count += 1
+    os.replace(partial, path)
+    return count
+
+
+def read_records(path: str) -> Iterator[datastore.Entity]:
+    """Stream entities back out of a snapshot file"""
+    with gzip.open(path, "rb") as source:
+        while True:
+            header = source.read(_LENGTH.size)
+            if not header:
+                return
+            if len(header) < _LENGTH.size:
+                raise SnapshotError(f"Truncated record header in {path}")
+            (length,) = _LENGTH.unpack(header)
+            data = source.read(length)
+            if len(data) < length:
+                raise SnapshotError(f"Truncated record in {path}")
+            yield helpers.entity_from_protobuf(entity_pb2.Entity.deserialize(data))
+
+
+def _partition_query(client, kind: str, lower: Optional[str], upper: Optional[str]) -> datastore.Query:
+    query = client.query(kind=kind)
+    if lower is not None:
+        query.add_filter("__key__", ">=", client.key(kind, lower))
+    if upper is not None:
+        query.add_filter("__key__", "<", client.key(kind, upper))
+    return query
+
+
+def backup(directory: str, namespace: Optional[str] = None, kinds=SNAPSHOT_KINDS,
+           partitions: int = 16, workers: int = 8) -> dict:
+    """
+    Snapshot the given kinds of a namespace into a directory.
+    Returns the manifest, which lists the files and entity counts.
+    """
+    client = get_datastore_client(namespace)
+    os.makedirs(directory, exist_ok=True)
+    if os.path.exists(os.path.join(directory, MANIFEST)):
+        raise SnapshotError(f"{directory} already holds a snapshot")
+
+    tasks = []
+    for kind in kinds:
+        for index, (lower, upper) in enumerate(partition_bounds(partitions)):
+            tasks.append((kind, f"{kind}.{index:04d}.snap", lower, upper))
+
+    def run(task) -> int:
+        kind, name, lower, upper = task
+        return write_records(os.path.join(directory, name), _partition_query(client, kind, lower, upper).fetch())
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="snapshot") as pool:
+        counts = list(pool.map(run, tasks))
+
+    manifest = {
+        "version": FORMAT_VERSION,
+        "namespace": namespace or "",
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "partitions": partitions,
+        "files": [{"kind": kind, "name": name, "entities": count} for (kind, name, _, _), count in zip(tasks, counts)],
+    }
+    with open(os.path.join(directory, MANIFEST), "w") as out:
+        json.dump(manifest, out, indent=2)
+    return manifest
+
+
+def read_manifest(directory: str) -> dict:
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        raise SnapshotError(f"{directory} has no {MANIFEST}; the snapshot is missing or incomplete")
+    with open(path) as source:
+        manifest = json.load(source)
+    if manifest.get("version") != FORMAT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot version {manifest.get('version')}")
+    return manifest
+
+
+def restore(directory: str, namespace: Optional[str] = None, kinds=None,
+            batch_size: int = 500, workers: int = 4) -> Dict[str, int]:
+    """
+    Write a snapshot's entities into a namespace, which may differ from the
+    one it was taken from. Existing entities with the same keys are
+    overwritten; others are left alone. At most `workers` put_multi calls
+    are in flight at once. The statistics counters are reconciled
+    afterwards. Returns entity counts per kind.
+    """
+    manifest = read_manifest(directory)
+    if not 1 <= batch_size <= 500:
+        raise ValueError("batch_size must be between 1 and 500")
+    client = get_datastore_client(namespace)
+    files = [item for item in manifest["files"] if kinds is None or item["kind"] in kinds]
+
+    def rekey(entity: datastore.Entity) -> datastore.Entity:
+        # Keys carry the source project and namespace
+        restored = datastore.Entity(key=client.key(*entity.key.flat_path),
+                                    exclude_from_indexes=tuple(entity.exclude_from_indexes))
+        restored.update(entity)
+        return restored
+
+    def run(item) -> int:
+        count = 0
+        batch = []
+        for entity in read_records(os.path.join(directory, item["name"])):
+            batch.append(rekey(entity))
+            if len(batch) >= batch_size:
+                client.put_multi(batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            client.put_multi(batch)
+            count += len(batch)
+        if count != item["entities"]:
+            raise SnapshotError(f"{item['name']} holds {count} entities, the manifest says {item['entities']}")
+        return count
+
+    totals: Dict[str, int] = {}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="restore") as pool:
+        for item, count in zip(files, pool.map(run, files)):
+            totals[item["kind"]] = totals.get(item["kind"], 0) + count
+    if KIND_WORKER in totals or KIND_SHIFT in totals:
+        StatsService(namespace).reconcile()
+    return totals
@@ -0,0 +1,67 @@
+"""
+Delta sync utilities
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterable, Optional
+from google.cloud import datastore
+from app.core.config import settings
+from app.models.entities import is_deleted
+
+
+class SyncWindowExpiredError(Exception):
+    """Raised when an updated_since cursor is older than the tombstone TTL"""
+    pass
+
+
+def normalize_since(updated_since: datetime) -> datetime:
+    """
+    Normalize an updated_since cursor to an aware UTC datetime.
+    Naive values are assumed to be UTC. Raises SyncWindowExpiredError when
+    tombstones for that point in time may already have been purged.
+    """
+    if updated_since.tzinfo is None:
+        updated_since = updated_since.replace(tzinfo=timezone.utc)
+    updated_since = updated_since.astimezone(timezone.utc)
+
+    oldest = datetime.now(timezone.utc) - timedelta(days=settings.TOMBSTONE_TTL_DAYS)
+    if updated_since < oldest:
+        raise SyncWindowExpiredError(
+            f"updated_since is older than {settings.TOMBSTONE_TTL_DAYS} days, a full resync is required"
+        )
+    return updated_since
+
+
+def split_changes(entities: Iterable[datastore.Entity], to_dict: Callable[[datastore.Entity], dict],
+                  synced_at: datetime) -> dict:
+    """
+    Split changed entities into live items and deleted IDs.
+    `synced_at` is the cursor the client should send on its next sync.
+    """
+    items = []
+    deleted = []
+    for entity in entities:
+        if is_deleted(entity):
+            deleted.append(entity.key.id_or_name)
+        else:
+            items.append(to_dict(entity))
+    return {"items": items, "deleted": deleted, "synced_at": synced_at}
+
+
+def purge_expired_tombstones(client: datastore.Client, kind: str, now: Optional[datetime] = None) -> int:
+    """
+    Delete tombstones whose `expire_at` has passed.
+    Production relies on a Datastore TTL policy on `expire_at`; this is the
+    fallback for the emulator and for projects without the policy enabled.
+    Returns the number of tombstones removed.
+    """
+    now = now or datetime.now(timezone.utc)
+    query = client.query(kind=kind)
+    query.add_filter("expire_at", "<=", now)
+    query.keys_only()
+
+    keys = [entity.key for entity in query.fetch()]
+    # delete_multi is limited to 500 mutations per commit
+    for i in range(0, len(keys), 500):
+        client.delete_multi(keys[i:i + 500])
+    return len(keys)
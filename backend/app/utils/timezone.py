@@ -2,7 +2,7 @@
 Timezone conversion utilities
 """
 
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional
 
 try:
@@ -11,7 +11,29 @@ except ImportError:
     # Fallback for Python < 3.9
     from backports.zoneinfo import ZoneInfo
 
-import pytz
+
+def parse_iso_datetime(value: str) -> datetime:
+    """Parse an ISO 8601 string to an aware datetime, naive values are UTC"""
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def format_utc(value: datetime) -> str:
+    """Format an aware datetime as an ISO 8601 UTC string"""
+    return value.astimezone(timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def get_tzinfo(target_timezone: str):
+    """tzinfo for an IANA timezone name"""
+    try:
+        return ZoneInfo(target_timezone)
+    except Exception:
+        # Fallback to pytz for older Python versions or unsupported timezones.
+        # Imported here so the common path doesn't pay for it at startup.
+        import pytz
+        return pytz.timezone(target_timezone)
 
 
 def convert_to_timezone(iso_string: str, target_timezone: str) -> str:
@@ -30,15 +52,7 @@ def convert_to_timezone(iso_string: str, target_timezone: str) -> str:
         dt = dt.replace(tzinfo=ZoneInfo('UTC'))
     
     # Convert to target timezone
-    try:
-        target_tz = ZoneInfo(target_timezone)
-    except Exception:
-        # Fallback to pytz for older Python versions or unsupported timezones
-        target_tz = pytz.timezone(target_timezone)
-        dt = dt.astimezone(target_tz)
-        return dt.isoformat()
-    
-    dt = dt.astimezone(target_tz)
+    dt = dt.astimezone(get_tzinfo(target_timezone))
     return dt.isoformat()
 
 
@@ -0,0 +1,92 @@
+"""
+In-process prefix index for worker names
+"""
+
+import threading
+from typing import Dict, List, Optional
+
+
+def normalize_name(name: str) -> str:
+    """Normalized form of a name used for case-insensitive prefix search"""
+    return " ".join(name.split()).casefold()
+
+
+class _Node:
+    __slots__ = ("children", "items")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        # Items whose normalized name ends at this node, by ID
+        self.items: Dict[str, dict] = {}
+
+
+class NameTrie:
+    """
+    Trie of items keyed by normalized name.
+    Prefix searches walk the matching subtree in character order, so results
+    come back sorted by name and stop as soon as `limit` items are found.
+    """
+
+    def __init__(self):
+        self._root = _Node()
+        self._names: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def get(self, item_id: str) -> Optional[dict]:
+        with self._lock:
+            name = self._names.get(item_id)
+            return None if name is None else self._find(name).items.get(item_id)
+
+    def upsert(self, item_id: str, name: str, item: dict) -> None:
+        """Insert an item, replacing any previous entry for its ID"""
+        with self._lock:
+            self._remove(item_id)
+            node = self._root
+            for char in normalize_name(name):
+                node = node.children.setdefault(char, _Node())
+            node.items[item_id] = item
+            self._names[item_id] = normalize_name(name)
+
+    def remove(self, item_id: str) -> None:
+        with self._lock:
+            self._remove(item_id)
+
+    def search(self, prefix: str, limit: int) -> List[dict]:
+        """Items whose normalized name starts with `prefix`, sorted by name"""
+        results = []
+        with self._lock:
+            node = self._find(normalize_name(prefix))
+            if node is None:
+                return results
+            stack = [node]
+            while stack and len(results) < limit:
+                node = stack.pop()
+                results.extend(sorted(node.items.values(), key=lambda item: item["id"])[:limit - len(results)])
+                stack.extend(node.children[char] for char in sorted(node.children, reverse=True))
+        return results
+
+    def _find(self, name: str) -> Optional[_Node]:
+        node = self._root
+        for char in name:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def _remove(self, item_id: str) -> None:
+        name = self._names.pop(item_id, None)
+        if name is None:
+            return
+        path = [self._root]
+        for char in name:
+            path.append(path[-1].children[char])
+        del path[-1].items[item_id]
+        # Prune branches left empty
+        for depth in range(len(name), 0, -1):
+            node = path[depth]
+            if node.items or node.children:
+                break
+            del path[depth - 1].children[name[depth - 1]]
@@ -0,0 +1,98 @@
+"""
+Benchmark shift list response formats
+
+Compares the current JSON path (entity -> dict -> timezone conversion ->
+response model) against the columnar MessagePack and Arrow encoders, with
+and without compression. Runs fully in memory, no Datastore needed.
+
+Usage:
+    python -m benchmarks.bench_formats [--shifts 50000] [--workers 500]
+"""
+
+import argparse
+import gzip
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from google.cloud import datastore
+from pydantic import TypeAdapter
+
+from app.core.datastore import KIND_SHIFT
+from app.models.entities import ShiftEntity
+from app.models.schemas import Shift
+from app.utils.serialization import ARROW_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, encode_shift_pages
+from app.utils.timezone import apply_timezone_to_shifts
+
+PAGE_SIZE = 300
+TIMEZONE = "America/New_York"
+
+
+def make_entities(count: int, workers: int) -> List[datastore.Entity]:
+    """Build synthetic shift entities"""
+    base = datetime(2024, 1, 1, 8)
+    now = datetime.utcnow()
+    entities = []
+    for i in range(count):
+        key = datastore.Key(KIND_SHIFT, f"shift-{i:08d}", project="bench")
+        entity = datastore.Entity(key=key)
+        start = base + timedelta(hours=9 * i)
+        entity.update({
+            "worker_id": f"worker-{i % workers:05d}",
+            "start": start.isoformat() + "Z",
+            "end": (start + timedelta(hours=8)).isoformat() + "Z",
+            "created_at": now,
+            "updated_at": now,
+        })
+        entities.append(entity)
+    return entities
+
+
+def pages(entities: List[datastore.Entity]):
+    for i in range(0, len(entities), PAGE_SIZE):
+        yield entities[i:i + PAGE_SIZE]
+
+
+def encode_json(entities: List[datastore.Entity]) -> bytes:
+    shifts = [ShiftEntity.to_dict(entity) for entity in entities]
+    shifts = apply_timezone_to_shifts(shifts, TIMEZONE)
+    # FastAPI validates against the response model before serializing
+    adapter = TypeAdapter(List[Shift])
+    return adapter.dump_json(adapter.validate_python(shifts))
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--shifts", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, default=500)
+    args = parser.parse_args()
+
+    entities = make_entities(args.shifts, args.workers)
+    encoders = {
+        "json": encode_json,
+        "msgpack": lambda e: b"".join(encode_shift_pages(pages(e), MSGPACK_MEDIA_TYPE, TIMEZONE)),
+        "arrow": lambda e: b"".join(encode_shift_pages(pages(e), ARROW_MEDIA_TYPE, TIMEZONE)),
+    }
+
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+
+    print(f"{args.shifts} shifts, {args.workers} workers")
+    print(f"{'format':<10}{'encode ms':>12}{'bytes':>12}{'gzip':>12}{'br':>12}")
+    for name, encode in encoders.items():
+        body, elapsed = timed(encode, entities)
+        gzipped = len(gzip.compress(body, 6))
+        brotlied = len(brotli.compress(body, quality=5)) if brotli else "-"
+        print(f"{name:<10}{elapsed:>12.1f}{len(body):>12}{gzipped:>12}{brotlied:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark hedged lookups
+
+Runs lookups through ResilientDatastoreApi against a simulated backend with
+a heavy latency tail (most calls are fast, a few stall), with and without
+hedging, and prints the latency percentiles the resilience metrics report.
+With hedging on, `lookup.primary` is the latency of the first attempt
+alone, i.e. what callers would have seen without hedging.
+
+Usage:
+    python -m benchmarks.bench_hedging [--lookups 2000] [--hedge-after-ms 10] [--slow-rate 0.02]
+"""
+
+import argparse
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.resilience import CircuitBreaker, LatencyRecorder, ResilientDatastoreApi
+
+
+class SimulatedApi:
+    """Lookups taking a few milliseconds, with a slow tail"""
+
+    def __init__(self, fast_ms: float, slow_ms: float, slow_rate: float):
+        self.fast_ms = fast_ms
+        self.slow_ms = slow_ms
+        self.slow_rate = slow_rate
+
+    def lookup(self, request=None, retry=None, timeout=None):
+        if random.random() < self.slow_rate:
+            delay = self.slow_ms * random.uniform(0.5, 1.5)
+        else:
+            delay = random.lognormvariate(0, 0.3) * self.fast_ms
+        time.sleep(delay / 1000.0)
+        return {}
+
+
+def run(api: ResilientDatastoreApi, lookups: int, concurrency: int) -> None:
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda _: api.lookup(request={}), range(lookups)))
+
+
+def report(label: str, snapshot: dict) -> None:
+    print(label)
+    for operation, entry in snapshot.items():
+        percentiles = ", ".join(f"{name} {entry[name]:.1f}" for name in ("p50_ms", "p95_ms", "p99_ms", "max_ms") if name in entry)
+        counts = ", ".join(f"{name} {entry[name]}" for name in ("calls", "hedges", "hedge_wins") if name in entry)
+        print(f"  {operation:<15} {percentiles}  ({counts})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--fast-ms", type=float, default=3)
+    parser.add_argument("--slow-ms", type=float, default=150)
+    parser.add_argument("--slow-rate", type=float, default=0.02)
+    parser.add_argument("--hedge-after-ms", type=float, default=10)
+    args = parser.parse_args()
+
+    backend = SimulatedApi(args.fast_ms, args.slow_ms, args.slow_rate)
+    for label, hedge_after in (("without hedging", 0.0), (f"hedging after {args.hedge_after_ms:g} ms", args.hedge_after_ms)):
+        api = ResilientDatastoreApi(
+            backend, metrics=LatencyRecorder(window=args.lookups * 2),
+            breaker=CircuitBreaker(threshold=0, reset_seconds=0), hedge_after=hedge_after / 1000.0,
+        )
+        run(api, args.lookups, args.concurrency)
+        api.close()
+        report(label, api.metrics.snapshot())
+
+
+if __name__ == "__main__":
+    main()
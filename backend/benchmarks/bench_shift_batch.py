@@ -0,0 +1,126 @@
+"""
+Benchmark in-process shift representations
+
+Compares holding a shift list as dicts (ShiftEntity.to_dict, then the
+converted copies from apply_timezone_to_shifts) against a columnar
+ShiftBatch, for memory retained and for the time to load, convert to the
+timezone and aggregate into a worker x day grid. Entities are generated one
+at a time, like query pages, so neither side pays for holding them.
+Runs fully in memory, no Datastore needed.
+
+Usage:
+    python -m benchmarks.bench_shift_batch [--shifts 1000000] [--workers 2000]
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Iterator
+
+from google.cloud import datastore
+
+from app.core.datastore import KIND_SHIFT
+from app.models.entities import ShiftEntity
+from app.models.records import ShiftBatch, ShiftRecord
+from app.utils.grid import build_grid
+from app.utils.timezone import apply_timezone_to_shifts, parse_iso_datetime
+
+TIMEZONE = "America/New_York"
+BASE = datetime(2031, 1, 1, 8, tzinfo=timezone.utc)
+
+
+def make_entities(count: int, workers: int) -> Iterator[datastore.Entity]:
+    """Synthetic shift entities, one per worker and day in turn"""
+    now = datetime.now(timezone.utc)
+    for i in range(count):
+        entity = datastore.Entity(key=datastore.Key(KIND_SHIFT, f"{i:08x}-0000-4000-8000-000000000000", project="bench"))
+        start = BASE + timedelta(days=i // workers, minutes=(i % workers) % 96 * 15)
+        entity.update({
+            "worker_id": f"worker-{i % workers:05d}-0000-4000-8000-000000000000",
+            "start": start.isoformat().replace("+00:00", "Z"),
+            "end": (start + timedelta(hours=8)).isoformat().replace("+00:00", "Z"),
+            "created_at": now,
+            "updated_at": now,
+        })
+        yield entity
+
+
+def load_dicts(count: int, workers: int):
+    shifts = [ShiftEntity.to_dict(entity) for entity in make_entities(count, workers)]
+    return shifts, apply_timezone_to_shifts(shifts, TIMEZONE)
+
+
+def load_batch(count: int, workers: int) -> ShiftBatch:
+    batch = ShiftBatch()
+    for entity in make_entities(count, workers):
+        batch.append(ShiftRecord.from_entity(entity))
+    return batch
+
+
+def retained_mb(fn, *args):
+    """Memory still allocated by fn's result, in MB"""
+    gc.collect()
+    tracemalloc.start()
+    result = fn(*args)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    gc.collect()
+    return current / 1e6
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def dict_grid(shifts, window_start, window_end):
+    """The aggregation the dict representation needs: parse every row's strings"""
+    hours = defaultdict(float)
+    for shift in shifts:
+        start = max(parse_iso_datetime(shift["start"]), window_start)
+        end = min(parse_iso_datetime(shift["end"]), window_end)
+        if end > start:
+            hours[shift["worker_id"]] += (end - start).total_seconds() / 3600.0
+    return hours
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--shifts", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, default=2000)
+    args = parser.parse_args()
+    print(f"{args.shifts} shifts, {args.workers} workers")
+
+    # Entity generation alone, to subtract from load times
+    _, generate = timed(lambda: sum(1 for _ in make_entities(args.shifts, args.workers)))
+
+    dict_mb = retained_mb(load_dicts, args.shifts, args.workers)
+    batch_mb = retained_mb(load_batch, args.shifts, args.workers)
+    print(f"\n{'retained memory':<28}{'MB':>10}{'bytes/shift':>14}")
+    print(f"{'dicts + converted copies':<28}{dict_mb:>10.1f}{dict_mb * 1e6 / args.shifts:>14.0f}")
+    print(f"{'ShiftBatch':<28}{batch_mb:>10.1f}{batch_mb * 1e6 / args.shifts:>14.0f}")
+
+    (shifts, converted), dict_load = timed(load_dicts, args.shifts, args.workers)
+    batch, batch_load = timed(load_batch, args.shifts, args.workers)
+    _, batch_convert = timed(batch.to_dicts, TIMEZONE)
+
+    window_start = BASE
+    window_end = BASE + timedelta(days=31)
+    _, dict_aggregate = timed(dict_grid, shifts, window_start, window_end)
+    _, batch_aggregate = timed(build_grid, batch, window_start, window_end, TIMEZONE)
+
+    print(f"\n{'seconds':<28}{'dicts':>10}{'batch':>10}")
+    # The dict side converts to the timezone while loading, the batch side when encoding
+    print(f"{'load from entities':<28}{dict_load - generate:>10.2f}{batch_load - generate:>10.2f}")
+    print(f"{'dicts at the response edge':<28}{'-':>10}{batch_convert:>10.2f}")
+    print(f"{'aggregate 31 days':<28}{dict_aggregate:>10.2f}{batch_aggregate:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark delete and rename write paths
+
+Compares the original paths (get + put for renames, get + delete for
+deletes) with WorkerService's writes, which refuse deleted workers and
+leave tombstones in a transaction begun by their lookup, counting Datastore
+RPCs and measuring latency per operation. Needs the Datastore emulator (or
+a real project); data is written to a throwaway namespace.
+
+Usage:
+    DATASTORE_EMULATOR_HOST=localhost:8081 python -m benchmarks.bench_write_paths [--ops 200]
+"""
+
+import argparse
+import statistics
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+
+from app.core.datastore import get_datastore_client, KIND_WORKER
+from app.services.worker_service import WorkerService
+
+NAMESPACE = "bench-write-paths"
+
+
+def count_rpcs(client) -> Counter:
+    """Wrap the client's API methods to count RPCs by name"""
+    api = client._datastore_api
+    counts = Counter()
+    for name in ("lookup", "commit", "run_query", "begin_transaction"):
+        method = getattr(api, name)
+
+        def counted(*args, _name=name, _method=method, **kwargs):
+            counts[_name] += 1
+            return _method(*args, **kwargs)
+
+        setattr(api, name, counted)
+    return counts
+
+
+def legacy_rename(service: WorkerService, worker_id: str) -> None:
+    """Rename as originally written: read the entity, then write it back whole"""
+    key = service.client.key(KIND_WORKER, worker_id)
+    entity = service.client.get(key)
+    entity.update({"name": "Renamed", "updated_at": datetime.utcnow()})
+    service.client.put(entity)
+
+
+def legacy_delete(service: WorkerService, worker_id: str) -> None:
+    """Delete as originally written: read the entity, then delete it outright"""
+    key = service.client.key(KIND_WORKER, worker_id)
+    if service.client.get(key) is not None:
+        service.client.delete(key)
+
+
+def run(label: str, operation, service: WorkerService, counts: Counter, ops: int) -> None:
+    worker_ids = [service.create_worker(f"Bench {i}")["id"] for i in range(ops)]
+    counts.clear()
+    latencies = []
+    for worker_id in worker_ids:
+        started = time.perf_counter()
+        operation(service, worker_id)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    rpcs = sum(counts.values()) / ops
+    detail = ", ".join(f"{name}={count / ops:g}" for name, count in sorted(counts.items()))
+    print(
+        f"{label:<16}{rpcs:>8.2f}{statistics.mean(latencies):>10.2f}"
+        f"{latencies[len(latencies) // 2]:>10.2f}{latencies[int(len(latencies) * 0.99) - 1]:>10.2f}  {detail}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--ops", type=int, default=200)
+    args = parser.parse_args()
+
+    service = WorkerService(namespace=f"{NAMESPACE}-{uuid.uuid4().hex[:8]}")
+    counts = count_rpcs(get_datastore_client())
+
+    print(f"{'path':<16}{'rpc/op':>8}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    run("rename before", legacy_rename, service, counts, args.ops)
+    run("rename after", lambda s, w: s.update_worker(w, "Renamed"), service, counts, args.ops)
+    run("delete before", legacy_delete, service, counts, args.ops)
+    run("delete after", lambda s, w: s.delete_worker(w), service, counts, args.ops)
+
+
+if __name__ == "__main__":
+    main()
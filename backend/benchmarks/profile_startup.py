@@ -0,0 +1,127 @@
+"""
+Profile application cold start
+
+Reports:
+  - `python -X importtime` totals for `app.main` and the slowest modules
+  - time from process start until `/health` answers (time-to-first-response)
+  - latency of the first API request, which constructs the services
+
+Exits non-zero when a budget is given and exceeded, so cold-start
+regressions can fail CI.
+
+Usage:
+    python -m benchmarks.profile_startup [--top 15] [--budget-ms 2000]
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def profile_imports(module: str, top: int) -> int:
+    """Print import time totals for a module, returns its cumulative time in microseconds"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us), int(cumulative_us), name.strip()))
+
+    total = next(cumulative for _, cumulative, name in rows if name == module)
+    print(f"import {module}: {total / 1000:.1f} ms cumulative, {len(rows)} modules")
+    print(f"  {'self ms':>9} {'cumul ms':>9}  module")
+    for self_us, cumulative_us, name in sorted(rows, reverse=True)[:top]:
+        print(f"  {self_us / 1000:>9.1f} {cumulative_us / 1000:>9.1f}  {name}")
+    return total
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url: str, timeout: float) -> float:
+    """Poll a URL until it answers, returns the time it took"""
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        try:
+            with urllib.request.urlopen(url, timeout=1):
+                return time.perf_counter() - started
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.01)
+    raise TimeoutError(f"{url} did not answer within {timeout}s")
+
+
+def timed_request(url: str):
+    """Return (status, seconds) for a single GET"""
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=30) as response:
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return status, time.perf_counter() - started
+
+
+def profile_first_response(timeout: float) -> float:
+    """Start uvicorn and measure time to the first /health response, returns milliseconds"""
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, WARMUP_SERVICES=os.environ.get("WARMUP_SERVICES", "true"))
+
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    try:
+        wait_for(f"{base}/health", timeout)
+        first_response = time.perf_counter() - started
+        print(f"time to first /health response: {first_response * 1000:.1f} ms")
+
+        status, elapsed = timed_request(f"{base}/api/timezone")
+        print(f"first GET /api/timezone: {elapsed * 1000:.1f} ms (HTTP {status})")
+        status, elapsed = timed_request(f"{base}/api/timezone")
+        print(f"second GET /api/timezone: {elapsed * 1000:.1f} ms (HTTP {status})")
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+    return first_response * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest modules to list")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for the server")
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="Fail if time to first response exceeds this")
+    args = parser.parse_args()
+
+    profile_imports("app.main", args.top)
+    print()
+    first_response_ms = profile_first_response(args.timeout)
+
+    if args.budget_ms is not None and first_response_ms > args.budget_ms:
+        print(f"FAIL: time to first response {first_response_ms:.1f} ms exceeds budget {args.budget_ms:.1f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+"""
+Replay captured traffic against a local instance
+
+Reads a capture written by the traffic capture middleware
+(TRAFFIC_CAPTURE_PATH, see app/core/traffic.py) and sends the same mix of
+requests again, with the captured arrival times divided by --speed, at most
+--concurrency at a time. Captures hold shapes only, so bodies and IDs are
+synthesized: each captured tenant is replayed into a fresh tenant seeded
+with workers. Shifts and workers created during the replay are reused by
+later reads, updates and deletes. Shifts are placed in free future slots per
+worker, so writes pass the labor rules unless they are turned up.
+
+Without a capture, --synthesize builds one with a given rate and share of
+shift writes, for sizing the /api/shifts write path before real traffic
+exists.
+
+Requests go to a running instance with --url (e.g. uvicorn against the
+Datastore emulator), or to app.main:app in-process by default, which also
+needs DATASTORE_EMULATOR_HOST. Reports throughput, error rate and latency
+percentiles per route. Errors are 5xx responses and failed connections;
+4xx responses are counted separately.
+
+Usage:
+    python -m benchmarks.replay_traffic traffic.jsonl [--speed 10] [--concurrency 32] [--url http://localhost:8080]
+    python -m benchmarks.replay_traffic --synthesize 5000 --rate 200 --write-ratio 0.5 [--save traffic.jsonl]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import httpx
+
+from app.core.tenancy import TENANT_HEADER
+
+SHIFT_HOURS = 8
+# Far enough ahead that replayed shifts never meet real ones or each other's rest windows
+SLOT_BASE = datetime(2040, 1, 5, 8, tzinfo=timezone.utc)
+
+
+def read_capture(path: str) -> List[dict]:
+    """Capture lines ordered by arrival"""
+    with open(path) as source:
+        records = [json.loads(line) for line in source if line.strip()]
+    return sorted(records, key=lambda record: record["t"])
+
+
+def synthesize(count: int, rate: float, write_ratio: float, tenants: int = 1, seed: int = 0) -> List[dict]:
+    """
+    Capture-format records with Poisson arrivals at `rate` per second.
+    Writes are shift creates, updates and deletes; reads are shift lists,
+    single shifts, worker lists and schedule grids.
+    """
+    rng = random.Random(seed)
+    writes = [("POST", "/api/shifts", 6), ("PUT", "/api/shifts/{shift_id}", 3), ("DELETE", "/api/shifts/{shift_id}", 1)]
+    reads = [("GET", "/api/shifts", 5), ("GET", "/api/shifts/{shift_id}", 2), ("GET", "/api/workers", 2),
+             ("GET", "/api/schedule/grid", 1)]
+    records = []
+    t = 0.0
+    for _ in range(count):
+        t += rng.expovariate(rate)
+        mix = writes if rng.random() < write_ratio else reads
+        method, route, _ = rng.choices(mix, weights=[weight for *_, weight in mix])[0]
+        record = {"t": round(t, 4), "method": method, "route": route, "query": [], "tenant": f"t{rng.randrange(tenants)}"}
+        if route == "/api/shifts" and method == "GET":
+            record["query"] = ["from", "to"]
+            record["window_hours"] = 168.0
+        records.append(record)
+    return records
+
+
+@dataclass
+class Request:
+    method: str
+    url: str
+    tenant: str
+    params: Dict[str, str] = field(default_factory=dict)
+    body: Optional[dict] = None
+
+
+class TenantState:
+    """Entities a replay tenant is known to have"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.workers: List[str] = []
+        self.created_workers: List[str] = []
+        # shift ID -> (worker ID, start)
+        self.shifts: Dict[str, tuple] = {}
+        self.next_slot: Dict[str, datetime] = {}
+
+
+class RequestFactory:
+    """Turns captured request shapes into concrete requests for replay tenants"""
+
+    def __init__(self, run_id: str, seed: int = 0):
+        self.run_id = run_id
+        self.rng = random.Random(seed)
+        self.tenants: Dict[str, TenantState] = {}
+
+    def tenant(self, captured: str) -> TenantState:
+        state = self.tenants.get(captured)
+        if state is None:
+            state = self.tenants[captured] = TenantState(f"replay-{self.run_id}-{len(self.tenants)}")
+        return state
+
+    def _slot(self, state: TenantState, worker_id: str) -> datetime:
+        """Next free shift start of a worker, one per day"""
+        start = state.next_slot.get(worker_id, SLOT_BASE)
+        state.next_slot[worker_id] = start + timedelta(days=1)
+        return start
+
+    def _window(self, record: dict) -> Dict[str, str]:
+        start = SLOT_BASE + timedelta(days=self.rng.randrange(30))
+        hours = record.get("window_hours") or 168.0
+        return {"from": start.isoformat(), "to": (start + timedelta(hours=hours)).isoformat()}
+
+    def build(self, record: dict) -> Optional[Request]:
+        """A request of the captured shape, None if the tenant has nothing it could target"""
+        state = self.tenant(record.get("tenant", ""))
+        method, route, query = record["method"], record["route"], set(record.get("query") or ())
+
+        def request(url: str, **kwargs) -> Request:
+            return Request(method, url, state.name, **kwargs)
+
+        if route.startswith("/api/shifts"):
+            return self._shift_request(state, method, route, query, record, request)
+        if route.startswith("/api/workers"):
+            return self._worker_request(state, method, route, query, request)
+        if route == "/api/schedule/grid" and method == "GET":
+            return request(route, params=self._window(record) if "from" in query else {})
+        if method == "GET" and "{" not in route:
+            return request(route)
+        return None
+
+    def _shift_request(self, state, method, route, query, record, request) -> Optional[Request]:
+        if route == "/api/shifts":
+            if method == "POST":
+                if not state.workers:
+                    return None
+                worker_id = self.rng.choice(state.workers)
+                start = self._slot(state, worker_id)
+                end = start + timedelta(hours=SHIFT_HOURS)
+                return request(route, body={"worker_id": worker_id, "start": start.isoformat(), "end": end.isoformat()})
+            params = self._window(record) if "from" in query or "to" in query else {}
+            if "worker_id" in query and state.workers:
+                params["worker_id"] = self.rng.choice(state.workers)
+            return request(route, params=params)
+        if not state.shifts:
+            return None
+        shift_id = self.rng.choice(list(state.shifts))
+        url = f"/api/shifts/{shift_id}"
+        if method == "DELETE":
+            # Forget it now so no later request is built for it
+            del state.shifts[shift_id]
+            return request(url)
+        if method == "PUT":
+            worker_id, start = state.shifts[shift_id]
+            end = start + timedelta(hours=SHIFT_HOURS - 1)
+            return request(url, body={"worker_id": worker_id, "start": start.isoformat(), "end": end.isoformat()})
+        return request(url)
+
+    def _worker_request(self, state, method, route, query, request) -> Optional[Request]:
+        if route == "/api/workers":
+            if method == "POST":
+                return request(route, body={"name": f"Replay Worker {self.rng.randrange(10 ** 6)}"})
+            params = {"q": "Replay"} if "q" in query else {}
+            return request(route, params=params)
+        # Only workers created by the replay are deleted, seeded ones keep the shift writes going
+        pool = state.created_workers if method == "DELETE" else state.workers
+        if not pool:
+            return None
+        worker_id = self.rng.choice(pool)
+        if method == "DELETE":
+            pool.remove(worker_id)
+            state.workers.remove(worker_id)
+        body = {"name": f"Replay Worker {self.rng.randrange(10 ** 6)}"} if method == "PUT" else None
+        return request(f"/api/workers/{worker_id}", body=body)
+
+    def observe(self, request: Request, response: httpx.Response) -> None:
+        """Remember what a successful create made"""
+        if request.method != "POST" or response.status_code != 201:
+            return
+        state = next(state for state in self.tenants.values() if state.name == request.tenant)
+        created = response.json()
+        if request.url == "/api/shifts":
+            state.shifts[created["id"]] = (created["worker_id"], datetime.fromisoformat(request.body["start"]))
+        elif request.url == "/api/workers":
+            state.workers.append(created["id"])
+            state.created_workers.append(created["id"])
+
+
+class RouteStats:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.client_errors = 0
+        self.skipped = 0
+
+    def percentile(self, q: float) -> float:
+        values = sorted(self.latencies)
+        return values[min(len(values) - 1, int(q * len(values)))] * 1000 if values else 0.0
+
+
+class Report:
+    """Per-route results of a replay"""
+
+    def __init__(self):
+        self.routes: Dict[str, RouteStats] = defaultdict(RouteStats)
+        self.elapsed = 0.0
+        self.max_lag = 0.0
+
+    def add(self, route: str, status: Optional[int], seconds: float) -> None:
+        stats = self.routes[route]
+        stats.latencies.append(seconds)
+        if status is None or status >= 500:
+            stats.errors += 1
+        elif status >= 400:
+            stats.client_errors += 1
+
+    def summary(self) -> dict:
+        routes = {}
+        for route, stats in sorted(self.routes.items()):
+            count = len(stats.latencies)
+            routes[route] = {
+                "requests": count,
+                "rps": round(count / self.elapsed, 1) if self.elapsed else 0.0,
+                "error_rate": round(stats.errors / count, 4) if count else 0.0,
+                "4xx": stats.client_errors,
+                "skipped": stats.skipped,
+                "p50_ms": round(stats.percentile(0.50), 2),
+                "p95_ms": round(stats.percentile(0.95), 2),
+                "p99_ms": round(stats.percentile(0.99), 2),
+                "max_ms": round(max(stats.latencies, default=0.0) * 1000, 2),
+            }
+        total = sum(len(stats.latencies) for stats in self.routes.values())
+        errors = sum(stats.errors for stats in self.routes.values())
+        return {
+            "elapsed_seconds": round(self.elapsed, 2),
+            "requests": total,
+            "rps": round(total / self.elapsed, 1) if self.elapsed else 0.0,
+            "error_rate": round(errors / total, 4) if total else 0.0,
+            # How far dispatch fell behind the captured schedule; growing lag means the target is saturated
+            "max_lag_seconds": round(self.max_lag, 2),
+            "routes": routes,
+        }
+
+    def print(self) -> None:
+        summary = self.summary()
+        print(f"{summary['requests']} requests in {summary['elapsed_seconds']}s: {summary['rps']} req/s, "
+              f"error rate {summary['error_rate']:.2%}, max lag {summary['max_lag_seconds']}s\n")
+        print(f"{'route':<36}{'reqs':>7}{'req/s':>8}{'err%':>7}{'4xx':>6}{'skip':>6}"
+              f"{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+        for route, stats in summary["routes"].items():
+            print(f"{route:<36}{stats['requests']:>7}{stats['rps']:>8}{stats['error_rate'] * 100:>7.2f}"
+                  f"{stats['4xx']:>6}{stats['skipped']:>6}{stats['p50_ms']:>9}{stats['p95_ms']:>9}"
+                  f"{stats['p99_ms']:>9}{stats['max_ms']:>9}")
+
+
+async def seed(client: httpx.AsyncClient, factory: RequestFactory, records: List[dict], workers: int) -> None:
+    """Create each replay tenant's workers before the clock starts"""
+    for captured in sorted({record.get("tenant", "") for record in records}):
+        state = factory.tenant(captured)
+        for i in range(workers):
+            response = await client.post("/api/workers", json={"name": f"Replay Seed {i}"},
+                                         headers={TENANT_HEADER: state.name})
+            response.raise_for_status()
+            state.workers.append(response.json()["id"])
+
+
+async def replay(client: httpx.AsyncClient, records: List[dict], speed: float = 1.0, concurrency: int = 16,
+                 seed_workers: int = 20, seed_value: int = 0) -> Report:
+    """
+    Send the records' requests through `client`. With speed 0 requests are
+    sent as fast as `concurrency` allows, ignoring captured arrival times.
+    """
+    factory = RequestFactory(uuid.uuid4().hex[:8], seed_value)
+    await seed(client, factory, records, seed_workers)
+    report = Report()
+    limit = asyncio.Semaphore(concurrency)
+
+    async def send(route: str, request: Request) -> None:
+        try:
+            started = time.perf_counter()
+            try:
+                response = await client.request(request.method, request.url, params=request.params,
+                                                 json=request.body, headers={TENANT_HEADER: request.tenant})
+            except httpx.HTTPError:
+                report.add(route, None, time.perf_counter() - started)
+                return
+            report.add(route, response.status_code, time.perf_counter() - started)
+            factory.observe(request, response)
+        finally:
+            limit.release()
+
+    tasks = []
+    started = time.perf_counter()
+    for record in records:
+        route = f"{record['method']} {record['route']}"
+        if speed > 0:
+            delay = record["t"] / speed - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        await limit.acquire()
+        if speed > 0:
+            report.max_lag = max(report.max_lag, time.perf_counter() - started - record["t"] / speed)
+        request = factory.build(record)
+        if request is None:
+            report.routes[route].skipped += 1
+            limit.release()
+            continue
+        tasks.append(asyncio.create_task(send(route, request)))
+    await asyncio.gather(*tasks)
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+def client_for(url: Optional[str], concurrency: int) -> httpx.AsyncClient:
+    """HTTP client for a running instance, or one calling app.main:app in-process"""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    if url:
+        return httpx.AsyncClient(base_url=url, limits=limits, timeout=30.0)
+    from app.main import app
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://replay", timeout=30.0)
+
+
+async def run(args) -> Report:
+    if args.capture:
+        records = read_capture(args.capture)
+    else:
+        records = synthesize(args.synthesize, args.rate, args.write_ratio, args.tenants, args.seed)
+        if args.save:
+            with open(args.save, "w") as out:
+                out.writelines(json.dumps(record) + "\n" for record in records)
+    async with client_for(args.url, args.concurrency) as client:
+        return await replay(client, records, args.speed, args.concurrency, args.seed_workers, args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("capture", nargs="?", help="Capture file written with TRAFFIC_CAPTURE_PATH")
+    parser.add_argument("--synthesize", type=int, default=0, help="Replay this many synthetic requests instead")
+    parser.add_argument("--rate", type=float, default=100.0, help="Synthetic arrivals per second")
+    parser.add_argument("--write-ratio", type=float, default=0.5, help="Share of synthetic requests writing shifts")
+    parser.add_argument("--tenants", type=int, default=1, help="Synthetic tenants")
+    parser.add_argument("--save", help="Also write the synthetic capture to this file")
+    parser.add_argument("--url", help="Base URL of a running instance; in-process app.main:app if omitted")
+    parser.add_argument("--speed", type=float, default=1.0, help="Speed-up of captured timing, 0 for no pacing")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight at most")
+    parser.add_argument("--seed-workers", type=int, default=20, help="Workers created per replay tenant")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+    if not args.capture and not args.synthesize:
+        parser.error("give a capture file or --synthesize N")
+
+    report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report.summary(), indent=2))
+    else:
+        report.print()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ Pytest configuration and fixtures
 
 import pytest
 import os
+
 from fastapi.testclient import TestClient
 from app.main import app
 
@@ -12,6 +13,19 @@ os.environ["DATASTORE_EMULATOR_HOST"] = "localhost:8081"
 os.environ["GCP_PROJECT_ID"] = "test-project"
 
 
+@pytest.fixture(autouse=True)
+def fresh_client_buckets():
+    """
+    Start each test with full client buckets. The whole suite runs as one
+    client, so the limiter stays on but its tokens are not carried over.
+    """
+    from app.core.admission import ClientRateLimiter, admission_controller
+    limiter = admission_controller.rate_limiter
+    admission_controller.rate_limiter = ClientRateLimiter(limiter.rate, limiter.burst, limiter.max_clients)
+    yield
+    admission_controller.rate_limiter = limiter
+
+
 @pytest.fixture
 def client():
     """Test client fixture"""
@@ -0,0 +1,118 @@
+"""
+Tests for admission control and load shedding
+"""
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.admission import (
+    READ,
+    SCAN,
+    WRITE,
+    AdmissionControlMiddleware,
+    AdmissionController,
+    ClassLimiter,
+    Shed,
+    classify_request,
+)
+from app.main import app
+
+
+def test_classify_request():
+    assert classify_request("GET", "/api/shifts") == SCAN
+    assert classify_request("GET", "/api/shifts", b"from=2031-01-01T00:00:00Z") == SCAN
+    assert classify_request("GET", "/api/shifts", b"worker_id=w1") == READ
+    assert classify_request("GET", "/api/schedule/grid") == SCAN
+    assert classify_request("GET", "/api/shifts/abc") == READ
+    assert classify_request("GET", "/api/timezone") == READ
+    assert classify_request("POST", "/api/schedule/auto-fill") == WRITE
+    assert classify_request("DELETE", "/api/workers/abc") == WRITE
+
+
+def test_limiter_queues_hands_over_and_sheds():
+    async def run():
+        limiter = ClassLimiter(max_concurrent=1, max_queue=1, queue_timeout=0.05)
+        assert await limiter.acquire() == 0.0
+
+        # A queued request gets the slot when it is released
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.queued == 1
+        with pytest.raises(Shed) as full:
+            await limiter.acquire()
+        assert full.value.reason == "queue_full"
+        limiter.release()
+        await waiter
+        assert (limiter.active, limiter.queued) == (1, 0)
+
+        # One still queued at the deadline is shed
+        with pytest.raises(Shed) as late:
+            await limiter.acquire()
+        assert late.value.reason == "timeout"
+        assert limiter.queued == 0
+        limiter.release()
+        assert limiter.active == 0
+
+    asyncio.run(run())
+
+
+def test_client_buckets_return_429():
+    controller = AdmissionController(client_rate=1.0, client_burst=5.0)
+    limited_app = FastAPI()
+
+    @limited_app.get("/api/shifts")
+    async def list_shifts():
+        return []
+
+    limited_app.add_middleware(AdmissionControlMiddleware, controller=controller)
+    client = TestClient(limited_app)
+
+    assert client.get("/api/shifts", headers={"X-Tenant-ID": "t1"}).status_code == 200
+    # A scan costs the whole burst
+    refused = client.get("/api/shifts", headers={"X-Tenant-ID": "t1"})
+    assert refused.status_code == 429
+    assert int(refused.headers["Retry-After"]) >= 1
+    # Other clients have their own bucket
+    assert client.get("/api/shifts", headers={"X-Tenant-ID": "t2"}).status_code == 200
+
+    scans = controller.snapshot()["classes"][SCAN]
+    assert scans["calls"] == 2
+    assert scans["rate_limited"] == 1
+    assert scans["in_flight"] == 0
+
+
+def test_clients_behind_one_proxy_get_separate_buckets():
+    controller = AdmissionController(client_rate=1.0, client_burst=5.0, trusted_proxy_hops=1)
+    limited_app = FastAPI()
+
+    @limited_app.get("/api/shifts")
+    async def list_shifts():
+        return []
+
+    limited_app.add_middleware(AdmissionControlMiddleware, controller=controller)
+    # Every request arrives from the same proxy peer
+    client = TestClient(limited_app)
+
+    def scan(forwarded_for):
+        return client.get("/api/shifts", headers={"X-Tenant-ID": "t1", "X-Forwarded-For": forwarded_for})
+
+    assert scan("203.0.113.1").status_code == 200
+    assert scan("203.0.113.2").status_code == 200
+    assert scan("203.0.113.1").status_code == 429
+    # Entries a client prepends itself are not trusted
+    assert scan("198.51.100.9, 203.0.113.2").status_code == 429
+    assert controller.snapshot()["tracked_clients"] == 2
+
+
+def test_ready_and_metrics_endpoints():
+    client = TestClient(app)
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ready"}
+
+    classes = client.get("/metrics/admission").json()["classes"]
+    assert set(classes) == {READ, SCAN, WRITE}
+    assert classes[SCAN]["max_concurrent"] >= 1
@@ -0,0 +1,162 @@
+"""
+Tests for background job endpoints
+"""
+
+import time
+import uuid
+from datetime import datetime, timedelta
+
+
+def wait_for_job(client, job_id, headers, timeout=10):
+    """Poll a job until it finishes"""
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(f"/api/jobs/{job_id}", headers=headers).json()
+        if job["status"] in ("succeeded", "failed", "cancelled") or time.monotonic() > deadline:
+            return job
+        time.sleep(0.05)
+
+
+def test_cascade_delete_job(client):
+    """Test that a cascade delete job removes the worker and their shifts"""
+    headers = {"X-Tenant-ID": f"jobs-{uuid.uuid4().hex[:8]}"}
+    worker_id = client.post("/api/workers", json={"name": "Leaving Worker"}, headers=headers).json()["id"]
+    day = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=50)
+    for offset in range(3):
+        assert client.post("/api/shifts", headers=headers, json={
+            "worker_id": worker_id,
+            "start": (day + timedelta(days=offset, hours=9)).isoformat() + "Z",
+            "end": (day + timedelta(days=offset, hours=17)).isoformat() + "Z",
+        }).status_code == 201
+
+    response = client.post("/api/jobs", headers=headers, json={
+        "type": "cascade_delete_worker", "params": {"worker_id": worker_id},
+    })
+    assert response.status_code == 202
+    assert response.json()["status"] == "queued"
+
+    job = wait_for_job(client, response.json()["id"], headers)
+    assert job["status"] == "succeeded"
+    assert job["result"] == {"worker_id": worker_id, "shifts_deleted": 3}
+    assert client.get(f"/api/workers/{worker_id}", headers=headers).status_code == 404
+    assert client.get("/api/shifts", headers=headers, params={"worker_id": worker_id}).json() == []
+
+    # Finished jobs can't be cancelled any more
+    assert client.post(f"/api/jobs/{job['id']}/cancel", headers=headers).json()["status"] == "succeeded"
+
+
+def test_backfill_worker_names_job(client, monkeypatch):
+    """Test that workers stored without name_lower are found by range query searches after the backfill"""
+    from app.core.config import settings
+    from app.core.datastore import get_datastore_client, KIND_WORKER
+    monkeypatch.setattr(settings, "WORKER_SEARCH_INDEX", False)
+
+    tenant = f"jobs-{uuid.uuid4().hex[:8]}"
+    headers = {"X-Tenant-ID": tenant}
+    worker_ids = [
+        client.post("/api/workers", json={"name": name}, headers=headers).json()["id"]
+        for name in ("Legacy Worker", "Legacy\U0001F600 Worker")
+    ]
+    datastore_client = get_datastore_client(tenant)
+    entity = datastore_client.get(datastore_client.key(KIND_WORKER, worker_ids[0]))
+    del entity["name_lower"]
+    datastore_client.put(entity)
+    assert [w["id"] for w in client.get("/api/workers", headers=headers, params={"q": "legacy"}).json()] == [worker_ids[1]]
+
+    job_id = client.post("/api/jobs", headers=headers, json={"type": "backfill_worker_names"}).json()["id"]
+    job = wait_for_job(client, job_id, headers)
+    assert job["status"] == "succeeded"
+    assert job["result"] == {"updated": 1}
+    found = client.get("/api/workers", headers=headers, params={"q": "legacy"}).json()
+    assert sorted(w["id"] for w in found) == sorted(worker_ids)
+
+
+def test_normalize_shift_times_job(client):
+    """Test that shifts stored in other ISO 8601 forms are rewritten and then checked for overlaps"""
+    from app.core.datastore import get_datastore_client, KIND_SHIFT
+
+    tenant = f"jobs-{uuid.uuid4().hex[:8]}"
+    headers = {"X-Tenant-ID": tenant}
+    worker_id = client.post("/api/workers", json={"name": "Legacy Shift Worker"}, headers=headers).json()["id"]
+    shift_id = client.post("/api/shifts", headers=headers, json={
+        "worker_id": worker_id, "start": "2040-07-01T09:00:00Z", "end": "2040-07-01T17:00:00Z",
+    }).json()["id"]
+    datastore_client = get_datastore_client(tenant)
+    entity = datastore_client.get(datastore_client.key(KIND_SHIFT, shift_id))
+    entity.update({"start": "2040-07-01 11:00:00+02:00", "end": "2040-07-01 19:00:00+02:00"})
+    datastore_client.put(entity)
+
+    job_id = client.post("/api/jobs", headers=headers, json={"type": "normalize_shift_times"}).json()["id"]
+    job = wait_for_job(client, job_id, headers)
+    assert job["status"] == "succeeded"
+    assert job["result"] == {"rewritten": 1}
+    entity = datastore_client.get(datastore_client.key(KIND_SHIFT, shift_id))
+    assert (entity["start"], entity["end"]) == ("2040-07-01T09:00:00Z", "2040-07-01T17:00:00Z")
+    assert client.post("/api/shifts", headers=headers, json={
+        "worker_id": worker_id, "start": "2040-07-01T12:00:00Z", "end": "2040-07-01T13:00:00Z",
+    }).status_code == 400
+
+
+def test_job_validation(client):
+    """Test that unknown job types and invalid params are rejected"""
+    assert client.post("/api/jobs", json={"type": "unknown"}).status_code == 400
+    assert client.post("/api/jobs", json={"type": "cascade_delete_worker", "params": {}}).status_code == 400
+    assert client.get("/api/jobs/missing").status_code == 404
+    assert client.post("/api/jobs/missing/cancel").status_code == 404
+
+
+def test_job_cancellation():
+    """Test that a running job stops at its next progress report once cancelled"""
+    import threading
+    from app.core.dependencies import registry
+    from app.core.jobs import JobHandler, JobRunner
+
+    started = threading.Event()
+
+    def wait_forever(ctx, params):
+        started.set()
+        done = 0
+        while True:
+            ctx.progress(done)
+            done += 1
+            time.sleep(0.01)
+
+    runner = JobRunner(registry, {"wait": JobHandler(wait_forever)}, max_workers=1, max_pending=1)
+    job = runner.submit("", "wait")
+    assert started.wait(5)
+    assert runner.cancel("", job["id"])["cancel_requested"]
+
+    deadline = time.monotonic() + 5
+    while runner.get("", job["id"])["status"] != "cancelled" and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert runner.get("", job["id"])["status"] == "cancelled"
+    runner.shutdown()
+
+
+def test_job_with_large_result():
+    """Test that results and errors over the 1500 byte limit of indexed strings are recorded"""
+    from app.core.dependencies import registry
+    from app.core.jobs import JobHandler, JobRunner
+
+    def large_result(ctx, params):
+        return {"unfilled_sample": [{"slot": i, "reason": "No worker available " * 4} for i in range(100)]}
+
+    def large_error(ctx, params):
+        raise ValueError("x" * 5000)
+
+    runner = JobRunner(registry, {"large": JobHandler(large_result), "fail": JobHandler(large_error)})
+    succeeded = runner.submit("", "large")
+    failed = runner.submit("", "fail")
+
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline and any(
+        runner.get("", job["id"])["status"] in ("queued", "running") for job in (succeeded, failed)
+    ):
+        time.sleep(0.05)
+    job = runner.get("", succeeded["id"])
+    assert job["status"] == "succeeded"
+    assert len(job["result"]["unfilled_sample"]) == 100
+    job = runner.get("", failed["id"])
+    assert job["status"] == "failed"
+    assert len(job["error"]) == 5000
+    runner.shutdown()
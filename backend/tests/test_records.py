@@ -0,0 +1,75 @@
+"""
+Tests for the compact shift representations
+"""
+
+from datetime import datetime, timezone
+
+from google.cloud import datastore
+
+from app.core.datastore import KIND_SHIFT
+from app.models.entities import ShiftEntity
+from app.models.records import ShiftBatch, ShiftRecord
+from app.utils.timezone import apply_timezone_to_shifts
+
+
+def make_entity(shift_id, worker_id, start, end, template_id=None):
+    entity = datastore.Entity(key=datastore.Key(KIND_SHIFT, shift_id, project="test"))
+    entity.update({
+        "worker_id": worker_id,
+        "start": start,
+        "end": end,
+        "created_at": datetime(2031, 1, 1, 12, tzinfo=timezone.utc),
+        "updated_at": datetime(2031, 1, 2, 12, 30, 15, 250000, tzinfo=timezone.utc),
+    })
+    if template_id:
+        entity["template_id"] = template_id
+    return entity
+
+
+def test_batch_matches_entity_dicts():
+    entities = [
+        make_entity("a", "w1", "2031-03-30T00:30:00Z", "2031-03-30T06:00:00Z"),
+        # Stored with an offset and sub-second precision
+        make_entity("b", "w2", "2031-03-29T23:00:00.500000+01:00", "2031-03-30T03:15:00+01:00", "t1"),
+        make_entity("c", "w1", "2031-10-26T00:00:00Z", "2031-10-26T02:00:00Z"),
+    ]
+    batch = ShiftBatch.from_records(ShiftRecord.from_entity(entity) for entity in entities)
+
+    # Worker IDs are stored once per batch
+    assert batch.workers == ["w1", "w2"]
+    assert list(batch.worker_rows) == [0, 1, 0]
+
+    for tz in ("Europe/Berlin", "America/New_York", "UTC"):
+        expected = apply_timezone_to_shifts([ShiftEntity.to_dict(entity) for entity in entities], tz)
+        assert batch.to_dicts(tz) == expected
+
+
+def test_sorted_by_start_keeps_sparse_columns():
+    batch = ShiftBatch.from_records([
+        ShiftRecord("late", "w1", 300, 400),
+        ShiftRecord("occurrence", "w2", 100, 200, template_id="t1"),
+        ShiftRecord("tie", "w1", 300, 350),
+    ])
+    ordered = batch.sorted_by_start()
+
+    assert ordered.ids == ["occurrence", "late", "tie"]
+    assert [record.template_id for record in ordered] == ["t1", None, None]
+    assert [record.worker_id for record in ordered] == ["w2", "w1", "w1"]
+    assert ordered.to_dicts()[0]["start"] == "1970-01-01T00:00:00.000100Z"
+
+
+def test_sorted_by_start_is_independent_of_source():
+    batch = ShiftBatch.from_records([
+        ShiftRecord("late", "w1", 300, 400),
+        ShiftRecord("early", "w2", 100, 200),
+    ])
+    ordered = batch.sorted_by_start()
+    ordered.append(ShiftRecord("new", "w3", 500, 600))
+
+    assert ordered.workers == ["w1", "w2", "w3"]
+    assert batch.workers == ["w1", "w2"]
+    assert [record.worker_id for record in batch] == ["w1", "w2"]
+    # A worker first added to the source gets its own number there
+    batch.append(ShiftRecord("other", "w4", 700, 800))
+    assert [record.worker_id for record in batch] == ["w1", "w2", "w4"]
+    assert [record.worker_id for record in ordered] == ["w2", "w1", "w3"]
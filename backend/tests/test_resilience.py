@@ -0,0 +1,127 @@
+"""
+Tests for the Datastore resilience layer
+"""
+
+import threading
+import time
+
+import pytest
+from google.api_core import exceptions
+from google.cloud.datastore_v1.types import datastore as datastore_pb2
+from google.cloud.datastore_v1.types import entity as entity_pb2
+
+from app.core.resilience import (
+    CircuitBreaker,
+    DatastoreUnavailable,
+    LatencyRecorder,
+    ResilientDatastoreApi,
+    is_idempotent_commit,
+)
+
+
+class ScriptedApi:
+    """Datastore API answering each call with the next scripted outcome"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def _next(self, method, kwargs):
+        with self._lock:
+            self.calls.append((method, kwargs))
+            outcome = self.outcomes.pop(0) if len(self.outcomes) > 1 else self.outcomes[0]
+        if callable(outcome):
+            outcome = outcome()
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    def lookup(self, request=None, **kwargs):
+        return self._next("lookup", kwargs)
+
+    def commit(self, request=None, **kwargs):
+        return self._next("commit", kwargs)
+
+
+def make_api(api, **kwargs):
+    kwargs.setdefault("breaker", CircuitBreaker(threshold=100, reset_seconds=60))
+    return ResilientDatastoreApi(api, metrics=LatencyRecorder(), sleep=lambda _: None, **kwargs)
+
+
+def commit_request(mutation):
+    return {"mode": datastore_pb2.CommitRequest.Mode.NON_TRANSACTIONAL, "mutations": [mutation]}
+
+
+def test_retries_transient_errors():
+    """Test that reads and idempotent commits are retried, other commits are not"""
+    api = make_api(ScriptedApi(exceptions.ServiceUnavailable("down"), "ok"))
+    assert api.lookup(request={}) == "ok"
+    assert api.metrics.snapshot()["lookup"]["retries"] == 1
+    # Deadlines are passed down and the library's own retries are disabled
+    assert all(call[1]["retry"] is None and call[1]["timeout"] > 0 for call in api._api.calls)
+
+    upsert = datastore_pb2.Mutation(upsert=entity_pb2.Entity())
+    insert = datastore_pb2.Mutation(insert=entity_pb2.Entity())
+    assert is_idempotent_commit(commit_request(upsert))
+    assert not is_idempotent_commit(commit_request(insert))
+
+    api = make_api(ScriptedApi(exceptions.ServiceUnavailable("down"), "ok"))
+    assert api.commit(request=commit_request(upsert)) == "ok"
+    api = make_api(ScriptedApi(exceptions.ServiceUnavailable("down"), "ok"))
+    with pytest.raises(DatastoreUnavailable):
+        api.commit(request=commit_request(insert))
+
+    # Non-transient errors pass through untouched
+    api = make_api(ScriptedApi(exceptions.NotFound("missing")))
+    with pytest.raises(exceptions.NotFound):
+        api.commit(request=commit_request(upsert))
+
+
+def test_circuit_breaker():
+    """Test that the circuit opens after repeated failures and closes after a successful trial"""
+    breaker = CircuitBreaker(threshold=2, reset_seconds=0.05)
+    api = make_api(ScriptedApi(exceptions.ServiceUnavailable("down")), breaker=breaker, max_retries=0)
+    for _ in range(2):
+        with pytest.raises(DatastoreUnavailable):
+            api.lookup(request={})
+    assert breaker.state == "open"
+
+    calls = len(api._api.calls)
+    with pytest.raises(DatastoreUnavailable, match="circuit is open"):
+        api.lookup(request={})
+    assert len(api._api.calls) == calls
+
+    time.sleep(0.06)
+    api._api.outcomes = ["ok"]
+    assert api.lookup(request={}) == "ok"
+    assert breaker.state == "closed"
+
+
+def test_hedged_lookup():
+    """Test that a slow lookup is hedged and the faster copy wins"""
+    def slow():
+        time.sleep(0.5)
+        return "slow"
+
+    api = make_api(ScriptedApi(slow, "fast"), hedge_after=0.02)
+    started = time.monotonic()
+    assert api.lookup(request={}) == "fast"
+    assert time.monotonic() - started < 0.4
+    snapshot = api.metrics.snapshot()
+    assert snapshot["lookup"]["hedges"] == 1
+    assert snapshot["lookup"]["hedge_wins"] == 1
+    api.close()
+
+
+def test_transient_errors_are_503(client, monkeypatch):
+    """Test that routes answer 503 with Retry-After when Datastore is unavailable"""
+    from app.services.worker_service import WorkerService
+
+    def unavailable(self):
+        raise DatastoreUnavailable("Datastore circuit is open", retry_after=3)
+
+    monkeypatch.setattr(WorkerService, "get_all_workers", unavailable)
+    response = client.get("/api/workers")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "3"
@@ -0,0 +1,90 @@
+"""
+Tests for scheduling endpoints
+"""
+
+import uuid
+from datetime import datetime, timedelta
+
+
+def test_auto_fill(client):
+    """Test that slots are spread across workers without overlaps"""
+    headers = {"X-Tenant-ID": f"autofill-{uuid.uuid4().hex[:8]}"}
+    worker_ids = [
+        client.post("/api/workers", json={"name": f"Fill Worker {i}"}, headers=headers).json()["id"]
+        for i in range(2)
+    ]
+    day = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=40)
+
+    def at(hours):
+        return (day + timedelta(hours=hours)).isoformat() + "Z"
+
+    # The first worker already works the morning
+    assert client.post("/api/shifts", headers=headers, json={
+        "worker_id": worker_ids[0], "start": at(8), "end": at(10),
+    }).status_code == 201
+
+    slots = [
+        {"start": at(9), "end": at(13)},
+        {"start": at(14), "end": at(18)},
+        {"start": at(9.5), "end": at(10.5)},
+        {"start": at(0), "end": at(13)},
+    ]
+    response = client.post("/api/schedule/auto-fill", headers=headers, json={"slots": slots, "dry_run": True})
+    assert response.status_code == 200
+    result = response.json()
+    assigned = {item["slot_index"]: item for item in result["assigned"]}
+    assert assigned[0]["worker_id"] == worker_ids[1]
+    # The first worker has fewer hours in the range by then
+    assert assigned[1]["worker_id"] == worker_ids[0]
+    assert assigned[0]["shift_id"] is None
+    assert sorted(item["slot_index"] for item in result["unfilled"]) == [2, 3]
+
+    response = client.post("/api/schedule/auto-fill", headers=headers, json={"slots": slots[:2]})
+    assert response.status_code == 200
+    created = response.json()["assigned"]
+    assert all(item["shift_id"] for item in created)
+    shifts = client.get("/api/shifts", headers=headers, params={"worker_id": worker_ids[1]}).json()
+    assert [shift["id"] for shift in shifts] == [created[0]["shift_id"]]
+
+    response = client.post("/api/schedule/auto-fill", headers=headers, json={
+        "slots": [{"start": at(9), "end": at(13), "worker_ids": ["missing"]}],
+    })
+    assert response.status_code == 400
+
+
+def test_schedule_grid(client):
+    """Test that hours are split at local midnight, including on DST changes"""
+    headers = {"X-Tenant-ID": f"grid-{uuid.uuid4().hex[:8]}"}
+    assert client.post("/api/timezone", json={"timezone": "Europe/Berlin"}, headers=headers).status_code == 200
+    worker_id = client.post("/api/workers", json={"name": "Night Worker"}, headers=headers).json()["id"]
+    # 23:00 CET to 06:00 CEST, across the night clocks go forward
+    assert client.post("/api/shifts", headers=headers, json={
+        "worker_id": worker_id, "start": "2031-03-29T22:00:00Z", "end": "2031-03-30T04:00:00Z",
+    }).status_code == 201
+
+    window = {"from": "2031-03-28T23:00:00Z", "to": "2031-03-31T22:00:00Z"}
+    response = client.get("/api/schedule/grid", headers=headers, params=window)
+    assert response.status_code == 200
+    grid = response.json()
+    assert [day["date"] for day in grid["days"]] == ["2031-03-29", "2031-03-30", "2031-03-31"]
+    # The DST day is 23 hours long
+    assert grid["days"][1]["start"] == "2031-03-29T23:00:00Z"
+    assert grid["days"][1]["end"] == "2031-03-30T22:00:00Z"
+    assert grid["rows"] == [{"worker_id": worker_id, "hours": [1.0, 5.0, 0.0], "total_hours": 6.0}]
+    assert [day["workers"] for day in grid["days"]] == [1, 1, 0]
+    assert grid["total_hours"] == 6.0 and grid["shift_count"] == 1
+
+    etag = response.headers["ETag"]
+    assert client.get("/api/schedule/grid", headers={**headers, "If-None-Match": etag}, params=window).status_code == 304
+
+    # Any write changes the version
+    assert client.post("/api/shifts", headers=headers, json={
+        "worker_id": worker_id, "start": "2031-03-31T08:00:00Z", "end": "2031-03-31T10:00:00Z",
+    }).status_code == 201
+    response = client.get("/api/schedule/grid", headers={**headers, "If-None-Match": etag}, params=window)
+    assert response.status_code == 200
+    assert response.json()["rows"][0]["hours"] == [1.0, 5.0, 2.0]
+
+    assert client.get("/api/schedule/grid", headers=headers, params={
+        "from": "2031-01-01T00:00:00Z", "to": "2031-12-31T00:00:00Z",
+    }).status_code == 400
@@ -3,6 +3,7 @@ Tests for shifts endpoints
 """
 
 import pytest
+import uuid
 from datetime import datetime, timedelta
 
 
@@ -128,3 +129,202 @@ def test_get_shifts_filtered_by_worker(client):
     data = response.json()
     assert all(shift["worker_id"] == worker1_id for shift in data)
 
+
+
+def test_get_shift_changes(client):
+    """Test delta sync returns changed shifts and tombstones for deletes"""
+    worker_response = client.post("/api/workers", json={"name": "Sync Worker"})
+    worker_id = worker_response.json()["id"]
+    since = (datetime.utcnow() - timedelta(seconds=1)).isoformat() + "Z"
+    
+    start = (datetime.utcnow() + timedelta(days=30)).isoformat() + "Z"
+    end = (datetime.utcnow() + timedelta(days=30, hours=8)).isoformat() + "Z"
+    kept = client.post("/api/shifts", json={"worker_id": worker_id, "start": start, "end": end}).json()
+    
+    start = (datetime.utcnow() + timedelta(days=31)).isoformat() + "Z"
+    end = (datetime.utcnow() + timedelta(days=31, hours=8)).isoformat() + "Z"
+    removed = client.post("/api/shifts", json={"worker_id": worker_id, "start": start, "end": end}).json()
+    assert client.delete(f"/api/shifts/{removed['id']}").status_code == 204
+    
+    response = client.get("/api/shifts", params={"worker_id": worker_id, "updated_since": since})
+    assert response.status_code == 200
+    data = response.json()
+    assert [shift["id"] for shift in data["items"]] == [kept["id"]]
+    assert data["deleted"] == [removed["id"]]
+    assert "synced_at" in data
+    
+    # Deleted shifts are gone from regular reads
+    assert client.get(f"/api/shifts/{removed['id']}").status_code == 404
+
+
+def test_shift_times_stored_in_canonical_form(client):
+    """Test that other ISO 8601 forms are stored as canonical UTC and still checked for overlaps"""
+    worker_id = client.post("/api/workers", json={"name": "Format Worker"}).json()["id"]
+    response = client.post("/api/shifts", json={
+        "worker_id": worker_id, "start": "2040-06-01 11:00:00+02:00", "end": "20400601T170000+00:00",
+    })
+    assert response.status_code == 201
+    assert (response.json()["start"], response.json()["end"]) == ("2040-06-01T09:00:00Z", "2040-06-01T17:00:00Z")
+    
+    response = client.post("/api/shifts", json={
+        "worker_id": worker_id, "start": "2040-06-01 12:00:00Z", "end": "2040-06-01T14:00:00Z",
+    })
+    assert response.status_code == 400
+    assert client.post("/api/shifts", json={
+        "worker_id": worker_id, "start": "yesterday", "end": "2040-06-01T14:00:00Z",
+    }).status_code == 400
+
+
+def test_update_and_delete_deleted_shift(client):
+    """Test that writes to a deleted shift return 404"""
+    worker_id = client.post("/api/workers", json={"name": "Deleted Shift Worker"}).json()["id"]
+    start = (datetime.utcnow() + timedelta(days=40)).isoformat() + "Z"
+    end = (datetime.utcnow() + timedelta(days=40, hours=8)).isoformat() + "Z"
+    shift = client.post("/api/shifts", json={"worker_id": worker_id, "start": start, "end": end}).json()
+    
+    # Full updates keep created_at (read back from Datastore as UTC, hence the Z)
+    full = {"worker_id": worker_id, "start": start, "end": end}
+    updated = client.put(f"/api/shifts/{shift['id']}", json=full).json()
+    assert updated["created_at"].rstrip("Z") == shift["created_at"].rstrip("Z")
+    
+    assert client.delete(f"/api/shifts/{shift['id']}").status_code == 204
+    assert client.put(f"/api/shifts/{shift['id']}", json=full).status_code == 404
+    assert client.put(f"/api/shifts/{shift['id']}", json={"end": end}).status_code == 404
+    assert client.delete(f"/api/shifts/{shift['id']}").status_code == 404
+
+
+def test_get_shift_changes_expired_cursor(client):
+    """Test that cursors older than the tombstone TTL require a full resync"""
+    since = (datetime.utcnow() - timedelta(days=365)).isoformat() + "Z"
+    response = client.get("/api/shifts", params={"updated_since": since})
+    assert response.status_code == 410
+
+
+def test_get_shifts_msgpack(client):
+    """Test that shift lists can be requested as columnar MessagePack"""
+    msgpack = pytest.importorskip("msgpack")
+    worker_response = client.post("/api/workers", json={"name": "Binary Worker"})
+    worker_id = worker_response.json()["id"]
+    
+    start = (datetime.utcnow() + timedelta(days=40)).isoformat() + "Z"
+    end = (datetime.utcnow() + timedelta(days=40, hours=8)).isoformat() + "Z"
+    created = client.post("/api/shifts", json={"worker_id": worker_id, "start": start, "end": end}).json()
+    
+    response = client.get(
+        "/api/shifts",
+        params={"worker_id": worker_id},
+        headers={"Accept": "application/vnd.msgpack"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.msgpack"
+    
+    unpacker = msgpack.Unpacker()
+    unpacker.feed(response.content)
+    header, *pages = list(unpacker)
+    assert "start" in header["columns"]
+    assert [shift_id for page in pages for shift_id in page["id"]] == [created["id"]]
+
+
+def test_get_shifts_unsupported_format(client):
+    """Test that unsupported Accept headers are rejected"""
+    response = client.get("/api/shifts", headers={"Accept": "text/csv"})
+    assert response.status_code == 406
+
+
+def test_get_shifts_include_worker(client):
+    """Test embedding worker data in shift responses"""
+    worker_response = client.post("/api/workers", json={"name": "Embedded Worker"})
+    worker_id = worker_response.json()["id"]
+    
+    start = (datetime.utcnow() + timedelta(days=50)).isoformat() + "Z"
+    end = (datetime.utcnow() + timedelta(days=50, hours=8)).isoformat() + "Z"
+    created = client.post("/api/shifts", json={"worker_id": worker_id, "start": start, "end": end}).json()
+    
+    response = client.get("/api/shifts", params={"worker_id": worker_id, "include": "worker"})
+    assert response.status_code == 200
+    [shift] = response.json()
+    assert shift["worker"] == {"id": worker_id, "name": "Embedded Worker"}
+    
+    response = client.get(f"/api/shifts/{created['id']}", params={"include": "worker"})
+    assert response.json()["worker"]["name"] == "Embedded Worker"
+    
+    response = client.get("/api/shifts", params={"include": "manager"})
+    assert response.status_code == 400
+
+
+def test_get_shifts_in_window(client):
+    """Test filtering shifts by time window, and that cached lists see writes"""
+    worker_response = client.post("/api/workers", json={"name": "Window Worker"})
+    worker_id = worker_response.json()["id"]
+    
+    day = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=60)
+    first = client.post("/api/shifts", json={
+        "worker_id": worker_id,
+        "start": (day + timedelta(hours=9)).isoformat() + "Z",
+        "end": (day + timedelta(hours=17)).isoformat() + "Z",
+    }).json()
+    
+    window = {
+        "worker_id": worker_id,
+        "from": (day + timedelta(hours=12)).isoformat() + "Z",
+        "to": (day + timedelta(days=1)).isoformat() + "Z",
+    }
+    response = client.get("/api/shifts", params=window)
+    assert response.status_code == 200
+    assert [shift["id"] for shift in response.json()] == [first["id"]]
+    
+    # A shift created inside the window invalidates the cached list
+    second = client.post("/api/shifts", json={
+        "worker_id": worker_id,
+        "start": (day + timedelta(hours=18)).isoformat() + "Z",
+        "end": (day + timedelta(hours=22)).isoformat() + "Z",
+    }).json()
+    response = client.get("/api/shifts", params=window)
+    assert [shift["id"] for shift in response.json()] == [first["id"], second["id"]]
+    
+    # Moving a shift out of the window removes it from the cached list
+    client.put(f"/api/shifts/{first['id']}", json={
+        "start": (day - timedelta(hours=8)).isoformat() + "Z",
+        "end": (day - timedelta(hours=2)).isoformat() + "Z",
+    })
+    response = client.get("/api/shifts", params=window)
+    assert [shift["id"] for shift in response.json()] == [second["id"]]
+    
+    client.delete(f"/api/shifts/{second['id']}")
+    response = client.get("/api/shifts", params=window)
+    assert response.json() == []
+    
+    response = client.get("/api/shifts", params={"from": window["to"], "to": window["from"]})
+    assert response.status_code == 400
+
+
+def test_labor_rules(client, monkeypatch):
+    """Test minimum rest and rolling 7-day hour cap rules"""
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "MIN_REST_HOURS", 10)
+    monkeypatch.setattr(settings, "MAX_HOURS_PER_7_DAYS", 40)
+    # Services are built per tenant, so a new tenant picks up the rules
+    headers = {"X-Tenant-ID": f"rules-{uuid.uuid4().hex[:8]}"}
+    worker_id = client.post("/api/workers", json={"name": "Rested Worker"}, headers=headers).json()["id"]
+    
+    day = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=70)
+    
+    def create(start_hours, end_hours):
+        return client.post("/api/shifts", headers=headers, json={
+            "worker_id": worker_id,
+            "start": (day + timedelta(hours=start_hours)).isoformat() + "Z",
+            "end": (day + timedelta(hours=end_hours)).isoformat() + "Z",
+        })
+    
+    assert create(8, 16).status_code == 201
+    # Only 8 hours of rest before the next day's shift
+    response = create(24, 32)
+    assert response.status_code == 400
+    assert "rest" in response.json()["detail"]
+    
+    # Four more 8 hour days fit under 40 hours, a sixth one doesn't
+    for offset in range(1, 5):
+        assert create(offset * 24 + 8, offset * 24 + 16).status_code == 201
+    response = create(5 * 24 + 8, 5 * 24 + 16)
+    assert response.status_code == 400
+    assert "maximum of 40" in response.json()["detail"]
@@ -0,0 +1,49 @@
+"""
+Tests for snapshot backup and restore
+"""
+
+import uuid
+
+import pytest
+
+from app.utils.snapshot import SnapshotError, backup, partition_bounds, restore
+
+
+def test_partition_bounds():
+    """Test that partitions cover the key space contiguously"""
+    bounds = partition_bounds(4)
+    assert bounds == [(None, "4000"), ("4000", "8000"), ("8000", "c000"), ("c000", None)]
+    assert partition_bounds(1) == [(None, None)]
+
+
+def test_backup_and_restore(client, tmp_path):
+    """Test that a tenant's data is copied into another tenant"""
+    source = {"X-Tenant-ID": f"snap-{uuid.uuid4().hex[:8]}"}
+    target = {"X-Tenant-ID": f"snap-{uuid.uuid4().hex[:8]}"}
+    worker_ids = [
+        client.post("/api/workers", json={"name": f"Snapshot Worker {i}"}, headers=source).json()["id"]
+        for i in range(5)
+    ]
+    for i, worker_id in enumerate(worker_ids):
+        assert client.post("/api/shifts", headers=source, json={
+            "worker_id": worker_id, "start": f"2031-03-0{i + 1}T09:00:00Z", "end": f"2031-03-0{i + 1}T17:00:00Z",
+        }).status_code == 201
+    client.post("/api/timezone", json={"timezone": "Europe/Berlin"}, headers=source)
+
+    manifest = backup(str(tmp_path), namespace=source["X-Tenant-ID"], partitions=4, workers=4)
+    assert sum(item["entities"] for item in manifest["files"] if item["kind"] == "Worker") == 5
+    with pytest.raises(SnapshotError):
+        backup(str(tmp_path), namespace=source["X-Tenant-ID"])
+
+    totals = restore(str(tmp_path), namespace=target["X-Tenant-ID"], batch_size=2)
+    assert totals["Worker"] == 5 and totals["Shift"] == 5 and totals["Timezone"] == 1
+
+    assert sorted(w["id"] for w in client.get("/api/workers", headers=target).json()) == sorted(worker_ids)
+    def shifts(headers):
+        return [(s["id"], s["worker_id"], s["start"], s["end"]) for s in client.get("/api/shifts", headers=headers).json()]
+
+    assert shifts(target) == shifts(source)
+    assert client.get("/api/timezone", headers=target).json()["timezone"] == "Europe/Berlin"
+    # Counters are recounted on restore
+    assert client.get("/api/stats", headers=target).json() == client.get("/api/stats", headers=source).json()
+    assert client.get("/api/stats", headers=target).json()["shifts"] == 5
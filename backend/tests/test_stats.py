@@ -0,0 +1,97 @@
+"""
+Tests for the statistics counters and endpoint
+"""
+
+import uuid
+
+from app.core.datastore import KIND_STATS_DELTA
+from app.core.dependencies import registry
+from app.services.stats_service import TENANT_SCOPE, StatsService, worker_scope
+from tests.test_jobs import wait_for_job
+
+
+def create_shift(client, headers, worker_id, start, end):
+    response = client.post("/api/shifts", headers=headers, json={"worker_id": worker_id, "start": start, "end": end})
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def test_counters_follow_writes(client):
+    """Test that creates, updates and deletes keep the totals"""
+    headers = {"X-Tenant-ID": f"stats-{uuid.uuid4().hex[:8]}"}
+    worker_id = client.post("/api/workers", json={"name": "Counted Worker"}, headers=headers).json()["id"]
+    other_id = client.post("/api/workers", json={"name": "Other Worker"}, headers=headers).json()["id"]
+    first = create_shift(client, headers, worker_id, "2040-03-01T09:00:00Z", "2040-03-01T17:00:00Z")
+    second = create_shift(client, headers, worker_id, "2040-03-02T22:00:00Z", "2040-03-03T04:00:00Z")
+    create_shift(client, headers, other_id, "2040-03-02T08:00:00Z", "2040-03-02T12:00:00Z")
+
+    # Moved to the other worker and shortened to 4 hours, then deleted
+    assert client.put(f"/api/shifts/{first}", headers=headers, json={
+        "worker_id": other_id, "start": "2040-03-01T09:00:00Z", "end": "2040-03-01T13:00:00Z",
+    }).status_code == 200
+    assert client.delete(f"/api/shifts/{second}", headers=headers).status_code == 204
+    # Deleting again is refused and changes nothing
+    assert client.delete(f"/api/shifts/{second}", headers=headers).status_code == 404
+    assert client.delete(f"/api/workers/{worker_id}", headers=headers).status_code == 204
+    assert client.delete(f"/api/workers/{worker_id}", headers=headers).status_code == 404
+    assert client.put(f"/api/shifts/{second}", headers=headers, json={"end": "2040-03-03T02:00:00Z"}).status_code == 404
+
+    stats = client.get("/api/stats", headers=headers, params={
+        "worker_id": other_id, "from": "2040-03-01", "to": "2040-03-03",
+    }).json()
+    assert (stats["shifts"], stats["hours"], stats["workers"]) == (2, 8.0, 1)
+    assert stats["worker"] == {"worker_id": other_id, "shifts": 2, "hours": 8.0}
+    assert stats["days"] == [
+        {"date": "2040-03-01", "shifts": 1, "hours": 4.0},
+        {"date": "2040-03-02", "shifts": 1, "hours": 4.0},
+        {"date": "2040-03-03", "shifts": 0, "hours": 0.0},
+    ]
+    assert client.get("/api/stats", headers=headers, params={"from": "2040-03-02", "to": "2040-03-01"}).status_code == 400
+
+
+def test_reconcile_job_fixes_drift(client):
+    """Test that the reconcile_stats job corrects counters that drifted"""
+    tenant = f"stats-{uuid.uuid4().hex[:8]}"
+    headers = {"X-Tenant-ID": tenant}
+    worker_id = client.post("/api/workers", json={"name": "Drifting Worker"}, headers=headers).json()["id"]
+    create_shift(client, headers, worker_id, "2040-04-01T09:00:00Z", "2040-04-01T15:00:00Z")
+
+    registry.get(StatsService, tenant).apply({
+        TENANT_SCOPE: {"shifts": 3, "workers": -1},
+        worker_scope(worker_id): {"seconds": 3600},
+        worker_scope("gone"): {"shifts": 1},
+    })
+    assert client.get("/api/stats", headers=headers).json()["shifts"] == 4
+
+    job_id = client.post("/api/jobs", headers=headers, json={"type": "reconcile_stats"}).json()["id"]
+    job = wait_for_job(client, job_id, headers)
+    assert job["status"] == "succeeded"
+    assert job["result"]["corrected"] == 3
+
+    stats = client.get("/api/stats", headers=headers, params={"worker_id": worker_id}).json()
+    assert (stats["shifts"], stats["hours"], stats["workers"]) == (1, 6.0, 1)
+    assert stats["worker"]["hours"] == 6.0
+
+
+def test_unfolded_deltas_are_counted(client, monkeypatch):
+    """Test that changes committed with a write count even if folding them never ran"""
+    tenant = f"stats-{uuid.uuid4().hex[:8]}"
+    headers = {"X-Tenant-ID": tenant}
+    # As if the process died right after each write's commit
+    monkeypatch.setattr(StatsService, "fold", lambda self, deltas: False)
+    worker_id = client.post("/api/workers", json={"name": "Unfolded Worker"}, headers=headers).json()["id"]
+    shift_id = create_shift(client, headers, worker_id, "2040-05-01T09:00:00Z", "2040-05-01T17:00:00Z")
+    create_shift(client, headers, worker_id, "2040-05-02T09:00:00Z", "2040-05-02T13:00:00Z")
+    assert client.delete(f"/api/shifts/{shift_id}", headers=headers).status_code == 204
+
+    stats = client.get("/api/stats", headers=headers, params={"worker_id": worker_id}).json()
+    assert (stats["shifts"], stats["hours"], stats["workers"]) == (1, 4.0, 1)
+    monkeypatch.undo()
+
+    service = registry.get(StatsService, tenant)
+    assert service.reconcile() == {
+        "shifts_scanned": 2, "counters": 4, "corrected": 0, "applied": True, "pending": 0,
+    }
+    assert list(service.client.query(kind=KIND_STATS_DELTA).fetch()) == []
+    stats = client.get("/api/stats", headers=headers, params={"worker_id": worker_id}).json()
+    assert (stats["shifts"], stats["hours"], stats["workers"]) == (1, 4.0, 1)
@@ -0,0 +1,141 @@
+"""
+Tests for recurring shift template endpoints
+"""
+
+import pytest
+from datetime import datetime, timedelta
+
+
+def next_monday(weeks_ahead: int) -> datetime:
+    """Midnight of a Monday some weeks from now"""
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    return today + timedelta(days=7 - today.weekday(), weeks=weeks_ahead)
+
+
+def test_template_occurrences(client):
+    """Test that occurrences are expanded in shift lists and can be edited individually"""
+    worker_id = client.post("/api/workers", json={"name": "Recurring Worker"}).json()["id"]
+    monday = next_monday(20)
+
+    response = client.post("/api/shift-templates", json={
+        "worker_id": worker_id,
+        "start": (monday + timedelta(hours=9)).strftime("%Y-%m-%dT%H:%M:%S"),
+        "end": (monday + timedelta(hours=17)).strftime("%Y-%m-%dT%H:%M:%S"),
+        "rrule": "FREQ=WEEKLY;BYDAY=MO,WE;COUNT=6",
+        "timezone": "Europe/Berlin",
+    })
+    assert response.status_code == 201
+    template = response.json()
+    assert template["rrule"].startswith("FREQ=WEEKLY;BYDAY=MO,WE;UNTIL=")
+
+    window = {
+        "worker_id": worker_id,
+        "from": monday.isoformat() + "Z",
+        "to": (monday + timedelta(weeks=2)).isoformat() + "Z",
+    }
+    shifts = client.get("/api/shifts", params=window).json()
+    assert len(shifts) == 4
+    assert all(shift["template_id"] == template["id"] for shift in shifts)
+
+    # Stored shifts may not overlap an occurrence
+    first = shifts[0]
+    response = client.post("/api/shifts", json={"worker_id": worker_id, "start": first["start"], "end": first["end"]})
+    assert response.status_code == 400
+
+    # Editing one occurrence stores it as its own shift
+    moved_start = (monday + timedelta(hours=6)).isoformat() + "Z"
+    moved_end = (monday + timedelta(hours=12)).isoformat() + "Z"
+    response = client.put(f"/api/shifts/{first['id']}", json={"start": moved_start, "end": moved_end})
+    assert response.status_code == 200
+    moved = response.json()
+    assert moved["id"] != first["id"]
+    assert moved["template_id"] == template["id"]
+
+    # Deleting another occurrence only skips that date
+    assert client.delete(f"/api/shifts/{shifts[1]['id']}").status_code == 204
+    assert client.get(f"/api/shifts/{shifts[1]['id']}").status_code == 404
+
+    shifts = client.get("/api/shifts", params=window).json()
+    assert [shift["id"] for shift in shifts][:1] == [moved["id"]]
+    assert len(shifts) == 3
+    assert len(client.get(f"/api/shift-templates/{template['id']}").json()["exdates"]) == 2
+
+    assert client.delete(f"/api/shift-templates/{template['id']}").status_code == 204
+    assert client.delete(f"/api/shift-templates/{template['id']}").status_code == 404
+    assert [shift["id"] for shift in client.get("/api/shifts", params=window).json()] == [moved["id"]]
+
+
+@pytest.mark.parametrize("media_type", ["application/vnd.msgpack", "application/vnd.apache.arrow.stream"])
+def test_template_occurrences_binary_formats(client, media_type):
+    """Test that binary shift lists carry the template of occurrences"""
+    worker_id = client.post("/api/workers", json={"name": "Binary Recurring Worker"}).json()["id"]
+    monday = next_monday(30)
+    template = client.post("/api/shift-templates", json={
+        "worker_id": worker_id,
+        "start": (monday + timedelta(hours=9)).strftime("%Y-%m-%dT%H:%M:%S"),
+        "end": (monday + timedelta(hours=17)).strftime("%Y-%m-%dT%H:%M:%S"),
+        "rrule": "FREQ=WEEKLY;BYDAY=MO;COUNT=1",
+        "timezone": "UTC",
+    }).json()
+    one_off = client.post("/api/shifts", json={
+        "worker_id": worker_id,
+        "start": (monday + timedelta(days=1, hours=9)).isoformat() + "Z",
+        "end": (monday + timedelta(days=1, hours=17)).isoformat() + "Z",
+    }).json()
+
+    window = {
+        "worker_id": worker_id,
+        "from": monday.isoformat() + "Z",
+        "to": (monday + timedelta(weeks=1)).isoformat() + "Z",
+    }
+    response = client.get("/api/shifts", params=window, headers={"Accept": media_type})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == media_type
+    if media_type == "application/vnd.msgpack":
+        msgpack = pytest.importorskip("msgpack")
+        unpacker = msgpack.Unpacker()
+        unpacker.feed(response.content)
+        header, *pages = list(unpacker)
+        assert "template_id" in header["columns"]
+        rows = [(shift_id, page["template_id"][i]) for page in pages for i, shift_id in enumerate(page["id"])]
+    else:
+        pa = pytest.importorskip("pyarrow")
+        table = pa.ipc.open_stream(response.content).read_all()
+        rows = list(zip(table.column("id").to_pylist(), table.column("template_id").to_pylist()))
+    assert rows == [
+        (f"{template['id']}@{monday.date().isoformat()}", template["id"]),
+        (one_off["id"], None),
+    ]
+
+
+def test_template_validation(client):
+    """Test that invalid rules and overlapping templates are rejected"""
+    worker_id = client.post("/api/workers", json={"name": "Template Worker"}).json()["id"]
+    monday = next_monday(30)
+    template = {
+        "worker_id": worker_id,
+        "start": (monday + timedelta(hours=8)).strftime("%Y-%m-%dT%H:%M:%S"),
+        "end": (monday + timedelta(hours=16)).strftime("%Y-%m-%dT%H:%M:%S"),
+        "rrule": "FREQ=DAILY",
+        "timezone": "UTC",
+    }
+
+    assert client.post("/api/shift-templates", json={**template, "rrule": "FREQ=MONTHLY"}).status_code == 400
+    # Intervals are capped, and COUNT may not run past the last supported date
+    assert client.post("/api/shift-templates", json={**template, "rrule": "FREQ=DAILY;INTERVAL=4000000"}).status_code == 400
+    assert client.post("/api/shift-templates", json={
+        **template, "rrule": "FREQ=WEEKLY;INTERVAL=1000;COUNT=1000"
+    }).status_code == 400
+    assert client.post("/api/shift-templates", json={
+        **template, "end": (monday + timedelta(hours=22)).strftime("%Y-%m-%dT%H:%M:%S")
+    }).status_code == 400
+
+    assert client.post("/api/shift-templates", json=template).status_code == 201
+    # A weekly template overlapping the daily one two weeks later
+    response = client.post("/api/shift-templates", json={
+        **template,
+        "start": (monday + timedelta(weeks=2, hours=15)).strftime("%Y-%m-%dT%H:%M:%S"),
+        "end": (monday + timedelta(weeks=2, hours=20)).strftime("%Y-%m-%dT%H:%M:%S"),
+        "rrule": "FREQ=WEEKLY",
+    })
+    assert response.status_code == 400
@@ -3,6 +3,7 @@ Tests for timezone endpoints
 """
 
 import pytest
+import uuid
 from app.services.timezone_service import TimezoneService
 
 
@@ -28,3 +29,22 @@ def test_set_timezone(client):
     data = response.json()
     assert data["timezone"] == "America/New_York"
 
+
+
+def test_timezone_per_tenant(client):
+    """Test that each tenant has its own timezone setting"""
+    tenant = f"tenant-{uuid.uuid4().hex[:8]}"
+    response = client.post("/api/timezone", json={"timezone": "Asia/Tokyo"}, headers={"X-Tenant-ID": tenant})
+    assert response.status_code == 200
+    
+    response = client.get("/api/timezone", headers={"X-Tenant-ID": tenant})
+    assert response.json()["timezone"] == "Asia/Tokyo"
+    
+    other = client.get("/api/timezone", headers={"X-Tenant-ID": f"{tenant}-other"})
+    assert other.json()["timezone"] == "UTC"
+
+
+def test_invalid_tenant(client):
+    """Test that malformed tenant IDs are rejected"""
+    response = client.get("/api/timezone", headers={"X-Tenant-ID": "not a namespace!"})
+    assert response.status_code == 400
@@ -0,0 +1,65 @@
+"""
+Tests for traffic capture and replay
+"""
+
+import asyncio
+import json
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.traffic import TrafficCaptureMiddleware, TrafficRecorder
+from app.main import app
+from benchmarks.replay_traffic import replay, synthesize
+
+
+def test_capture_records_shapes_only(tmp_path):
+    path = tmp_path / "traffic.jsonl"
+    recorder = TrafficRecorder(str(path))
+    capture_app = FastAPI()
+
+    @capture_app.put("/api/things/{thing_id}")
+    async def put_thing(thing_id: str):
+        return {"id": thing_id}
+
+    capture_app.add_middleware(TrafficCaptureMiddleware, recorder=recorder, sample_rate=1.0)
+    body = b'{"name": "Jane Secret"}'
+    response = TestClient(capture_app).put(
+        "/api/things/thing-123?from=2031-01-01T00:00:00Z&to=2031-01-08T00:00:00Z&token=hunter2",
+        content=body,
+        headers={"X-Tenant-ID": "acme-corp"},
+    )
+    assert response.status_code == 200
+    recorder.close()
+
+    raw = path.read_text()
+    for secret in ("thing-123", "hunter2", "Jane", "acme-corp", "2031"):
+        assert secret not in raw
+    [line] = [json.loads(text) for text in raw.splitlines()]
+    assert line["method"] == "PUT"
+    assert line["route"] == "/api/things/{thing_id}"
+    assert line["query"] == ["from", "to", "token"]
+    assert line["window_hours"] == 168.0
+    assert line["request_bytes"] == len(body)
+    assert line["response_bytes"] == len(response.content)
+    assert line["status"] == 200
+    assert len(line["tenant"]) == 12
+
+
+def test_replay_synthetic_write_mix():
+    records = synthesize(80, rate=1000.0, write_ratio=0.6, tenants=2, seed=7)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://replay") as client:
+            return await replay(client, records, speed=0, concurrency=4, seed_workers=3)
+
+    summary = asyncio.run(run()).summary()
+
+    assert summary["error_rate"] == 0
+    creates = summary["routes"]["POST /api/shifts"]
+    assert creates["requests"] > 0
+    # Replayed shifts are placed in free slots, so none break the labor rules
+    assert creates["4xx"] == 0
+    assert sum(route["requests"] + route["skipped"] for route in summary["routes"].values()) == len(records)
@@ -3,6 +3,8 @@ Tests for workers endpoints
 """
 
 import pytest
+import uuid
+from datetime import datetime, timedelta
 
 
 def test_create_worker(client):
@@ -67,3 +69,88 @@ def test_delete_worker(client):
     response = client.get(f"/api/workers/{worker_id}")
     assert response.status_code == 404
 
+
+
+def test_get_worker_changes(client):
+    """Test delta sync returns deleted worker IDs"""
+    since = (datetime.utcnow() - timedelta(seconds=1)).isoformat() + "Z"
+    create_response = client.post("/api/workers", json={"name": "Sync Me"})
+    worker_id = create_response.json()["id"]
+    client.delete(f"/api/workers/{worker_id}")
+    
+    response = client.get("/api/workers", params={"updated_since": since})
+    assert response.status_code == 200
+    data = response.json()
+    assert worker_id in data["deleted"]
+    assert worker_id not in [worker["id"] for worker in data["items"]]
+
+
+def test_workers_isolated_per_tenant(client):
+    """Test that workers created for one tenant are invisible to another"""
+    headers = {"X-Tenant-ID": f"tenant-{uuid.uuid4().hex[:8]}"}
+    create_response = client.post("/api/workers", json={"name": "Tenant Worker"}, headers=headers)
+    worker_id = create_response.json()["id"]
+    
+    assert client.get(f"/api/workers/{worker_id}", headers=headers).status_code == 200
+    assert client.get(f"/api/workers/{worker_id}").status_code == 404
+    assert worker_id not in [worker["id"] for worker in client.get("/api/workers").json()]
+
+
+def test_create_worker_idempotent(client):
+    """Test that retries with the same Idempotency-Key replay the first response"""
+    headers = {"Idempotency-Key": f"create-{uuid.uuid4()}"}
+    first = client.post("/api/workers", json={"name": "Retry Me"}, headers=headers)
+    assert first.status_code == 201
+    
+    retry = client.post("/api/workers", json={"name": "Retry Me"}, headers=headers)
+    assert retry.status_code == 201
+    assert retry.json()["id"] == first.json()["id"]
+    assert retry.headers["idempotent-replayed"] == "true"
+    
+    # Reusing the key for a different request is rejected
+    other = client.post("/api/workers", json={"name": "Someone Else"}, headers=headers)
+    assert other.status_code == 422
+
+
+def test_update_and_delete_missing_worker(client):
+    """Test that writes to a worker that doesn't exist return 404"""
+    missing_id = str(uuid.uuid4())
+    assert client.put(f"/api/workers/{missing_id}", json={"name": "Nobody"}).status_code == 404
+    assert client.delete(f"/api/workers/{missing_id}").status_code == 404
+
+
+def test_update_and_delete_deleted_worker(client):
+    """Test that writes to a deleted worker return 404"""
+    worker = client.post("/api/workers", json={"name": "Deleted Worker"}).json()
+    assert worker["created_at"] is not None
+    renamed = client.put(f"/api/workers/{worker['id']}", json={"name": "Renamed Worker"}).json()
+    # Read back from Datastore as UTC, hence the Z
+    assert renamed["created_at"].rstrip("Z") == worker["created_at"].rstrip("Z")
+    
+    assert client.delete(f"/api/workers/{worker['id']}").status_code == 204
+    assert client.put(f"/api/workers/{worker['id']}", json={"name": "Revived"}).status_code == 404
+    assert client.delete(f"/api/workers/{worker['id']}").status_code == 404
+
+
+@pytest.mark.parametrize("use_index", [True, False])
+def test_search_workers(client, monkeypatch, use_index):
+    """Test case-insensitive name prefix search, through the trie and through Datastore"""
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "WORKER_SEARCH_INDEX", use_index)
+    
+    prefix = f"Srch{uuid.uuid4().hex[:6]}"
+    ids = {}
+    for suffix in ("Bravo", "alpha", "Charlie"):
+        ids[suffix] = client.post("/api/workers", json={"name": f"{prefix} {suffix}"}).json()["id"]
+    
+    response = client.get("/api/workers", params={"q": prefix.lower()})
+    assert response.status_code == 200
+    assert [worker["id"] for worker in response.json()] == [ids["alpha"], ids["Bravo"], ids["Charlie"]]
+    
+    response = client.get("/api/workers", params={"q": f"{prefix.upper()} B", "limit": 1})
+    assert [worker["id"] for worker in response.json()] == [ids["Bravo"]]
+    
+    client.put(f"/api/workers/{ids['alpha']}", json={"name": f"{prefix} Zulu"})
+    client.delete(f"/api/workers/{ids['Charlie']}")
+    response = client.get("/api/workers", params={"q": prefix, "limit": 2})
+    assert [worker["name"] for worker in response.json()] == [f"{prefix} Bravo", f"{prefix} Zulu"]
@@ -0,0 +1,43 @@
+import { ref, computed } from 'vue';
+import { apiService } from '@/services/api';
+import type { ScheduleGrid } from '@/types';
+
+const grid = ref<ScheduleGrid | null>(null);
+const loading = ref(false);
+const error = ref<string | null>(null);
+// Only the latest fetch (and its background refresh) may replace the grid
+let latestFetch = 0;
+
+export function useScheduleGrid() {
+  const fetchGrid = async (from?: string, to?: string) => {
+    const fetchId = ++latestFetch;
+    const apply = (data: ScheduleGrid) => {
+      if (fetchId === latestFetch) grid.value = data;
+    };
+    loading.value = true;
+    error.value = null;
+    try {
+      const response = await apiService.getScheduleGrid(from, to, apply);
+      if (response.error) {
+        error.value = response.error.message;
+      } else if (response.data) {
+        apply(response.data);
+      }
+    } catch (err) {
+      error.value = err instanceof Error ? err.message : 'Failed to fetch schedule grid';
+    } finally {
+      loading.value = false;
+    }
+  };
+
+  // Totals of the grid's "today" column, computed by the backend
+  const today = computed(() => grid.value?.days.find((day) => day.date === grid.value?.today) ?? null);
+
+  return {
+    grid: computed(() => grid.value),
+    today,
+    loading: computed(() => loading.value),
+    error: computed(() => error.value),
+    fetchGrid,
+  };
+}
@@ -5,17 +5,23 @@ import type { Shift } from '@/types';
 const shifts = ref<Shift[]>([]);
 const loading = ref(false);
 const error = ref<string | null>(null);
+// Only the latest fetch (and its background refresh) may replace the list
+let latestFetch = 0;
 
 export function useShifts() {
   const fetchShifts = async (workerId?: string) => {
+    const fetchId = ++latestFetch;
+    const apply = (data: Shift[]) => {
+      if (fetchId === latestFetch) shifts.value = data;
+    };
     loading.value = true;
     error.value = null;
     try {
-      const response = await apiService.getShifts(workerId);
+      const response = await apiService.getShifts(workerId, apply);
       if (response.error) {
         error.value = response.error.message;
       } else if (response.data) {
-        shifts.value = response.data;
+        apply(response.data);
       }
     } catch (err) {
       error.value = err instanceof Error ? err.message : 'Failed to fetch shifts';
@@ -0,0 +1,30 @@
+import { ref, computed } from 'vue';
+import { apiService } from '@/services/api';
+import type { Stats } from '@/types';
+
+const stats = ref<Stats | null>(null);
+const error = ref<string | null>(null);
+
+export function useStats() {
+  const fetchStats = async () => {
+    error.value = null;
+    try {
+      const response = await apiService.getStats((data) => {
+        stats.value = data;
+      });
+      if (response.error) {
+        error.value = response.error.message;
+      } else if (response.data) {
+        stats.value = response.data;
+      }
+    } catch (err) {
+      error.value = err instanceof Error ? err.message : 'Failed to fetch stats';
+    }
+  };
+
+  return {
+    stats: computed(() => stats.value),
+    error: computed(() => error.value),
+    fetchStats,
+  };
+}
@@ -10,7 +10,9 @@ export function useTimezone() {
     loading.value = true;
     error.value = null;
     try {
-      const response = await apiService.getTimezone();
+      const response = await apiService.getTimezone((data) => {
+        timezone.value = data.timezone;
+      });
       if (response.error) {
         error.value = response.error.message;
       } else if (response.data) {
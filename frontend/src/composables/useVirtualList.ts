@@ -0,0 +1,38 @@
+import { ref, computed, watch, onBeforeUnmount, onMounted, type Ref } from 'vue';
+import { visibleRange } from '@/lib/virtual-list';
+
+interface VirtualListOptions {
+  rowHeight: number; // Fixed row height in pixels
+  overscan?: number;
+}
+
+// Renders the rows of `items` visible in a scrolling container, plus overscan
+export function useVirtualList<T>(items: Ref<T[]>, options: VirtualListOptions) {
+  const container = ref<HTMLElement | null>(null);
+  const scrollTop = ref(0);
+  const viewportHeight = ref(800);
+
+  const measure = () => {
+    if (container.value?.clientHeight) viewportHeight.value = container.value.clientHeight;
+  };
+  const onScroll = () => {
+    if (container.value) scrollTop.value = container.value.scrollTop;
+  };
+
+  // The container only exists once there are rows to show
+  watch(container, measure);
+  onMounted(() => window.addEventListener('resize', measure));
+  onBeforeUnmount(() => window.removeEventListener('resize', measure));
+
+  const scrollToTop = () => {
+    if (container.value) container.value.scrollTop = 0;
+    scrollTop.value = 0;
+  };
+
+  const range = computed(() =>
+    visibleRange(items.value.length, options.rowHeight, scrollTop.value, viewportHeight.value, options.overscan),
+  );
+  const visibleItems = computed(() => items.value.slice(range.value.start, range.value.end));
+
+  return { container, onScroll, scrollToTop, range, visibleItems };
+}
@@ -11,7 +11,9 @@ export function useWorkers() {
     loading.value = true;
     error.value = null;
     try {
-      const response = await apiService.getWorkers();
+      const response = await apiService.getWorkers((data) => {
+        workers.value = data;
+      });
       if (response.error) {
         error.value = response.error.message;
       } else if (response.data) {
@@ -4,6 +4,7 @@ import {
   formatTime,
   formatDateTime,
   formatDateTimeLocal,
+  formatDayLabel,
   localToISO,
 } from './date-utils';
 
@@ -23,6 +24,10 @@ describe('date-utils formatting helpers', () => {
     expect(formatTime(ISO_SAMPLE, 'America/Los_Angeles')).toBe('07:56 AM');
   });
 
+  it('formats local dates as day labels without shifting them', () => {
+    expect(formatDayLabel('2025-11-18')).toBe('Tue 18');
+  });
+
   it('formats ISO into datetime-local input value', () => {
     expect(formatDateTimeLocal(ISO_SAMPLE, 'UTC')).toBe('2025-11-18T15:56');
     expect(formatDateTimeLocal(ISO_SAMPLE, 'America/New_York')).toBe('2025-11-18T10:56');
@@ -48,6 +48,19 @@ export function formatTime(isoString: string, timezone: string): string {
   }).format(date);
 }
 
+/**
+ * Format a local calendar date (YYYY-MM-DD) as a short day label, e.g. "Mon 18".
+ * The date is already local, so no timezone conversion is applied.
+ */
+export function formatDayLabel(localDate: string): string {
+  const date = new Date(`${localDate}T00:00:00Z`);
+  return new Intl.DateTimeFormat('en-US', {
+    weekday: 'short',
+    day: 'numeric',
+    timeZone: 'UTC',
+  }).format(date);
+}
+
 /**
  * Format datetime for input fields (local datetime-local format)
  */
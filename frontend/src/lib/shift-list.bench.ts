@@ -0,0 +1,94 @@
+/**
+ * Rendering and filtering a large shift list: the approach the shift table
+ * used before (sort comparing Date objects, a worker search per row, every
+ * row rendered) against the current one (starts parsed once, a name Map,
+ * only the visible window rendered).
+ *
+ * Run with `npm run bench`.
+ */
+
+import { bench, describe } from 'vitest';
+import { createApp, h } from 'vue';
+import type { Shift, Worker } from '@/types';
+import { filterShiftsByWorker, sortShiftsByStart, workerName, workerNameMap } from './shift-list';
+import { visibleRange } from './virtual-list';
+
+const SHIFT_COUNT = 20_000;
+const WORKER_COUNT = 500;
+const ROW_HEIGHT = 65;
+const VIEWPORT_HEIGHT = 800;
+
+const workers: Worker[] = Array.from({ length: WORKER_COUNT }, (_, i) => ({ id: `worker-${i}`, name: `Worker ${i}` }));
+
+// Shuffled starts over a year; no embedded workers, so names come from the lookup
+const shifts: Shift[] = Array.from({ length: SHIFT_COUNT }, (_, i) => {
+  const start = Date.UTC(2025, 0, 1) + ((i * 7919) % SHIFT_COUNT) * 26 * 60_000;
+  return {
+    id: `shift-${i}`,
+    workerId: workers[i % WORKER_COUNT].id,
+    start: new Date(start).toISOString(),
+    end: new Date(start + 8 * 3_600_000).toISOString(),
+    duration: 8,
+  };
+});
+const filterWorkerId = workers[7].id;
+
+function legacyList(workerId?: string) {
+  const filtered = workerId ? shifts.filter((shift) => shift.workerId === workerId) : shifts;
+  return [...filtered]
+    .sort((a, b) => new Date(a.start).getTime() - new Date(b.start).getTime())
+    .map((shift) => ({ shift, name: workers.find((w) => w.id === shift.workerId)?.name || 'Unknown' }));
+}
+
+const sortedOnce = sortShiftsByStart(shifts);
+const names = workerNameMap(workers);
+
+function currentList(sorted: Shift[], workerId?: string) {
+  return filterShiftsByWorker(sorted, workerId).map((shift) => ({ shift, name: workerName(shift, names) }));
+}
+
+function renderRows(rows: { shift: Shift; name: string }[]) {
+  const root = document.createElement('div');
+  const app = createApp({
+    render: () =>
+      h('table', [
+        h(
+          'tbody',
+          rows.map(({ shift, name }) =>
+            h('tr', { key: shift.id }, [h('td', name), h('td', shift.start), h('td', shift.end), h('td', `${shift.duration}h`)]),
+          ),
+        ),
+      ]),
+  });
+  app.mount(root);
+  app.unmount();
+}
+
+describe(`sort and name ${SHIFT_COUNT} shifts`, () => {
+  bench('legacy: Date comparator, worker search per row', () => {
+    legacyList();
+  });
+  bench('current: parsed starts, name Map', () => {
+    currentList(sortShiftsByStart(shifts));
+  });
+});
+
+describe('change the worker filter', () => {
+  bench('legacy: filter and sort again', () => {
+    legacyList(filterWorkerId);
+  });
+  bench('current: filter the sorted list', () => {
+    currentList(sortedOnce, filterWorkerId);
+  });
+});
+
+describe(`render the table of ${SHIFT_COUNT} shifts`, () => {
+  const rows = currentList(sortedOnce);
+  bench('every row', () => {
+    renderRows(rows);
+  });
+  bench('visible window', () => {
+    const range = visibleRange(rows.length, ROW_HEIGHT, 0, VIEWPORT_HEIGHT);
+    renderRows(rows.slice(range.start, range.end));
+  });
+});
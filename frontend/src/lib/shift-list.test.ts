@@ -0,0 +1,44 @@
+import { describe, expect, it } from 'vitest';
+import type { Shift } from '@/types';
+import { filterShiftsByWorker, nextShiftAfter, sortShiftsByStart, workerName, workerNameMap } from './shift-list';
+import { visibleRange } from './virtual-list';
+
+function shift(id: string, workerId: string, start: string): Shift {
+  return { id, workerId, start, end: start, duration: 0 };
+}
+
+describe('shift list helpers', () => {
+  const shifts = [
+    shift('c', 'w1', '2025-11-20T09:00:00Z'),
+    shift('a', 'w2', '2025-11-18T09:00:00Z'),
+    shift('b', 'w1', '2025-11-19T09:00:00.000Z'),
+  ];
+
+  it('sorts by start and filters without reordering', () => {
+    const sorted = sortShiftsByStart(shifts);
+    expect(sorted.map((s) => s.id)).toEqual(['a', 'b', 'c']);
+    expect(filterShiftsByWorker(sorted, 'w1').map((s) => s.id)).toEqual(['b', 'c']);
+    expect(filterShiftsByWorker(sorted, '')).toBe(sorted);
+  });
+
+  it('finds the next shift by binary search', () => {
+    const sorted = sortShiftsByStart(shifts);
+    expect(nextShiftAfter(sorted, Date.parse('2025-11-18T09:00:00Z'))?.id).toBe('b');
+    expect(nextShiftAfter(sorted, Date.parse('2025-11-17T00:00:00Z'))?.id).toBe('a');
+    expect(nextShiftAfter(sorted, Date.parse('2025-11-21T00:00:00Z'))).toBeNull();
+  });
+
+  it('looks up worker names by ID, preferring embedded workers', () => {
+    const names = workerNameMap([{ id: 'w1', name: 'Ada' }]);
+    expect(workerName(shifts[0], names)).toBe('Ada');
+    expect(workerName({ workerId: 'w1', worker: { id: 'w1', name: 'Embedded' } }, names)).toBe('Embedded');
+    expect(workerName(shifts[1], names)).toBe('Unknown');
+  });
+
+  it('computes the rendered window of a long list', () => {
+    expect(visibleRange(20000, 50, 0, 500, 5)).toEqual({ start: 0, end: 15, padTop: 0, padBottom: 19985 * 50 });
+    expect(visibleRange(20000, 50, 10000, 500, 5)).toEqual({ start: 195, end: 215, padTop: 9750, padBottom: 19785 * 50 });
+    // Past the end, e.g. right after the list got shorter
+    expect(visibleRange(10, 50, 10000, 500, 5)).toEqual({ start: 5, end: 10, padTop: 250, padBottom: 0 });
+  });
+});
@@ -0,0 +1,39 @@
+/**
+ * List helpers for the shift table, written for tens of thousands of shifts
+ */
+
+import type { Shift, Worker } from '@/types';
+
+// Worker names by ID, built once per worker list instead of a search per row
+export function workerNameMap(workers: Worker[]): Map<string, string> {
+  return new Map(workers.map((worker) => [worker.id, worker.name]));
+}
+
+export function workerName(shift: Pick<Shift, 'workerId' | 'worker'>, names: Map<string, string>): string {
+  return shift.worker?.name || names.get(shift.workerId) || 'Unknown';
+}
+
+// Shifts ordered by start; each start is parsed once, not once per comparison
+export function sortShiftsByStart(shifts: Shift[]): Shift[] {
+  const keyed = shifts.map((shift) => ({ start: Date.parse(shift.start), shift }));
+  keyed.sort((a, b) => a.start - b.start);
+  return keyed.map((entry) => entry.shift);
+}
+
+// A worker's shifts, keeping the input order; all shifts when workerId is empty
+export function filterShiftsByWorker(shifts: Shift[], workerId?: string): Shift[] {
+  if (!workerId) return shifts;
+  return shifts.filter((shift) => shift.workerId === workerId);
+}
+
+// First shift starting after `now` in a list sorted by start, by binary search
+export function nextShiftAfter(sortedShifts: Shift[], now: number): Shift | null {
+  let low = 0;
+  let high = sortedShifts.length;
+  while (low < high) {
+    const mid = (low + high) >>> 1;
+    if (Date.parse(sortedShifts[mid].start) > now) high = mid;
+    else low = mid + 1;
+  }
+  return sortedShifts[low] ?? null;
+}
@@ -0,0 +1,29 @@
+/**
+ * Window arithmetic for lists rendering only their visible rows
+ */
+
+export interface VisibleRange {
+  start: number; // First rendered index
+  end: number; // One past the last rendered index
+  padTop: number; // Height standing in for the rows above, in pixels
+  padBottom: number; // Height standing in for the rows below, in pixels
+}
+
+// Rows of a fixed height visible in the viewport, plus `overscan` rows on either side
+export function visibleRange(
+  count: number,
+  rowHeight: number,
+  scrollTop: number,
+  viewportHeight: number,
+  overscan = 8,
+): VisibleRange {
+  const first = Math.floor(Math.max(scrollTop, 0) / rowHeight);
+  const start = Math.max(0, Math.min(first, count) - overscan);
+  const end = Math.min(count, first + Math.ceil(viewportHeight / rowHeight) + overscan);
+  return {
+    start,
+    end,
+    padTop: start * rowHeight,
+    padBottom: Math.max(0, count - end) * rowHeight,
+  };
+}
@@ -2,7 +2,8 @@
  * API service for communicating with the backend
  */
 
-import type { Worker, Shift, TimezoneSetting, ApiResponse } from '@/types';
+import type { Worker, Shift, ScheduleGrid, Stats, TimezoneSetting, ApiError, ApiResponse } from '@/types';
+import { QueryCache } from '@/services/query-cache';
 
 // Mapping helpers between backend (snake_case) and frontend (camelCase)
 function toFrontendWorker(w: any): Worker {
@@ -21,11 +22,26 @@ function toFrontendShift(s: any): Shift {
     start: s.start,
     end: s.end,
     duration: s.duration,
+    worker: s.worker ? { id: s.worker.id, name: s.worker.name } : undefined,
+    templateId: s.template_id ?? undefined,
     createdAt: s.created_at,
     updatedAt: s.updated_at,
   } as Shift;
 }
 
+function toFrontendGrid(g: any): ScheduleGrid {
+  return {
+    timezone: g.timezone,
+    from: g.from,
+    to: g.to,
+    today: g.today ?? undefined,
+    days: g.days,
+    rows: (g.rows || []).map((r: any) => ({ workerId: r.worker_id, hours: r.hours, totalHours: r.total_hours })),
+    totalHours: g.total_hours,
+    shiftCount: g.shift_count,
+  };
+}
+
 function toBackendShiftPayload(input: any): any {
   const payload: any = {};
   if (input.workerId !== undefined) payload.worker_id = input.workerId;
@@ -36,6 +52,36 @@ function toBackendShiftPayload(input: any): any {
 }
 
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:8080';
+// Tenant (Datastore namespace) to use; the backend default namespace when unset
+const TENANT_ID: string | undefined = import.meta.env.VITE_TENANT_ID;
+
+// Cached reads are served without a request for 30 seconds, then shown
+// while they are refreshed for up to 10 minutes
+const QUERY_STALE_MS = 30_000;
+const QUERY_MAX_AGE_MS = 10 * 60_000;
+
+// Cached reads a successful write to each resource can change
+const INVALIDATED_BY: Record<string, string[]> = {
+  timezone: ['/api/timezone', '/api/shifts', '/api/schedule'],
+  workers: ['/api/workers', '/api/shifts', '/api/schedule', '/api/stats'],
+  shifts: ['/api/shifts', '/api/schedule', '/api/stats'],
+  'shift-templates': ['/api/shift-templates', '/api/shifts', '/api/schedule', '/api/stats'],
+  schedule: ['/api/shifts', '/api/schedule', '/api/stats'],
+};
+
+function invalidatedBy(endpoint: string): string[] | undefined {
+  const resource = endpoint.split('?')[0].split('/')[2];
+  return INVALIDATED_BY[resource];
+}
+
+class RequestFailed extends Error {
+  apiError: ApiError;
+
+  constructor(apiError: ApiError) {
+    super(apiError.message);
+    this.apiError = apiError;
+  }
+}
 
 function extractErrorMessage(status: number, statusText: string, payload?: any): string {
   if (payload) {
@@ -61,6 +107,8 @@ function extractErrorMessage(status: number, statusText: string, payload?: any):
 }
 
 class ApiService {
+  readonly cache = new QueryCache({ staleMs: QUERY_STALE_MS, maxAgeMs: QUERY_MAX_AGE_MS });
+
   private async request<T>(
     endpoint: string,
     options: RequestInit = {}
@@ -69,6 +117,7 @@ class ApiService {
       const response = await fetch(`${API_BASE_URL}${endpoint}`, {
         headers: {
           'Content-Type': 'application/json',
+          ...(TENANT_ID ? { 'X-Tenant-ID': TENANT_ID } : {}),
           ...options.headers,
         },
         ...options,
@@ -89,6 +138,11 @@ class ApiService {
         };
       }
 
+      if (options.method && options.method !== 'GET') {
+        // Unknown resources (jobs) can change anything
+        this.cache.invalidate(invalidatedBy(endpoint));
+      }
+
       const hasBody = response.headers.get('content-length') !== '0' && response.status !== 204;
       const data = hasBody ? await response.json() : null;
       return { data: data as T };
@@ -101,9 +155,35 @@ class ApiService {
     }
   }
 
+  /**
+   * GET through the query cache. Concurrent calls share one request, and
+   * stale data is returned at once while onRevalidated gets the refresh.
+   */
+  private async cachedGet<T>(
+    endpoint: string,
+    map: (data: any) => T,
+    onRevalidated?: (data: T) => void,
+  ): Promise<ApiResponse<T>> {
+    try {
+      const data = await this.cache.fetch(
+        endpoint,
+        async () => {
+          const res = await this.request<any>(endpoint);
+          if (res.error) throw new RequestFailed(res.error);
+          return map(res.data);
+        },
+        onRevalidated,
+      );
+      return { data };
+    } catch (error) {
+      if (error instanceof RequestFailed) return { error: error.apiError };
+      return { error: { message: error instanceof Error ? error.message : 'Network error occurred' } };
+    }
+  }
+
   // Timezone endpoints
-  async getTimezone(): Promise<ApiResponse<TimezoneSetting>> {
-    return this.request<TimezoneSetting>('/api/timezone');
+  async getTimezone(onRevalidated?: (data: TimezoneSetting) => void): Promise<ApiResponse<TimezoneSetting>> {
+    return this.cachedGet('/api/timezone', (data) => data as TimezoneSetting, onRevalidated);
   }
 
   async setTimezone(timezone: string): Promise<ApiResponse<TimezoneSetting>> {
@@ -114,11 +194,16 @@ class ApiService {
   }
 
   // Worker endpoints
-  async getWorkers(): Promise<ApiResponse<Worker[]>> {
-    const res = await this.request<any[]>('/api/workers');
+  async getWorkers(onRevalidated?: (data: Worker[]) => void): Promise<ApiResponse<Worker[]>> {
+    return this.cachedGet('/api/workers', (data) => (data || []).map(toFrontendWorker), onRevalidated);
+  }
+
+  // Case-insensitive name prefix search, for autocomplete
+  async searchWorkers(query: string, limit = 20): Promise<ApiResponse<Worker[]>> {
+    const params = new URLSearchParams({ q: query, limit: String(limit) });
+    const res = await this.request<any[]>(`/api/workers?${params}`);
     if (res.error) return { error: res.error };
-    const mapped = (res.data || []).map(toFrontendWorker);
-    return { data: mapped };
+    return { data: (res.data || []).map(toFrontendWorker) };
   }
 
   async getWorker(id: string): Promise<ApiResponse<Worker>> {
@@ -152,12 +237,11 @@ class ApiService {
   }
 
   // Shift endpoints
-  async getShifts(workerId?: string): Promise<ApiResponse<Shift[]>> {
-    const query = workerId ? `?worker_id=${encodeURIComponent(workerId)}` : '';
-    const res = await this.request<any[]>(`/api/shifts${query}`);
-    if (res.error) return { error: res.error };
-    const mapped = (res.data || []).map(toFrontendShift);
-    return { data: mapped };
+  async getShifts(workerId?: string, onRevalidated?: (data: Shift[]) => void): Promise<ApiResponse<Shift[]>> {
+    // Without include=worker the server answers from its cached JSON body;
+    // rows look worker names up in the worker list instead
+    const path = workerId ? `/api/shifts?${new URLSearchParams({ worker_id: workerId })}` : '/api/shifts';
+    return this.cachedGet(path, (data) => (data || []).map(toFrontendShift), onRevalidated);
   }
 
   async getShift(id: string): Promise<ApiResponse<Shift>> {
@@ -168,7 +252,7 @@ class ApiService {
 
   async createShift(shift: Omit<Shift, 'id' | 'duration'>): Promise<ApiResponse<Shift>> {
     const payload = toBackendShiftPayload(shift as any);
-    const res = await this.request<any>('/api/shifts', {
+    const res = await this.request<any>('/api/shifts?include=worker', {
       method: 'POST',
       body: JSON.stringify(payload),
     });
@@ -181,7 +265,7 @@ class ApiService {
     shift: Partial<Omit<Shift, 'id' | 'duration'>>
   ): Promise<ApiResponse<Shift>> {
     const payload = toBackendShiftPayload(shift as any);
-    const res = await this.request<any>(`/api/shifts/${id}`, {
+    const res = await this.request<any>(`/api/shifts/${id}?include=worker`, {
       method: 'PUT',
       body: JSON.stringify(payload),
     });
@@ -195,6 +279,28 @@ class ApiService {
     });
   }
 
+  // Schedule grid: hours per worker and local day, the next 7 days by default
+  async getScheduleGrid(
+    from?: string,
+    to?: string,
+    onRevalidated?: (data: ScheduleGrid) => void,
+  ): Promise<ApiResponse<ScheduleGrid>> {
+    const params = new URLSearchParams();
+    if (from) params.set('from', from);
+    if (to) params.set('to', to);
+    const query = params.toString();
+    return this.cachedGet(`/api/schedule/grid${query ? `?${query}` : ''}`, toFrontendGrid, onRevalidated);
+  }
+
+  // Tenant totals, summed from counters instead of downloading every shift
+  async getStats(onRevalidated?: (data: Stats) => void): Promise<ApiResponse<Stats>> {
+    return this.cachedGet(
+      '/api/stats',
+      (data): Stats => ({ shifts: data.shifts, hours: data.hours, workers: data.workers }),
+      onRevalidated,
+    );
+  }
+
   // Helpers to map backend (snake_case) <-> frontend (camelCase)
   
   
@@ -0,0 +1,64 @@
+import { describe, expect, it, vi } from 'vitest';
+import { QueryCache } from './query-cache';
+
+function deferred<T>() {
+  let resolve!: (value: T) => void;
+  const promise = new Promise<T>((res) => {
+    resolve = res;
+  });
+  return { promise, resolve };
+}
+
+describe('QueryCache', () => {
+  it('shares one request between concurrent fetches of a key', async () => {
+    const cache = new QueryCache({ staleMs: 1000, maxAgeMs: 5000 });
+    const response = deferred<string[]>();
+    const fetcher = vi.fn(() => response.promise);
+
+    const first = cache.fetch('/api/workers', fetcher);
+    const second = cache.fetch('/api/workers', fetcher);
+    response.resolve(['a']);
+
+    expect(await first).toEqual(['a']);
+    expect(await second).toEqual(['a']);
+    expect(fetcher).toHaveBeenCalledTimes(1);
+    // Fresh entries are served without a request
+    expect(await cache.fetch('/api/workers', fetcher)).toEqual(['a']);
+    expect(fetcher).toHaveBeenCalledTimes(1);
+  });
+
+  it('returns stale data at once and revalidates in the background', async () => {
+    let now = 0;
+    const cache = new QueryCache({ staleMs: 1000, maxAgeMs: 5000 }, () => now);
+    await cache.fetch('/api/stats', async () => 1);
+
+    now = 2000;
+    const onRevalidated = vi.fn();
+    expect(await cache.fetch('/api/stats', async () => 2, onRevalidated)).toBe(1);
+    await vi.waitFor(() => expect(onRevalidated).toHaveBeenCalledWith(2));
+    expect(cache.peek('/api/stats')).toBe(2);
+
+    // Past the maximum age the caller waits for fresh data
+    now = 10000;
+    expect(await cache.fetch('/api/stats', async () => 3)).toBe(3);
+  });
+
+  it('does not store responses for keys invalidated while in flight', async () => {
+    const cache = new QueryCache({ staleMs: 1000, maxAgeMs: 5000 });
+    const response = deferred<number>();
+    const pending = cache.fetch('/api/shifts?include=worker', () => response.promise);
+
+    cache.invalidate(['/api/shifts', '/api/stats']);
+    response.resolve(1);
+
+    expect(await pending).toBe(1);
+    expect(cache.peek('/api/shifts?include=worker')).toBeUndefined();
+    expect(await cache.fetch('/api/shifts?include=worker', async () => 2)).toBe(2);
+  });
+
+  it('does not cache failures', async () => {
+    const cache = new QueryCache({ staleMs: 1000, maxAgeMs: 5000 });
+    await expect(cache.fetch('/api/timezone', () => Promise.reject(new Error('down')))).rejects.toThrow('down');
+    expect(cache.size).toBe(0);
+  });
+});
@@ -0,0 +1,99 @@
+/**
+ * Stale-while-revalidate cache for GET requests, with in-flight dedupe
+ *
+ * - Fresh entries (younger than staleMs) are returned without a request.
+ * - Stale entries (younger than maxAgeMs) are returned at once and refreshed
+ *   in the background; the caller's onRevalidated gets the new data.
+ * - Missing or expired entries are fetched; concurrent fetches of the same
+ *   key share one request.
+ *
+ * Writes invalidate entries by key prefix. A fetch that was in flight when
+ * its key was invalidated still resolves for its caller but is not stored,
+ * so data from before a write never re-enters the cache.
+ */
+
+export interface QueryCacheOptions {
+  staleMs: number;
+  maxAgeMs: number;
+}
+
+interface Entry {
+  data?: unknown;
+  updatedAt: number;
+  inFlight?: Promise<unknown>;
+}
+
+export class QueryCache {
+  private entries = new Map<string, Entry>();
+  private options: QueryCacheOptions;
+  private now: () => number;
+
+  constructor(options: QueryCacheOptions, now: () => number = () => Date.now()) {
+    this.options = options;
+    this.now = now;
+  }
+
+  async fetch<T>(key: string, fetcher: () => Promise<T>, onRevalidated?: (data: T) => void): Promise<T> {
+    const entry = this.entries.get(key);
+    if (entry && entry.data !== undefined) {
+      const age = this.now() - entry.updatedAt;
+      if (age < this.options.staleMs) return entry.data as T;
+      if (age < this.options.maxAgeMs) {
+        this.load(key, fetcher).then(
+          (data) => onRevalidated?.(data),
+          () => undefined, // The stale data stays until the next attempt
+        );
+        return entry.data as T;
+      }
+    }
+    return this.load(key, fetcher);
+  }
+
+  // One request per key at a time
+  private load<T>(key: string, fetcher: () => Promise<T>): Promise<T> {
+    let entry = this.entries.get(key);
+    if (entry?.inFlight) return entry.inFlight as Promise<T>;
+    if (!entry) {
+      entry = { updatedAt: 0 };
+      this.entries.set(key, entry);
+    }
+    const current = entry;
+    const request = fetcher().then(
+      (data) => {
+        // Not stored if the key was invalidated meanwhile
+        if (this.entries.get(key) === current) {
+          current.data = data;
+          current.updatedAt = this.now();
+          current.inFlight = undefined;
+        }
+        return data;
+      },
+      (error) => {
+        if (this.entries.get(key) === current) {
+          current.inFlight = undefined;
+          if (current.data === undefined) this.entries.delete(key);
+        }
+        throw error;
+      },
+    );
+    current.inFlight = request;
+    return request;
+  }
+
+  peek<T>(key: string): T | undefined {
+    return this.entries.get(key)?.data as T | undefined;
+  }
+
+  // Drop entries whose key starts with any of the prefixes, or all entries
+  invalidate(prefixes?: string[]): void {
+    for (const key of [...this.entries.keys()]) {
+      if (!prefixes || prefixes.some((prefix) => key.startsWith(prefix))) {
+        this.entries.delete(key);
+      }
+    }
+  }
+
+  get size(): number {
+    return this.entries.size;
+  }
+}
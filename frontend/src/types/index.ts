@@ -16,10 +16,44 @@ export interface Shift {
   start: string; // ISO 8601 datetime string
   end: string; // ISO 8601 datetime string
   duration: number; // Computed duration in floating point hours (read-only)
+  templateId?: string; // Set for occurrences of a recurring template and their edited copies
   createdAt?: string;
   updatedAt?: string;
 }
 
+export interface GridDay {
+  date: string; // Local date, YYYY-MM-DD
+  start: string; // Local midnight in UTC
+  end: string; // Next local midnight in UTC (23 or 25 hours later on DST changes)
+  hours: number;
+  workers: number;
+}
+
+export interface GridRow {
+  workerId: string;
+  hours: number[]; // Hours per day, aligned with ScheduleGrid.days
+  totalHours: number;
+}
+
+// Worker x local day hours, computed by the backend
+export interface ScheduleGrid {
+  timezone: string;
+  from: string;
+  to: string;
+  today?: string;
+  days: GridDay[];
+  rows: GridRow[];
+  totalHours: number;
+  shiftCount: number;
+}
+
+// Totals from the backend's statistics counters
+export interface Stats {
+  shifts: number;
+  hours: number;
+  workers: number;
+}
+
 export interface TimezoneSetting {
   timezone: string; // IANA timezone string
 }